@@ -12,6 +12,8 @@ Some scripts to work with time series data.
 Assumes regularly sampled time series, where time is always increasing. If
 these conditions are not met the behaviour is undefined.
 """
+import importlib
+
 
 #
 # Version information
@@ -25,40 +27,106 @@ from ._datkit_version import (  # noqa
 #
 # Imports
 #
-from ._check_times import (  # noqa
-    is_increasing,
-    is_regularly_increasing,
-    sampling_interval,
-)
+# Public methods and classes are imported from their submodules when first
+# used (see PEP 562), so that ``import datkit`` is fast and does not import
+# NumPy until it is needed.
+#
+_EXPORTS = {
+    '_check_times': (
+        'first_irregularity',
+        'is_increasing',
+        'is_regularly_increasing',
+        'sampling_interval',
+    ),
+    '_chunks': (
+        'chunk_size',
+        'set_chunk_size',
+    ),
+    '_parallel': (
+        'parallel_map',
+    ),
+    '_points': (
+        'abs_max_on',
+        'abs_maxima_on',
+        'data_on',
+        'iabs_max_on',
+        'iabs_maxima_on',
+        'imax_on',
+        'imaxima_on',
+        'imin_on',
+        'iminima_on',
+        'index',
+        'index_crossing',
+        'index_crossings',
+        'index_near',
+        'index_on',
+        'index_steps',
+        'indices_on',
+        'max_on',
+        'maxima_on',
+        'mean_on',
+        'means_on',
+        'min_on',
+        'minima_on',
+        'sum_on',
+        'time_crossing',
+        'time_crossings',
+        'time_steps',
+        'value_at',
+        'value_interpolated',
+        'value_near',
+        'variance_on',
+    ),
+    '_profiling': (
+        'Profile',
+        'profiling',
+    ),
+    '_smoothing': (
+        'haar_downsample',
+        'haar_pyramid',
+        'gaussian_smoothing',
+        'lttb_downsample',
+        'minmax_downsample',
+        'moving_average',
+        'window_size',
+    ),
+    '_spectral': (
+        'amplitude_spectrum',
+        'power_spectral_density',
+        'welch_amplitude_spectrum',
+        'welch_power_spectral_density',
+    ),
+    '_streaming': (
+        'StreamingGaussianSmoothing',
+        'StreamingMovingAverage',
+    ),
+    '_time_series': (
+        'TimeSeries',
+    ),
+    '_workspace': (
+        'Workspace',
+    ),
+}
 
-from ._points import (  # noqa
-    abs_max_on,
-    data_on,
-    iabs_max_on,
-    imax_on,
-    imin_on,
-    index,
-    index_crossing,
-    index_near,
-    index_on,
-    max_on,
-    mean_on,
-    min_on,
-    time_crossing,
-    value_at,
-    value_interpolated,
-    value_near,
-)
+# Maps each public name to the submodule that defines it
+_MODULES = {
+    name: module for module, names in _EXPORTS.items() for name in names}
 
-from ._smoothing import (  # noqa
-    haar_downsample,
-    gaussian_smoothing,
-    moving_average,
-    window_size,
-)
+__all__ = sorted(_MODULES)
+
+
+def __getattr__(name):
+    """ Imports public names and submodules when first accessed. """
+    module = _MODULES.get(name)
+    if module is not None:
+        value = getattr(importlib.import_module('.' + module, __name__), name)
+        globals()[name] = value
+        return value
+    if name in _EXPORTS:
+        return importlib.import_module('.' + name, __name__)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
-from ._spectral import (  # noqa
-    amplitude_spectrum,
-    power_spectral_density,
-)
 
+def __dir__():
+    """ Lists all public names, including those not yet imported. """
+    return sorted(set(globals()) | set(_MODULES))
@@ -4,12 +4,64 @@
 # This file is part of Datkit.
 # For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
 #
+import collections
+import threading
+import weakref
+
 import numpy as np
 
+from ._chunks import _chunks
+from ._profiling import _instrument
+
+
+# Number of samples used to calculate a sampling interval
+_INTERVAL_SAMPLES = 100
+
+# Recently calculated sampling intervals, see :meth:`_cached_interval`
+_INTERVALS = collections.OrderedDict()
+_INTERVALS_LOCK = threading.Lock()
+_INTERVALS_SIZE = 32
+
+
+@_instrument
+def first_irregularity(times, reltol=1e-12):
+    """
+    Returns the lowest index ``i`` for which the step from ``times[i]`` to
+    ``times[i + 1]`` is irregular, or ``None`` if ``times`` is regularly
+    increasing.
+
+    A step is irregular if ``abs((times[i + 1] - times[i]) / dt - 1) >=
+    reltol``, where ``dt`` is the value returned by :meth:`sampling_interval`
+    (see :meth:`is_regularly_increasing`). If ``dt`` is not strictly positive,
+    ``0`` is returned.
 
+    The array is checked in chunks of increasing size (up to
+    :meth:`chunk_size`), and the method returns as soon as an irregular step
+    is found. As a result, irregularities early on in long arrays are found
+    quickly, while checking a regular array uses a bounded amount of memory.
+    """
+    times = np.asarray(times)
+    dt = sampling_interval(times)
+    if dt <= 0:
+        return 0
+    for i, j in _chunks(len(times) - 1, first=1024):
+        d = np.diff(times[i:j + 1]) / dt
+        d -= 1
+        bad = ~(np.abs(d, out=d) < reltol)
+        k = np.argmax(bad)
+        if bad[k]:
+            return i + int(k)
+    return None
+
+
+@_instrument
 def is_increasing(times):
     """
     Checks if each value in ``times`` is greater than (not equal to) the last.
+
+    Long arrays are checked in chunks of increasing size (up to
+    :meth:`chunk_size`), and the method returns as soon as a non-increasing
+    value is found.
     """
     times = np.asarray(times)
     if len(times.shape) != 1:
@@ -17,9 +69,13 @@ def is_increasing(times):
     if len(times) < 2:
         raise ValueError('Times must contain at least two values.')
 
-    return np.all(times[1:] > times[:-1])
+    for i, j in _chunks(len(times) - 1, first=1024):
+        if not np.all(times[i + 1:j + 1] > times[i:j]):
+            return False
+    return True
 
 
+@_instrument
 def is_regularly_increasing(times, reltol=1e-12):
     """
     Checks if the difference between successive times is always the same
@@ -28,27 +84,63 @@ def is_regularly_increasing(times, reltol=1e-12):
     Checks that ``dt``, the value returned by :meth:`sampling_interval`, is
     strictly positive and that
     ``abs((times[i + 1] - times[i]) / dt - 1) < reltol`` for all ``i``.
+
+    To find the location of the first irregular step, use
+    :meth:`first_irregularity`.
     """
-    times = np.asarray(times)
-    dt = sampling_interval(times)
-    if dt <= 0:
-        return False
-    d = np.abs(np.diff(times) / dt - 1)
-    return np.all(d < reltol)
+    return first_irregularity(times, reltol) is None
 
 
+@_instrument
 def sampling_interval(times):
     """
     Returns the sampling interval, assuming that ``times`` is regularly spaced.
+
+    The interval is calculated from the first 100 samples. Results for NumPy
+    arrays are cached, so that repeated calls on the same (unchanged) array
+    do not repeat this calculation.
     """
-    times = np.asarray(times)
+    if isinstance(times, np.ndarray) and times.ndim == 1 and len(times) > 1:
+        return _cached_interval(times)
+    return _interval(np.asarray(times))
+
+
+def _cached_interval(times):
+    """
+    Returns the sampling interval for a 1-d array ``times``, using a cached
+    value if possible.
+
+    The cache is a small LRU cache, keyed on the identity of the array. Each
+    entry stores a weak reference to the array (so that the cache does not
+    keep arrays alive, and entries for deleted arrays are never reused), and a
+    copy of the samples that the interval was calculated from. As a result,
+    changes to writeable arrays are always detected.
+    """
+    key = id(times)
+    samples = times[:_INTERVAL_SAMPLES].tobytes()
+    with _INTERVALS_LOCK:
+        entry = _INTERVALS.get(key)
+        if entry is not None:
+            ref, dtype, data, dt = entry
+            if ref() is times and dtype == times.dtype and data == samples:
+                _INTERVALS.move_to_end(key)
+                return dt
+
+    dt = _interval(times)
+    with _INTERVALS_LOCK:
+        _INTERVALS[key] = (weakref.ref(times), times.dtype, samples, dt)
+        _INTERVALS.move_to_end(key)
+        while len(_INTERVALS) > _INTERVALS_SIZE:
+            _INTERVALS.popitem(last=False)
+    return dt
+
+
+def _interval(times):
+    """ Implementation of :meth:`sampling_interval`, without caching. """
     if len(times.shape) != 1:
         raise ValueError('Times must be a 1-d numpy array.')
     if len(times) < 2:
         raise ValueError('Times must contain at least two values.')
 
     # Note: This is slower, but gets rid of numerical noise
-    if len(times) < 100:
-        return np.mean(np.diff(times))
-    return np.mean(np.diff(times[:100]))
-
+    return np.mean(np.diff(times[:_INTERVAL_SAMPLES]))
@@ -0,0 +1,57 @@
+#
+# Settings for processing long arrays in chunks.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+
+# Maximum number of samples processed at once
+_CHUNK_SIZE = 2**20
+
+
+def chunk_size():
+    """
+    Returns the maximum number of samples that datkit methods process at once
+    when scanning a long array.
+
+    See :meth:`set_chunk_size`.
+    """
+    return _CHUNK_SIZE
+
+
+def set_chunk_size(size):
+    """
+    Sets the maximum number of samples that datkit methods process at once
+    when scanning a long array.
+
+    Methods that scan an array to return a single result or a small number of
+    results (e.g. :meth:`is_regularly_increasing` or :meth:`index_crossings`)
+    do this in chunks of at most ``size`` samples, so that the temporary
+    arrays they create are no larger than a small multiple of ``size``. This
+    lets them be used on e.g. memory-mapped arrays that do not fit in memory.
+
+    The default size is ``2**20``.
+    """
+    global _CHUNK_SIZE
+    size = int(size)
+    if size < 2:
+        raise ValueError(f'The chunk size must be at least 2, got {size}.')
+    _CHUNK_SIZE = size
+
+
+def _chunks(n, start=0, first=None):
+    """
+    Yields tuples ``(i, j)`` that split ``range(start, n)`` into consecutive
+    chunks of at most :meth:`chunk_size` samples.
+
+    If ``first`` is given, the first chunk has size ``first``, and each next
+    chunk is twice as large as the last, until the chunk size is reached. This
+    lets methods that can stop early do so without processing a full chunk.
+    """
+    size = _CHUNK_SIZE if first is None else min(first, _CHUNK_SIZE)
+    i = start
+    while i < n:
+        j = min(n, i + size)
+        yield i, j
+        i = j
+        size = min(2 * size, _CHUNK_SIZE)
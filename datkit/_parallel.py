@@ -0,0 +1,184 @@
+#
+# Methods to process many time series in parallel.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import concurrent.futures
+import os
+import pickle
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def parallel_map(function, series, workers=None):
+    """
+    Applies ``function(times, values)`` to every pair ``(times, values)`` in
+    ``series``, using a pool of ``workers`` processes, and returns a list
+    containing the results in the same order as ``series``.
+
+    The ``function`` will typically combine several datkit methods into a
+    single pipeline, for example::
+
+        def pipeline(times, values):
+            if not datkit.is_regularly_increasing(times):
+                raise ValueError('Irregular sampling.')
+            x, y = datkit.moving_average(times, values, 11)
+            return datkit.maxima_on(x, y, [1, 3], [2, 4])
+
+        results = datkit.parallel_map(pipeline, recordings, workers=8)
+
+    Because it is sent to other processes, the ``function`` must be picklable,
+    e.g. a function defined at the top level of a module or a
+    ``functools.partial`` of one. Lambdas and locally defined functions can
+    only be used with ``workers=1``.
+
+    The arrays are passed to the workers through shared memory, instead of
+    being pickled, and are read-only inside the workers. The results are
+    pickled and sent back, so the method is most effective when the results
+    are small compared to the input data.
+
+    The ``series`` can be any iterable, for example a generator that loads
+    recordings from disk one at a time. At most ``2 * workers`` items are
+    held in shared memory at any time, so that the memory used does not
+    depend on the number of items.
+
+    If ``function`` raises an exception for an item, the exception is stored
+    in place of its result, so that a single bad recording does not stop the
+    others. Failed items can be found with ``isinstance(result, Exception)``.
+
+    If ``workers`` is ``None``, one worker per CPU is used. If ``workers`` is
+    ``1``, all items are processed in the current process, which can be
+    useful for debugging.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = int(workers)
+    if workers < 1:
+        raise ValueError(
+            f'The number of workers must be at least 1, got {workers}.')
+    if workers == 1:
+        return [_call(function, times, values) for times, values in series]
+
+    results, pending = [], {}
+    with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+        try:
+            for times, values in series:
+                if len(pending) >= 2 * workers:
+                    _collect(pending, results,
+                             concurrent.futures.FIRST_COMPLETED)
+                results.append(None)
+                try:
+                    blocks, specs = _share(times, values)
+                except Exception as e:
+                    results[-1] = e
+                    continue
+                try:
+                    future = pool.submit(_run, function, *specs)
+                except BaseException:  # pragma: no cover
+                    _release(blocks)
+                    raise
+                pending[future] = len(results) - 1, blocks
+            _collect(pending, results, concurrent.futures.ALL_COMPLETED)
+        finally:
+            # Wait for running items before releasing their memory
+            for future in pending:
+                future.cancel()
+            concurrent.futures.wait(pending)
+            for k, blocks in pending.values():
+                _release(blocks)
+    return results
+
+
+def _apply(function, blocks, specs):
+    """
+    Calls ``function`` on read-only views of the arrays stored in the shared
+    memory ``blocks``, and returns the pickled result or exception.
+    """
+    arrays = []
+    for block, (name, shape, dtype) in zip(blocks, specs):
+        x = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        x.setflags(write=False)
+        arrays.append(x)
+    result = _call(function, *arrays)
+    if isinstance(result, Exception):
+        result.__traceback__ = None
+    try:
+        return pickle.dumps(result)
+    except Exception as e:
+        return pickle.dumps(RuntimeError(
+            f'Unable to pickle result: {type(e).__name__}: {e}'))
+
+
+def _call(function, times, values):
+    """
+    Returns ``function(times, values)``, or the exception raised by it.
+    """
+    try:
+        return function(times, values)
+    except Exception as e:
+        return e
+
+
+def _collect(pending, results, return_when):
+    """
+    Waits for pending futures as specified by ``return_when``, and stores the
+    results of finished futures.
+    """
+    done, _ = concurrent.futures.wait(pending, return_when=return_when)
+    for future in done:
+        k, blocks = pending.pop(future)
+        _release(blocks)
+        try:
+            results[k] = pickle.loads(future.result())
+        except Exception as e:
+            results[k] = e
+
+
+def _release(blocks):
+    """
+    Closes and removes the given shared memory blocks.
+    """
+    for block in blocks:
+        block.close()
+        block.unlink()
+
+
+def _run(function, times, values):
+    """
+    Worker method: attaches to the shared memory blocks described by the
+    tuples ``times`` and ``values`` and returns the pickled result of
+    :meth:`_apply`.
+    """
+    blocks = [shared_memory.SharedMemory(name=spec[0])
+              for spec in (times, values)]
+    try:
+        # All views into the blocks are released when _apply returns
+        return _apply(function, blocks, (times, values))
+    finally:
+        for block in blocks:
+            block.close()
+
+
+def _share(*arrays):
+    """
+    Copies each array into a new shared memory block, and returns a tuple
+    ``(blocks, specs)``, where each ``spec = (name, shape, dtype)`` can be
+    used to access an array from another process.
+    """
+    blocks, specs = [], []
+    try:
+        for x in arrays:
+            x = np.asarray(x)
+            if x.dtype.hasobject:
+                raise ValueError('Arrays of Python objects cannot be shared.')
+            block = shared_memory.SharedMemory(
+                create=True, size=max(1, x.nbytes))
+            blocks.append(block)
+            np.ndarray(x.shape, dtype=x.dtype, buffer=block.buf)[...] = x
+            specs.append((block.name, x.shape, x.dtype.str))
+    except BaseException:
+        _release(blocks)
+        raise
+    return blocks, specs
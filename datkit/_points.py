@@ -7,8 +7,20 @@
 import numpy as np
 
 import datkit
+from ._chunks import _chunks, chunk_size
+from ._profiling import _instrument
 
 
+# Arithmetic lookups (see :meth:`_searchsorted`) are only used for at least
+# this many queries: for fewer queries, binary searches are faster
+_ARITHMETIC_QUERIES = 1000
+
+# Arithmetic lookups move each index by at most this many samples to correct
+# for rounding errors, before falling back to binary searches
+_ARITHMETIC_PASSES = 2
+
+
+@_instrument
 def abs_max_on(times, values, t0=None, t1=None, include_left=True,
                include_right=False):
     """
@@ -17,11 +29,30 @@ def abs_max_on(times, values, t0=None, t1=None, include_left=True,
 
     See also :meth:`index_on`.
     """
+    times, values = np.asarray(times), np.asarray(values)
     i, j = index_on(times, t0, t1, include_left, include_right)
-    i = i + np.argmax(np.abs(values[i:j]))
-    return times[i], values[i]
+    i = i + _iabs_max(values[..., i:j])
+    return times[i], _take(values, i)
+
+
+@_instrument
+def abs_maxima_on(times, values, t0=None, t1=None, include_left=True,
+                  include_right=False):
+    """
+    Returns a tuple ``(t_max, v_max)`` of arrays, containing the result of
+    :meth:`abs_max_on` for every interval from ``t0[k]`` to ``t1[k]``.
 
+    A ``ValueError`` is raised if any of the intervals is empty.
 
+    See also :meth:`indices_on`.
+    """
+    times, values = np.asarray(times), np.asarray(values)
+    i, j = indices_on(times, t0, t1, include_left, include_right)
+    i = _arg_reduce_on(np.maximum, values, i, j, np.abs)
+    return times[i], _take(values, i)
+
+
+@_instrument
 def data_on(times, values, t0=None, t1=None, include_left=True,
             include_right=False):
     """
@@ -34,9 +65,12 @@ def data_on(times, values, t0=None, t1=None, include_left=True,
     See also :meth:`index_on`.
     """
     i, j = index_on(times, t0, t1, include_left, include_right)
+    if np.ndim(values) > 1:
+        return times[i:j], np.asarray(values)[..., i:j]
     return times[i:j], values[i:j]
 
 
+@_instrument
 def iabs_max_on(times, values, t0=None, t1=None, include_left=True,
                 include_right=False):
     """
@@ -46,9 +80,25 @@ def iabs_max_on(times, values, t0=None, t1=None, include_left=True,
     See also :meth:`index_on`.
     """
     i, j = index_on(times, t0, t1, include_left, include_right)
-    return i + np.argmax(np.abs(values[i:j]))
+    return i + _iabs_max(np.asarray(values)[..., i:j])
+
+
+@_instrument
+def iabs_maxima_on(times, values, t0=None, t1=None, include_left=True,
+                   include_right=False):
+    """
+    Returns an array containing the result of :meth:`iabs_max_on` for every
+    interval from ``t0[k]`` to ``t1[k]``.
+
+    A ``ValueError`` is raised if any of the intervals is empty.
+
+    See also :meth:`indices_on`.
+    """
+    i, j = indices_on(times, t0, t1, include_left, include_right)
+    return _arg_reduce_on(np.maximum, np.asarray(values), i, j, np.abs)
 
 
+@_instrument
 def imax_on(times, values, t0=None, t1=None, include_left=True,
             include_right=False):
     """
@@ -58,9 +108,25 @@ def imax_on(times, values, t0=None, t1=None, include_left=True,
     See also :meth:`index_on`.
     """
     i, j = index_on(times, t0, t1, include_left, include_right)
-    return i + np.argmax(values[i:j])
+    return i + np.argmax(np.asarray(values)[..., i:j], axis=-1)
+
+
+@_instrument
+def imaxima_on(times, values, t0=None, t1=None, include_left=True,
+               include_right=False):
+    """
+    Returns an array containing the result of :meth:`imax_on` for every
+    interval from ``t0[k]`` to ``t1[k]``.
+
+    A ``ValueError`` is raised if any of the intervals is empty.
+
+    See also :meth:`indices_on`.
+    """
+    i, j = indices_on(times, t0, t1, include_left, include_right)
+    return _arg_reduce_on(np.maximum, np.asarray(values), i, j)
 
 
+@_instrument
 def imin_on(times, values, t0=None, t1=None, include_left=True,
             include_right=False):
     """
@@ -70,10 +136,26 @@ def imin_on(times, values, t0=None, t1=None, include_left=True,
     See also :meth:`index_on`.
     """
     i, j = index_on(times, t0, t1, include_left, include_right)
-    return i + np.argmin(values[i:j])
+    return i + np.argmin(np.asarray(values)[..., i:j], axis=-1)
 
 
-def index(times, t, ttol=1e-9):
+@_instrument
+def iminima_on(times, values, t0=None, t1=None, include_left=True,
+               include_right=False):
+    """
+    Returns an array containing the result of :meth:`imin_on` for every
+    interval from ``t0[k]`` to ``t1[k]``.
+
+    A ``ValueError`` is raised if any of the intervals is empty.
+
+    See also :meth:`indices_on`.
+    """
+    i, j = indices_on(times, t0, t1, include_left, include_right)
+    return _arg_reduce_on(np.minimum, np.asarray(values), i, j)
+
+
+@_instrument
+def index(times, t, ttol=1e-9, regular=False):
     """
     Returns the index of time ``t`` in ``times``, assuming ``times`` is a
     non-decreasing sequence.
@@ -81,28 +163,24 @@ def index(times, t, ttol=1e-9):
     A ``ValueError`` will be raised if time ``t`` cannot be found in ``times``.
     Two times will be regarded as equal if they are within ``ttol`` of each
     other.
-    """
-    # Check t is within range
-    if t < times[0]:
-        if abs(times[0] - t) <= ttol:
-            return 0
-        raise ValueError(
-            f'Time t is outside the provided range: {t} < {times[0]}.')
-    if t > times[-1]:
-        if abs(t - times[-1]) <= ttol:
-            return len(times) - 1
-        raise ValueError(
-            f'Time t is outside the provided range: {t} > {times[-1]}.')
 
-    # Find index and return
-    i = np.searchsorted(times, t)   # times[i - 1] < t <= times[i]
-    i = i if i == 0 or times[i] - t < t - times[i - 1] else i - 1
-    if abs(times[i] - t) > ttol:
-        raise ValueError(f'Time t={t} is not present in the data. Nearest'
-                         f' is {times[i]} at index {i}.')
-    return i
+    If ``t`` is a sequence, an array of indices is returned.
+
+    If ``regular`` is set to ``True``, ``times`` is assumed to be regularly
+    increasing (see :meth:`is_regularly_increasing`). This lets indices be
+    calculated directly from ``times[0]`` and the sampling interval, instead
+    of with a binary search, so that each lookup takes a constant time. This
+    is only done for large arrays of queries (1000 or more), as a binary
+    search is faster for smaller numbers, so that ``regular`` has no effect
+    for a scalar ``t``. The results are the same either way. If
+    ``regular=True`` is used on irregularly sampled times, binary searches
+    are still used for the queries that the arithmetic lookup cannot
+    resolve, which makes the lookup somewhat slower than without it.
+    """
+    return _index(times, t, ttol, _step(times, regular, t))
 
 
+@_instrument
 def index_crossing(values, value=0):
     """
     Returns the lowest two indices ``i`` and ``j`` for which ``values`` crosses
@@ -112,29 +190,108 @@ def index_crossing(values, value=0):
 
     The method is best applied to smooth (denoised) data.
 
-    A ``ValueError`` is raised if no crossing can be found, or
-    """
-    # Get sign of values - value, as either -1, 0, or 1
-    # This means we can't use numpy's sign function.
-    v = np.asarray(values) - value
-    s = np.zeros(v.shape)
-    s[v > 0] = 1
-    s[v < 0] = -1
-    # Find first non-zero
-    i = np.where(s != 0)[0]
-    if len(i) > 0:
-        i = i[0]
+    A ``ValueError`` is raised if ``values`` is not 1-dimensional, or if no
+    crossing can be found.
+
+    The array is scanned in chunks of increasing size, so that an early
+    crossing in a long recording is found without processing (or creating
+    temporary arrays for) the full signal. To find all crossings, use
+    :meth:`index_crossings`.
+    """
+    v = np.asarray(values)
+    if v.ndim != 1:
+        raise ValueError('Values must be a 1-d array.')
+
+    def above(x):
+        return x > value
+
+    def below(x):
+        return x < value
+
+    # Find first value not equal to value (or nan)
+    i = _first_where(v, lambda x: above(x) | below(x))
+    if i is not None:
         # Find first opposing sign
-        j = np.where(s == -s[i])[0]
-        if len(j) > 0:
-            j = j[0]
+        up = bool(below(v[i]))
+        j = _first_where(v, above if up else below, i + 1)
+        if j is not None:
             # Find last value with original sign
-            i = np.where(s[:j] == s[i])[0][-1]
+            i = _last_where(v, below if up else above, j)
             return i, j
     raise ValueError(f'No crossing of {value} found in array.')
 
 
-def index_near(times, t):
+@_instrument
+def index_crossings(values, value=0, direction=0, hysteresis=0,
+                    min_separation=0):
+    """
+    Returns two arrays ``i`` and ``j`` containing the indices of all points at
+    which ``values`` crosses the given ``value``.
+
+    Each pair ``(i[k], j[k])`` is defined as in :meth:`index_crossing`, so that
+    ``values[i[k]]`` and ``values[j[k]]`` are on opposite sides of ``value``,
+    and any points in between are equal to ``value``. If no crossings are
+    found, two empty arrays are returned.
+
+    To return only crossings from below to above, set ``direction`` to a
+    positive number. To return only crossings from above to below, set it to a
+    negative number.
+
+    For noisy signals, a ``hysteresis`` can be set, so that a crossing is only
+    counted when ``values`` goes from below ``value - hysteresis`` to above
+    ``value + hysteresis``, or vice versa. In this case ``values[i[k]]`` and
+    ``values[j[k]]`` are the last and first points outside this band, and the
+    points in between can be anywhere inside it.
+
+    If a ``min_separation`` is given, crossings with a ``j`` less than
+    ``min_separation`` samples after that of the last returned crossing are
+    ignored (after selecting crossings by ``direction``). This can be used to
+    ignore multiple crossings within e.g. a refractory period.
+
+    Long arrays are processed in chunks (see :meth:`set_chunk_size`), so that
+    the memory used is proportional to the chunk size and the number of
+    crossings, but not to the length of ``values``.
+    """
+    if hysteresis < 0:
+        raise ValueError('The hysteresis cannot be negative.')
+
+    # Process in chunks, carrying over the last non-zero state
+    v = np.asarray(values)
+    if v.ndim != 1:
+        raise ValueError('Values must be a 1-d array.')
+    i, j = [np.zeros(0, dtype=np.intp)], [np.zeros(0, dtype=np.intp)]
+    last = None
+    for a, b in _chunks(len(v)):
+        # Get state of each point as either -1, 0, or 1, and ignore zeros
+        x = v[a:b]
+        s = (x > value + hysteresis).view(np.int8)
+        s -= (x < value - hysteresis).view(np.int8)
+        k = np.flatnonzero(s)
+        if len(k) == 0:
+            continue
+        s = s[k]
+        k += a
+        if last is not None:
+            k = np.concatenate(([last[0]], k))
+            s = np.concatenate(([last[1]], s))
+        last = k[-1], s[-1]
+
+        # Find changes of state
+        c = np.flatnonzero(s[1:] != s[:-1])
+        if direction:
+            c = c[s[c + 1] == (1 if direction > 0 else -1)]
+        i.append(k[c])
+        j.append(k[c + 1])
+
+    i, j = np.concatenate(i), np.concatenate(j)
+    if min_separation > 0:
+        c = _separated(j, min_separation)
+        i, j = i[c], j[c]
+    return i, j
+
+
+@_instrument
+def index_near(times, t, regular=False):
     """
     Returns the index of time ``t`` in ``times``, or the index of the nearest
     value to it, assuming ``times`` is a non-decreasing sequence.
@@ -142,26 +299,17 @@ def index_near(times, t):
     If ``t`` is outside the range of ``times`` by more than half a sampling
     interval (as returned by :meth:`datkit.sampling_interval`), a
     ``ValueError`` will be raised.
-    """
-    # Check t is within range
-    if t < times[0]:
-        dt = datkit.sampling_interval(times)
-        if 2 * (times[0] - t) < dt:
-            return 0
-        raise ValueError(
-            f'Time t is too far outside the provided range: {t} < {times[0]}')
-    elif t > times[-1]:
-        dt = datkit.sampling_interval(times)
-        if 2 * (t - times[-1]) < dt:
-            return len(times) - 1
-        raise ValueError(
-            f'Time t is too far outside the provided range: {t} > {times[-1]}')
 
-    # Find index and return
-    i = np.searchsorted(times, t)   # times[i - 1] < t <= times[i]
-    return i if i == 0 or times[i] - t < t - times[i - 1] else i - 1
+    If ``t`` is a sequence, an array of indices is returned.
+
+    If ``regular`` is ``True``, large arrays of queries are looked up
+    arithmetically, as described in :meth:`index`. This has no effect for a
+    scalar ``t``.
+    """
+    return _index_near(times, t, step=_step(times, regular, t))
 
 
+@_instrument
 def index_on(times, t0=None, t1=None, include_left=True, include_right=False):
     """
     Returns a tuple ``(i0, i1)`` corresponding to the interval from ``t0`` to
@@ -177,24 +325,89 @@ def index_on(times, t0=None, t1=None, include_left=True, include_right=False):
     If ``t0`` is ``None``, the first index will be ``0``, regardless of the
     value of ``include_left``. If ``t1`` is ``None`` the second index will be
     ``len(times)``, regardless of the value of ``include_right``.
+
+    To find many intervals at once, use :meth:`indices_on`.
     """
-    if len(times) < 1:
-        raise ValueError('Times must contain at least one value.')
-    if t0 is None:
-        t0 = times[0] - 1
-    if t1 is None:
-        t1 = times[-1] + 1
-    if t1 < t0:
-        raise ValueError('Time t1 must be greater than or equal to t0.')
-    i = np.searchsorted(times, t0)
-    j = np.searchsorted(times, t1)
-    if (not include_left) and i < len(times) and times[i] == t0:
-        i += 1
-    if include_right and j < len(times) and times[j] == t1:
-        j += 1
-    return i, j
+    return _index_on(times, t0, t1, include_left, include_right)
+
+
+@_instrument
+def index_steps(values, tolerance=0, min_length=1):
+    """
+    Divides a piecewise constant signal (e.g. a command voltage) into
+    segments, and returns a tuple ``(i, j, levels)`` of arrays describing
+    them.
+
+    Each segment ``values[i[k]:j[k]]`` is a run of points in which no two
+    successive points differ by more than ``tolerance``, and ``levels[k]`` is
+    its mean value. Steps, where two successive points differ by more than
+    ``tolerance``, occur between each ``j[k] - 1`` and the next segment's
+    ``i[k + 1]``.
+
+    If a ``min_length`` is given, segments with fewer than ``min_length``
+    points are left out. This can be used to skip the points on ramps, or
+    transients in a noisy recording. If ``values`` is empty, or if no segments
+    remain, three empty arrays are returned.
+
+    All segments are found in a single pass over ``values``, which is
+    processed in chunks (see :meth:`set_chunk_size`). The results can be
+    used to analyse other signals on each segment, e.g. with
+    :meth:`time_steps` and :meth:`means_on`.
+    """
+    if tolerance < 0:
+        raise ValueError('The tolerance cannot be negative.')
+    v = np.asarray(values)
+    if v.ndim != 1:
+        raise ValueError('Values must be a 1-d array.')
+    n = len(v)
+    if n == 0:
+        return np.zeros(0, np.intp), np.zeros(0, np.intp), np.zeros(0)
+
+    # Find the first point of each segment after the first
+    starts = [np.zeros(1, dtype=np.intp)]
+    for a, b in _chunks(n):
+        a = max(a - 1, 0)
+        x = v[a:b] if v.dtype.kind in 'fc' else v[a:b].astype(float)
+        x = np.diff(x)
+        k = np.flatnonzero(np.abs(x, out=x) > tolerance)
+        starts.append(k + (a + 1))
+
+    i = np.concatenate(starts)
+    j = np.append(i[1:], n)
+    if min_length > 1:
+        k = j - i >= min_length
+        i, j = i[k], j[k]
+    if len(i) == 0:
+        return i, j, np.zeros(0)
+    return i, j, _means_on(v, i, j)
 
 
+@_instrument
+def indices_on(times, t0=None, t1=None, include_left=True,
+               include_right=False, regular=False):
+    """
+    Returns a tuple ``(i0, i1)`` of integer arrays, such that ``i0[k]`` and
+    ``i1[k]`` are the indices that :meth:`index_on` would return for the
+    interval from ``t0[k]`` to ``t1[k]``.
+
+    Both ``t0`` and ``t1`` can be sequences or scalars, and are broadcast
+    against each other. As in :meth:`index_on`, passing ``None`` for ``t0``
+    or ``t1`` selects all points from the start or up to the end of
+    ``times``.
+
+    All intervals are found using a single vectorised search, making this
+    method much faster than calling :meth:`index_on` in a loop.
+
+    If ``regular`` is ``True``, large arrays of queries are looked up
+    arithmetically, as described in :meth:`index`. This has no effect if
+    ``t0`` and ``t1`` are both scalars.
+    """
+    return _indices_on(
+        times, t0, t1, include_left, include_right,
+        _step(times, regular, t0, t1))
+
+
+@_instrument
 def max_on(times, values, t0=None, t1=None, include_left=True,
            include_right=False):
     """
@@ -203,11 +416,30 @@ def max_on(times, values, t0=None, t1=None, include_left=True,
 
     See also :meth:`index_on`.
     """
+    times, values = np.asarray(times), np.asarray(values)
     i, j = index_on(times, t0, t1, include_left, include_right)
-    i = i + np.argmax(values[i:j])
-    return times[i], values[i]
+    i = i + np.argmax(values[..., i:j], axis=-1)
+    return times[i], _take(values, i)
+
 
+@_instrument
+def maxima_on(times, values, t0=None, t1=None, include_left=True,
+              include_right=False):
+    """
+    Returns a tuple ``(t_max, v_max)`` of arrays, containing the result of
+    :meth:`max_on` for every interval from ``t0[k]`` to ``t1[k]``.
 
+    A ``ValueError`` is raised if any of the intervals is empty.
+
+    See also :meth:`indices_on`.
+    """
+    times, values = np.asarray(times), np.asarray(values)
+    i, j = indices_on(times, t0, t1, include_left, include_right)
+    i = _arg_reduce_on(np.maximum, values, i, j)
+    return times[i], _take(values, i)
+
+
+@_instrument
 def mean_on(times, values, t0=None, t1=None, include_left=True,
             include_right=False):
     """
@@ -216,9 +448,25 @@ def mean_on(times, values, t0=None, t1=None, include_left=True,
     See also :meth:`index_on`.
     """
     i, j = index_on(times, t0, t1, include_left, include_right)
-    return np.mean(values[i:j])
+    return np.mean(np.asarray(values)[..., i:j], axis=-1)
+
+
+@_instrument
+def means_on(times, values, t0=None, t1=None, include_left=True,
+             include_right=False):
+    """
+    Returns an array containing the mean of ``values`` on every interval from
+    ``t0[k]`` to ``t1[k]``.
 
+    Empty intervals result in a ``nan``.
 
+    See also :meth:`indices_on` and :meth:`mean_on`.
+    """
+    i, j = indices_on(times, t0, t1, include_left, include_right)
+    return _means_on(np.asarray(values), i, j)
+
+
+@_instrument
 def min_on(times, values, t0=None, t1=None, include_left=True,
            include_right=False):
     """
@@ -227,11 +475,42 @@ def min_on(times, values, t0=None, t1=None, include_left=True,
 
     See also :meth:`index_on`.
     """
+    times, values = np.asarray(times), np.asarray(values)
     i, j = index_on(times, t0, t1, include_left, include_right)
-    i = i + np.argmin(values[i:j])
-    return times[i], values[i]
+    i = i + np.argmin(values[..., i:j], axis=-1)
+    return times[i], _take(values, i)
 
 
+@_instrument
+def minima_on(times, values, t0=None, t1=None, include_left=True,
+              include_right=False):
+    """
+    Returns a tuple ``(t_min, v_min)`` of arrays, containing the result of
+    :meth:`min_on` for every interval from ``t0[k]`` to ``t1[k]``.
+
+    A ``ValueError`` is raised if any of the intervals is empty.
+
+    See also :meth:`indices_on`.
+    """
+    times, values = np.asarray(times), np.asarray(values)
+    i, j = indices_on(times, t0, t1, include_left, include_right)
+    i = _arg_reduce_on(np.minimum, values, i, j)
+    return times[i], _take(values, i)
+
+
+@_instrument
+def sum_on(times, values, t0=None, t1=None, include_left=True,
+           include_right=False):
+    """
+    Returns the sum of ``values`` on the interval from ``t0`` to ``t1``.
+
+    See also :meth:`index_on`.
+    """
+    i, j = index_on(times, t0, t1, include_left, include_right)
+    return np.sum(np.asarray(values)[..., i:j], axis=-1)
+
+
+@_instrument
 def time_crossing(times, values, value=0):
     """
     Returns the time at which ``values`` first crosses ``value``.
@@ -252,29 +531,582 @@ def time_crossing(times, values, value=0):
     return t0 - v0 * (t1 - t0) / (v1 - v0)
 
 
-def value_at(times, values, t, ttol=1e-9):
+@_instrument
+def time_crossings(times, values, value=0, direction=0, hysteresis=0,
+                   min_separation=0):
+    """
+    Returns an array containing all times at which ``values`` crosses
+    ``value``.
+
+    Crossings are found with :meth:`index_crossings`, using the arguments
+    ``direction`` and ``hysteresis`` as described there. Each time is then
+    obtained by linear interpolation, as in :meth:`time_crossing`.
+
+    If a ``min_separation`` is given, crossings that occur less than
+    ``min_separation`` (in the units of ``times``) after the last returned
+    crossing are ignored. In this case ``times`` must be non-decreasing.
+    """
+    i, j = index_crossings(values, value, direction, hysteresis)
+    times, values = np.asarray(times), np.asarray(values)
+    t0, t1 = times[i], times[j]
+    v0, v1 = values[i] - value, values[j] - value
+    t = t0 - v0 * (t1 - t0) / (v1 - v0)
+    if min_separation > 0:
+        t = t[_separated(t, min_separation)]
+    return t
+
+
+@_instrument
+def time_steps(times, values, tolerance=0, min_length=1):
+    """
+    Divides a piecewise constant signal into segments, and returns a tuple
+    ``(t0, t1, levels)`` of arrays containing the time of the first and last
+    point in each segment, and its mean value.
+
+    Segments are found with :meth:`index_steps`, using the arguments
+    ``tolerance`` and ``min_length`` as described there, so that each
+    segment runs from ``t0[k] = times[i[k]]`` to ``t1[k] = times[j[k] - 1]``.
+    The times can be passed to the methods that work on many intervals at
+    once, with ``include_right=True``, for example to find the mean current
+    during each step in a voltage protocol::
+
+        t0, t1, v = datkit.time_steps(times, voltage, min_length=10)
+        i = datkit.means_on(times, current, t0, t1, include_right=True)
+
+    """
+    i, j, levels = index_steps(values, tolerance, min_length)
+    times = np.asarray(times)
+    return times[i], times[j - 1], levels
+
+
+@_instrument
+def value_at(times, values, t, ttol=1e-9, regular=False):
     """
     Returns ``values[i]`` such that ``times[i]`` is within ``ttol`` of the time
     ``t``.
 
     A ``ValueError`` will be raised if no such ``i`` can be found.
+
+    If ``regular`` is ``True``, large arrays of queries are looked up
+    arithmetically, as described in :meth:`index`. This has no effect for a
+    scalar ``t``.
     """
-    return values[index(times, t, ttol=ttol)]
+    i = index(times, t, ttol=ttol, regular=regular)
+    return np.asarray(values)[..., i] if np.ndim(values) > 1 else values[i]
 
 
-def value_interpolated(times, values, t):
+@_instrument
+def value_interpolated(times, values, t, regular=False, mask=False):
     """
     Returns the value at the given time, obtained by linear interpolation if
     ``t`` is not presesnt in ``times``.
 
     A ``ValueError`` is raised if no ``i`` can be found such that
     ``times[i] <= t <= times[i + 1]``.
+
+    If ``t`` is a sequence, an array of values is returned, calculated with a
+    single vectorised lookup. For example, this can be used to resample a time
+    series onto a different time vector.
+
+    If ``mask`` is set to ``True``, no ``ValueError`` is raised for times that
+    are out of range. Instead, a ``numpy.ma.MaskedArray`` is returned (or
+    ``numpy.ma.masked`` for a scalar ``t``), in which those times are masked.
+
+    If ``regular`` is ``True``, large arrays of queries are looked up
+    arithmetically, as described in :meth:`index`. This has no effect for a
+    scalar ``t``.
+    """
+    return _value_interpolated(
+        times, values, t, _step(times, regular, t), mask)
+
+
+@_instrument
+def value_near(times, values, t, regular=False, mask=False):
+    """
+    Returns ``values[i]`` such that ``times[i]`` is the nearest point to ``t``
+    in the data.
+
+    A ``ValueError`` will be raised if no time near ``t`` can be found in
+    ``times`` (see :meth:`index_near`).
+
+    If ``t`` is a sequence, an array of values is returned. As in
+    :meth:`value_interpolated`, ``mask=True`` can be used to obtain a masked
+    array instead of a ``ValueError`` for times that are out of range.
+
+    If ``regular`` is ``True``, large arrays of queries are looked up
+    arithmetically, as described in :meth:`index`. This has no effect for a
+    scalar ``t``.
     """
-    i = np.searchsorted(times, t)
+    return _value_near(
+        times, values, t, None, _step(times, regular, t), mask)
+
+
+@_instrument
+def variance_on(times, values, t0=None, t1=None, include_left=True,
+                include_right=False):
+    """
+    Returns the (population) variance of ``values`` on the interval from
+    ``t0`` to ``t1``, as calculated by ``np.var``.
+
+    See also :meth:`index_on`.
+    """
+    i, j = index_on(times, t0, t1, include_left, include_right)
+    return np.var(np.asarray(values)[..., i:j], axis=-1)
+
+
+def _arg_reduce_on(ufunc, values, i, j, transform=None):
+    """
+    Returns the index of the first extremum (as determined by ``ufunc``, which
+    should be ``np.maximum`` or ``np.minimum``) in each ``values[i[k]:j[k]]``.
+
+    If a ``transform`` is given, the extrema of ``transform(values)`` are
+    returned instead. As with ``np.argmax``, the first ``nan`` is returned for
+    any interval that contains ``nan`` values.
+
+    For N-d ``values``, the intervals are taken along the last axis, and an
+    array of shape ``values.shape[:-1] + (len(i), )`` is returned.
+    """
+    n = j - i
+    if np.any(n < 1):
+        k = np.flatnonzero(n < 1)[0]
+        raise ValueError(f'Interval {k} does not contain any values.')
+    if len(n) == 0:
+        return np.zeros(values.shape[:-1] + n.shape, dtype=n.dtype)
+
+    # Short intervals are gathered and scanned in full. For long intervals, we
+    # first find the extremum in blocks of size b, and then only scan the
+    # blocks' extrema and the partial blocks at the start and end. The
+    # blocked approach costs a full pass over the data, plus roughly
+    # 2 * b + length / b per interval, so choose b ~ sqrt(length / 2).
+    nt, m = np.sum(n), values.shape[-1]
+    b = max(2, int(np.sqrt(nt / len(n) / 2)))
+    nb = m // b
+    if nb < 1 or nt < m + len(n) * 3 * b:
+        idx = _ranges(i, n)
+        v = values[..., idx]
+        if transform is not None:
+            v = transform(v)
+        return idx[_first_extrema(ufunc, v, n)]
+
+    v = values if transform is None else transform(values)
+    arg = np.argmax if ufunc is np.maximum else np.argmin
+    best = v[..., :nb * b].reshape(v.shape[:-1] + (nb, b))
+    best = np.arange(0, nb * b, b) + arg(best, axis=-1)
+
+    # Split every interval into a partial block at the start, a sequence of
+    # full blocks, and a partial block at the end, and gather the indices of
+    # the candidates in order (which, for N-d values, differ per row).
+    b0 = np.minimum((i + b - 1) // b, nb)
+    b1 = np.minimum(j // b, nb)
+    full = b0 < b1
+    h = np.where(full, b0 * b, j)
+    starts = np.stack((i, b0, b1 * b), axis=1).ravel()
+    lengths = np.stack((h - i, np.where(full, b1 - b0, 0),
+                        np.where(full, j - b1 * b, 0)), axis=1).ravel()
+    idx = _ranges(starts, lengths)
+    blocks = np.repeat(np.tile([False, True, False], len(n)), lengths)
+    k = idx[blocks]
+    idx = np.broadcast_to(idx, best.shape[:-1] + idx.shape).copy()
+    idx[..., blocks] = best[..., k]
+    n = np.sum(lengths.reshape(-1, 3), axis=1)
+    return _take(idx, _first_extrema(ufunc, _take(v, idx), n))
+
+
+def _first_extrema(ufunc, values, n):
+    """
+    Returns the position of the first extremum in each of the consecutive
+    segments of length ``n[k] > 0`` that make up ``values`` (along its last
+    axis).
+    """
+    offsets = np.cumsum(n) - n
+    extrema = ufunc.reduceat(values, offsets, axis=-1)
+    hit = values == np.repeat(extrema, n, axis=-1)
+    if values.dtype.kind in 'fc':
+        hit |= np.isnan(values)
+
+    # Replace hits by their position and misses by a position past the end,
+    # so that the first hit in each segment is the segment's minimum.
+    m = values.shape[-1]
+    hit = np.where(hit, np.arange(m), m)
+    return np.minimum.reduceat(hit, offsets, axis=-1)
+
+
+def _first_where(values, test, start=0):
+    """
+    Returns the first index ``i >= start`` for which ``test(values[i])`` is
+    true, or ``None`` if no such index exists.
+
+    The array is tested in chunks of increasing size, so that the function
+    can return early without testing the full array.
+    """
+    for i, j in _chunks(len(values), start, first=256):
+        match = test(values[i:j])
+        k = np.argmax(match)
+        if match[k]:
+            return i + int(k)
+    return None
+
+
+def _iabs_max(values):
+    """
+    Returns ``np.argmax(np.abs(values), axis=-1)``, without creating a
+    temporary array.
+    """
+    i, j = np.argmax(values, axis=-1), np.argmin(values, axis=-1)
+    if values.ndim > 1:
+        a, b = np.abs(_take(values, i)), np.abs(_take(values, j))
+        return np.where(a > b, i, np.where(b > a, j, np.minimum(i, j)))
+    a, b = abs(values[i]), abs(values[j])
+    return i if a > b else (j if b > a else min(i, j))
+
+
+def _index(times, t, ttol=1e-9, step=None):
+    """
+    Implementation of :meth:`index`, using arithmetic lookups if a sampling
+    interval ``step`` is given (see :meth:`_searchsorted`).
+    """
+    if np.ndim(t) > 0:
+        times, t = np.asarray(times), np.asarray(t)
+        i = _nearest(times, t, step)
+        bad = np.abs(times[i] - t) > ttol
+        if np.any(bad):
+            k = np.flatnonzero(bad)[0]
+            _index(times, t[k], ttol)
+        return i
+
+    # Check t is within range
+    if t < times[0]:
+        if abs(times[0] - t) <= ttol:
+            return 0
+        raise ValueError(
+            f'Time t is outside the provided range: {t} < {times[0]}.')
+    if t > times[-1]:
+        if abs(t - times[-1]) <= ttol:
+            return len(times) - 1
+        raise ValueError(
+            f'Time t is outside the provided range: {t} > {times[-1]}.')
+
+    # Find index and return
+    i = _searchsorted(times, t, step)   # times[i - 1] < t <= times[i]
+    i = i if i == 0 or times[i] - t < t - times[i - 1] else i - 1
+    if abs(times[i] - t) > ttol:
+        raise ValueError(f'Time t={t} is not present in the data. Nearest'
+                         f' is {times[i]} at index {i}.')
+    return i
+
+
+def _index_near(times, t, dt=None, step=None):
+    """
+    Implementation of :meth:`index_near`, using the sampling interval ``dt``
+    if given (calculating it only if needed otherwise), and using arithmetic
+    lookups if a sampling interval ``step`` is given (see
+    :meth:`_searchsorted`).
+    """
+    if np.ndim(t) > 0:
+        times, t = np.asarray(times), np.asarray(t)
+        bad = (t < times[0]) | (t > times[-1])
+        if np.any(bad):
+            dt = datkit.sampling_interval(times) if dt is None else dt
+            bad = (2 * (times[0] - t) >= dt) | (2 * (t - times[-1]) >= dt)
+            if np.any(bad):
+                k = np.flatnonzero(bad)[0]
+                _index_near(times, t[k], dt)
+        return _nearest(times, t, step)
+
+    # Check t is within range
+    if t < times[0]:
+        dt = datkit.sampling_interval(times) if dt is None else dt
+        if 2 * (times[0] - t) < dt:
+            return 0
+        raise ValueError(
+            f'Time t is too far outside the provided range: {t} < {times[0]}')
+    elif t > times[-1]:
+        dt = datkit.sampling_interval(times) if dt is None else dt
+        if 2 * (t - times[-1]) < dt:
+            return len(times) - 1
+        raise ValueError(
+            f'Time t is too far outside the provided range: {t} > {times[-1]}')
+
+    # Find index and return
+    i = _searchsorted(times, t, step)   # times[i - 1] < t <= times[i]
+    return i if i == 0 or times[i] - t < t - times[i - 1] else i - 1
+
+
+def _index_on(times, t0, t1, include_left, include_right):
+    """
+    Implementation of :meth:`index_on`.
+    """
+    if len(times) < 1:
+        raise ValueError('Times must contain at least one value.')
+    if t0 is None:
+        t0 = times[0] - 1
+    if t1 is None:
+        t1 = times[-1] + 1
+    if t1 < t0:
+        raise ValueError('Time t1 must be greater than or equal to t0.')
+    i = np.searchsorted(times, t0)
+    j = np.searchsorted(times, t1)
+    if (not include_left) and i < len(times) and times[i] == t0:
+        i += 1
+    if include_right and j < len(times) and times[j] == t1:
+        j += 1
+    return i, j
+
+
+def _indices_on(times, t0, t1, include_left, include_right, step=None):
+    """
+    Implementation of :meth:`indices_on`, using arithmetic lookups if a
+    sampling interval ``step`` is given (see :meth:`_searchsorted`).
+    """
+    times = np.asarray(times)
+    n = len(times)
+    if n < 1:
+        raise ValueError('Times must contain at least one value.')
+    if t0 is None:
+        t0 = times[0] - 1
+    if t1 is None:
+        t1 = times[-1] + 1
+    t0, t1 = np.broadcast_arrays(np.atleast_1d(t0), np.atleast_1d(t1))
+    if t0.ndim != 1:
+        raise ValueError('Times t0 and t1 must be scalars or 1-d sequences.')
+    if np.any(t1 < t0):
+        raise ValueError('Time t1 must be greater than or equal to t0.')
+    i = _searchsorted(times, t0, step)
+    j = _searchsorted(times, t1, step)
+    if not include_left:
+        k = np.flatnonzero(i < n)
+        i[k] += times[i[k]] == t0[k]
+    if include_right:
+        k = np.flatnonzero(j < n)
+        j[k] += times[j[k]] == t1[k]
+    return i, j
+
+
+def _last_where(values, test, end):
+    """
+    Returns the last index ``i < end`` for which ``test(values[i])`` is true,
+    assuming such an index exists.
+
+    Like :meth:`_first_where`, this tests the array in chunks of increasing
+    size, but starting at ``end`` and moving backwards.
+    """
+    size = 256
+    while True:
+        start = max(0, end - size)
+        match = test(values[start:end])[::-1]
+        i = np.argmax(match)
+        if match[i]:
+            return end - 1 - int(i)
+        end = start
+        size = min(2 * size, chunk_size())
+
+
+def _means_on(values, i, j):
+    """
+    Returns the mean of each ``values[i[k]:j[k]]``, or ``nan`` for empty
+    intervals.
+    """
+    n = j - i
+    empty = n < 1
+    if np.any(empty):
+        i, j, n = i.copy(), j.copy(), n.astype(float)
+        i[empty], j[empty], n[empty] = 0, 1, np.nan
+    dtype = values.dtype if values.dtype.kind in 'fc' else float
+    return _reduce_on(np.add, values, i, j, dtype) / n
+
+
+def _many(t):
+    """
+    Returns ``True`` if ``t`` is a sequence of at least
+    ``_ARITHMETIC_QUERIES`` times (see :meth:`_searchsorted`).
+    """
+    # Checking the type first avoids the cost of np.size for scalars
+    return (isinstance(t, (np.ndarray, list, tuple))
+            and np.size(t) >= _ARITHMETIC_QUERIES)
+
+
+def _nearest(times, t, step=None):
+    """
+    Returns an array with the index of the nearest point in ``times`` to each
+    point in the array ``t``, preferring lower indices in case of ties.
+
+    Arithmetic lookups are used if a sampling interval ``step`` is given (see
+    :meth:`_searchsorted`).
+    """
+    n = len(times)
+    i = np.minimum(_searchsorted(times, t, step), n - 1)
+    j = np.maximum(i - 1, 0)
+    return np.where((i == 0) | (times[i] - t < t - times[j]), i, j)
+
+
+def _ranges(starts, lengths):
+    """
+    Returns the concatenated ranges ``starts[k]``, ``starts[k] + 1``, ...,
+    ``starts[k] + lengths[k] - 1``, for all ``k``.
+    """
+    offsets = np.cumsum(lengths) - lengths
+    return np.arange(np.sum(lengths)) + np.repeat(starts - offsets, lengths)
+
+
+def _reduce_on(ufunc, values, i, j, dtype=None):
+    """
+    Returns an array containing ``ufunc.reduce(values[i[k]:j[k]])`` for all
+    ``k``, calculated with a single call to ``ufunc.reduceat``. For N-d
+    ``values``, the intervals are taken along the last axis.
+
+    All intervals must be non-empty.
+    """
+    # Reduceat returns ufunc.reduce(values[idx[k]:idx[k + 1]]), so reduce
+    # over interleaved starting and end points and take every second result.
+    # Indices must be less than n, so intervals ending at n are reduced to n
+    # - 1 and then combined with the final value.
+    n = values.shape[-1]
+    idx = np.empty(2 * len(i), dtype=np.intp)
+    idx[::2] = i
+    idx[1::2] = np.minimum(j, n - 1)
+    r = ufunc.reduceat(values, idx, axis=-1, dtype=dtype)[..., ::2]
+    k = (j == n) & (i < n - 1)
+    r[..., k] = ufunc(r[..., k], values[..., -1:])
+    return r
+
+
+def _searchsorted(times, t, step=None):
+    """
+    Returns ``np.searchsorted(times, t)``, i.e. the index ``i`` such that
+    ``times[i - 1] < t <= times[i]``.
+
+    If a sampling interval ``step`` is given and ``t`` contains at least
+    ``_ARITHMETIC_QUERIES`` times, ``times`` is assumed to be regularly
+    increasing, and ``i`` is calculated as ``ceil((t - times[0]) / step)``,
+    and then corrected for rounding errors by moving it at most
+    ``_ARITHMETIC_PASSES`` samples. Any indices that are still wrong after
+    this (e.g. because ``times`` is not regularly increasing) are found with
+    binary searches. Binary searches are also used for all queries if
+    ``step`` is not a positive number, or if ``t`` contains ``nan`` or
+    infinite values.
+    """
+    if step is None or not _many(t) or not 0 < step:
+        return np.searchsorted(times, t)
+    t = np.asarray(t)
+    if not np.all(np.isfinite(t)) or not np.isfinite(step):
+        return np.searchsorted(times, t)
+
+    times = np.asarray(times)
+    n = len(times)
+    i = np.ceil((t - times[0]) / step)
+    i = np.clip(i, 0, n).astype(np.intp)
+    for k in range(_ARITHMETIC_PASSES + 1):
+        down = (i > 0) & (times[np.maximum(i - 1, 0)] >= t)
+        up = (i < n) & (times[np.minimum(i, n - 1)] < t)
+        if not (np.any(down) or np.any(up)):
+            return i
+        if k < _ARITHMETIC_PASSES:
+            i += up.astype(np.intp) - down
+
+    # Use binary searches for the queries that are still unresolved
+    wrong = down | up
+    i[wrong] = np.searchsorted(times, t[wrong])
+    return i
+
+
+def _separated(x, d):
+    """
+    Returns the indices of the entries in a non-decreasing array ``x`` that
+    are selected by starting at ``x[0]`` and then repeatedly selecting the
+    next entry at least ``d`` after the last selected one.
+    """
+    selected = []
+    i, n = 0, len(x)
+    while i < n:
+        selected.append(i)
+        i = int(np.searchsorted(x, x[i] + d))
+    return np.array(selected, dtype=np.intp)
+
+
+def _step(times, regular, *t):
+    """
+    Returns the sampling interval of ``times`` if ``regular`` is ``True`` and
+    any of the queries ``t`` is large enough to use arithmetic lookups (see
+    :meth:`_searchsorted`), or ``None`` otherwise.
+    """
+    if regular:
+        for x in t:
+            if _many(x):
+                return datkit.sampling_interval(times)
+    return None
+
+
+def _steady(times, step, points=17):
+    """
+    Returns ``True`` if the index of each sample in ``times`` can be predicted
+    as ``(times[i] - times[0]) / step`` with an error of less than half a
+    sample, as checked at a number of evenly spaced ``points``.
+
+    Unlike :meth:`is_regularly_increasing`, this allows for rounding errors
+    in times calculated as e.g. ``times = np.arange(n) * dt``, and it takes a
+    constant time. It is used to decide if arithmetic lookups are worthwhile,
+    which give correct results either way.
+    """
+    if not 0 < step < np.inf:
+        return False
+    i = np.unique(np.linspace(0, len(times) - 1, points).astype(np.intp))
+    return bool(np.all(np.abs(times[i] - times[0] - i * step) < 0.5 * step))
+
+
+def _take(values, i):
+    """
+    Returns ``values[i]`` for a 1-d array ``values``.
+
+    For N-d ``values``, ``i`` should contain either an index or a row of
+    indices for every row (along the last axis) of ``values``, and the
+    selected entries from each row are returned.
+    """
+    if values.ndim < 2:
+        return values[i]
+    if np.ndim(i) < values.ndim:
+        return np.take_along_axis(values, i[..., None], -1)[..., 0]
+    return np.take_along_axis(values, i, -1)
+
+
+def _value_interpolated(times, values, t, step=None, mask=False):
+    """
+    Implementation of :meth:`value_interpolated`, using arithmetic lookups if
+    a sampling interval ``step`` is given (see :meth:`_searchsorted`).
+    """
+    if np.ndim(values) > 1 and np.ndim(t) == 0:
+        return _value_interpolated(times, values, [t], step, mask)[..., 0]
+    if np.ndim(t) > 0:
+        times, values, t = np.asarray(times), np.asarray(values), np.asarray(t)
+        i = _searchsorted(times, t, step)
+        n = len(times)
+        if n == 0:
+            raise ValueError('Times must contain at least one value.')
+        k = np.minimum(i, n - 1)
+        exact = times[k] == t
+        bad = ~exact & ((i == 0) | (i == n))
+        if np.any(bad) and not mask:
+            _value_interpolated(times, times, t[bad][0])
+
+        # With a single time, only exact matches are possible, and the
+        # interpolation below is ignored
+        k = np.maximum(k, min(n - 1, 1))
+        t0, t1 = times[k - 1], times[k]
+        v0, v1 = values[..., k - 1], values[..., k]
+        with np.errstate(all='ignore'):
+            v = v0 + (t - t0) * (v1 - v0) / (t1 - t0)
+        v = np.where(exact, values[..., np.minimum(i, n - 1)], v)
+        if mask:
+            bad = np.broadcast_to(bad, v.shape).copy()
+            return np.ma.masked_array(v, bad)
+        return v
+
+    i = _searchsorted(times, t, step)
     n = len(times)
     if n > 0 and i < n and times[i] == t:
         return values[i]
     if i == 0 or i == n:
+        if mask:
+            return np.ma.masked
         raise ValueError(
             'Unable to find entries in times from which to interpolate'
             f' for t={t}.')
@@ -283,13 +1115,26 @@ def value_interpolated(times, values, t):
     return v0 + (t - t0) * (v1 - v0) / (t1 - t0)
 
 
-def value_near(times, values, t):
+def _value_near(times, values, t, dt=None, step=None, mask=False):
     """
-    Returns ``values[i]`` such that ``times[i]`` is the nearest point to ``t``
-    in the data.
-
-    A ``ValueError`` will be raised if no time near ``t`` can be found in
-    ``times`` (see :meth:`index_near`).
+    Implementation of :meth:`value_near`, with arguments ``dt`` and ``step``
+    as in :meth:`_index_near`.
     """
-    return values[index_near(times, t)]
+    if np.ndim(values) > 1 and np.ndim(t) == 0:
+        return _value_near(times, values, [t], dt, step, mask)[..., 0]
+    if np.ndim(t) > 0:
+        values = np.asarray(values)
+    if not mask:
+        i = _index_near(times, t, dt, step)
+        return values[..., i] if np.ndim(t) > 0 else values[i]
 
+    # Mask times too far out of range
+    times = np.asarray(times)
+    bad = (t < times[0]) | (t > times[-1])
+    if np.any(bad):
+        dt = datkit.sampling_interval(times) if dt is None else dt
+        bad = (2 * (times[0] - t) >= dt) | (2 * (t - times[-1]) >= dt)
+    if np.ndim(t) == 0:
+        return np.ma.masked if bad else values[_index_near(times, t, dt, step)]
+    v = values[..., _nearest(times, t, step)]
+    return np.ma.masked_array(v, np.broadcast_to(bad, v.shape).copy())
@@ -0,0 +1,174 @@
+#
+# Opt-in recording of the time and memory used by datkit methods.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import contextlib
+import functools
+import json
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+
+
+# Profiles that are currently recording
+_PROFILES = []
+
+# Per-thread state, used to record only the outermost datkit call
+_STATE = threading.local()
+
+# Lock for the statistics stored in profiles, which calls from several
+# threads can update at the same time
+_STATS_LOCK = threading.Lock()
+
+
+class Profile:
+    """
+    Statistics on the calls to datkit methods made while profiling, as
+    returned by :meth:`profiling`.
+
+    For each method, the profile stores the number of calls, the total wall
+    time they took, the total number of elements in the array arguments
+    passed in, and (if ``memory=True``) the total and maximum peak memory
+    allocated during a call.
+    """
+    def __init__(self, memory=False):
+        self._memory = bool(memory)
+        self._stats = {}
+
+    def _record(self, name, seconds, elements, nbytes):
+        """ Adds a call to the method ``name`` to this profile. """
+        with _STATS_LOCK:
+            s = self._stats.get(name)
+            if s is None:
+                s = self._stats[name] = {
+                    'calls': 0, 'time': 0.0, 'elements': 0}
+                if self._memory:
+                    s['bytes'] = s['max_bytes'] = 0
+            s['calls'] += 1
+            s['time'] += seconds
+            s['elements'] += elements
+            if self._memory:
+                s['bytes'] += nbytes
+                s['max_bytes'] = max(s['max_bytes'], nbytes)
+
+    def clear(self):
+        """
+        Discards all recorded statistics.
+        """
+        with _STATS_LOCK:
+            self._stats.clear()
+
+    def summary(self):
+        """
+        Returns a table with the recorded statistics as a string, with the
+        methods that took the most time at the top.
+        """
+        memory = ' {:>12} {:>12}' if self._memory else ''
+        fmt = '{:<30} {:>9} {:>12} {:>14}' + memory
+        lines = [fmt.format(
+            'Method', 'Calls', 'Time (s)', 'Elements', 'Bytes', 'Max bytes')]
+        for name, s in self.to_dict().items():
+            lines.append(fmt.format(
+                name, s['calls'], f'{s["time"]:.6f}', s['elements'],
+                s.get('bytes'), s.get('max_bytes')))
+        return '\n'.join(lines)
+
+    def to_dict(self):
+        """
+        Returns a dict mapping the name of each method that was called to a
+        dict with keys ``calls``, ``time`` (in seconds), ``elements``, and,
+        if memory was recorded, ``bytes`` and ``max_bytes``. Methods are
+        ordered by decreasing time.
+        """
+        with _STATS_LOCK:
+            stats = [(name, dict(s)) for name, s in self._stats.items()]
+        return dict(sorted(stats, key=lambda x: -x[1]['time']))
+
+    def to_json(self, **kwargs):
+        """
+        Returns the result of :meth:`to_dict` as a JSON string. Any keyword
+        arguments are passed to ``json.dumps``.
+        """
+        return json.dumps(self.to_dict(), **kwargs)
+
+
+@contextlib.contextmanager
+def profiling(memory=False):
+    """
+    Returns a context manager that records all calls to datkit methods made
+    inside a ``with`` block, and yields a :class:`Profile` with the results::
+
+        with datkit.profiling() as profile:
+            results = pipeline(times, values)
+        print(profile.summary())
+
+    All public methods for checking times, finding points, smoothing, and
+    spectral analysis are recorded, including those called via a
+    :class:`TimeSeries`. If a datkit method calls other datkit methods, only
+    the outer call is recorded, so that the total time is not counted twice.
+    The recorded size of the input is the total number of elements in all
+    NumPy array arguments.
+
+    If ``memory=True``, the peak memory allocated during each call is
+    measured with ``tracemalloc``. This makes calls considerably slower, and
+    cannot be combined with other uses of ``tracemalloc``. Memory should
+    only be recorded for calls made from a single thread.
+
+    Outside of a ``with profiling()`` block, the cost of the instrumentation
+    is a single check per call.
+    """
+    if memory and tracemalloc.is_tracing():
+        raise ValueError(
+            'Memory cannot be recorded while tracemalloc is already tracing.')
+    profile = Profile(memory)
+    _PROFILES.append(profile)
+    try:
+        yield profile
+    finally:
+        _PROFILES.remove(profile)
+
+
+def _instrument(f):
+    """
+    Decorator that lets calls to the datkit method ``f`` be recorded with
+    :meth:`profiling`.
+    """
+    @functools.wraps(f)
+    def wrapper(*args, **kwargs):
+        if not _PROFILES or getattr(_STATE, 'busy', False):
+            return f(*args, **kwargs)
+        _STATE.busy = True
+        try:
+            return _record(f, args, kwargs)
+        finally:
+            _STATE.busy = False
+
+    return wrapper
+
+
+def _record(f, args, kwargs):
+    """
+    Calls ``f(*args, **kwargs)``, and adds the call to all active profiles.
+    """
+    elements = 0
+    for x in args + tuple(kwargs.values()):
+        if isinstance(x, np.ndarray):
+            elements += x.size
+    memory = any(p._memory for p in _PROFILES)
+    if memory:
+        tracemalloc.start()
+    t = time.perf_counter()
+    try:
+        return f(*args, **kwargs)
+    finally:
+        t = time.perf_counter() - t
+        nbytes = None
+        if memory:
+            nbytes = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+        for p in list(_PROFILES):
+            p._record(f.__name__, t, elements, nbytes)
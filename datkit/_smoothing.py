@@ -4,12 +4,37 @@
 # This file is part of Datkit.
 # For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
 #
+import concurrent.futures
+import functools
+
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 
 import datkit as d
+from . import _points
+from . import _chunks
+from ._profiling import _instrument
+from ._workspace import _array, _fft, _fits, _output
+
+
+#: Minimum window size for which running sums are used in moving averages
+_RUNNING_SUM_WIDTH = 16
+
+#: Minimum number of windows after which running sums are restarted
+_RUNNING_SUM_BLOCK = 1024
+
+#: Cost of FFT convolution per ``L * log2(L)`` operations, relative to the
+#: cost of a single multiply-add in a direct convolution.
+_FFT_COST = 12
 
+#: Number of outputs calculated at once in direct convolutions, chosen so that
+#: the temporary arrays this creates are small.
+_DIRECT_BLOCK = 16384
 
-def gaussian_smoothing(times, values, w=None, t=None):
+
+@_instrument
+def gaussian_smoothing(times, values, w=None, t=None, workers=None, out=None,
+                       workspace=None):
     """
     Applies a Gaussian smoothing filter to ``v``, using a window of either
     ``w`` samples or a number derived from the duration ``t``.
@@ -23,18 +48,35 @@ def gaussian_smoothing(times, values, w=None, t=None):
     from -2 to +2 in the window.
 
     Returns a new time series ``x, y`` of length ``len(times) - w + 1``.
+
+    For wide windows, the convolution is performed with FFTs, using the
+    overlap-save method. This is selected automatically when the estimated
+    cost is lower than that of a direct convolution, which is usually the
+    case for windows of several hundred samples or more. The results agree
+    with a direct convolution up to rounding errors.
+
+    The ``values`` can also be a 2-d array of shape ``(traces, samples)``, in
+    which case every trace is smoothed, and a 2-d array is returned.
+
+    For long signals, ``workers`` can be set to a number greater than 1 to
+    split the calculation over a pool of threads (see
+    :meth:`moving_average`).
+
+    To avoid allocating new memory, an array ``out`` can be passed in for
+    the result, as in :meth:`moving_average`. The temporary arrays used for
+    FFTs can then be stored in a :class:`Workspace` and reused between
+    calls. (This requires NumPy 2.0 or later, which lets FFTs write into
+    existing arrays.)
     """
-    times, values = np.asarray(times), np.asarray(values)
-    if len(times) != len(values):
-        raise ValueError('Times and values vectors must have same size.')
+    times, values = _check(times, values)
 
     w = window_size(times, w, t)
-    k = np.exp(-np.linspace(-2, 2, w)**2)
-    t = times[w // 2: -(w // 2)]
-    return t, np.convolve(values, k, 'valid') / sum(k)
+    return times[w // 2: -(w // 2)], _gaussian_smoothing(
+        values, w, workers, out, workspace)
 
 
-def haar_downsample(times, values, repeats=1):
+@_instrument
+def haar_downsample(times, values, repeats=1, out=None, workspace=None):
     """
     Returns a downsampled signal created by successive averaging of adjacent
     samples, similar to a Haar wavelet.
@@ -46,20 +88,184 @@ def haar_downsample(times, values, repeats=1):
 
     Returns a new and downsampled time series ``(times_2, values_2)`` of length
     ``len(times) // 2**repeats``.
+
+    To avoid allocating new arrays for the result, a tuple of arrays ``out =
+    (times_2, values_2)`` of the correct length and a suitable data type
+    (e.g. a floating point type) can be passed in, which will then be filled
+    and returned. Intermediate levels (if ``repeats > 1``) are
+    stored in a single temporary buffer, which can be reused between calls by
+    passing in a :class:`Workspace`.
+
+    If ``values`` is a 2-d array with one trace per row, every trace is
+    downsampled, and ``values_2`` has the same number of rows.
+
+    To obtain all levels at once, use :meth:`haar_pyramid`.
     """
-    times, values = np.asarray(times), np.asarray(values)
-    if len(times) != len(values):
-        raise ValueError('Times and values vectors must have same size.')
+    times, values = _check(times, values)
+    if out is not None:
+        m = len(times) >> max(0, repeats)
+        shape = values.shape[:-1] + (m, )
+        dtypes = [x.dtype if repeats < 1 else (0.5 * x[..., :0]).dtype
+                  for x in (times, values)]
+        if (len(out) != 2 or not _fits(out[0], (m, ), dtypes[0])
+                or not _fits(out[1], shape, dtypes[1])):
+            raise ValueError(
+                'The argument out must be a tuple (times_2, values_2) of'
+                f' arrays of length {m}, with data types that can hold'
+                f' {dtypes[0]} and {dtypes[1]} values.')
+    if repeats < 1:
+        if out is None:
+            return times, values
+        out[0][...], out[1][...] = times, values
+        return out
 
-    for r in range(repeats):
-        if len(times) % 2:
-            times, values = times[:-1], values[:-1]
-        times = 0.5 * (times[::2] + times[1::2])
-        values = 0.5 * (values[::2] + values[1::2])
-    return times, values
+    out = (None, None) if out is None else out
+    return (_haar(times, repeats, out[0], workspace, 'haar_times'),
+            _haar(values, repeats, out[1], workspace, 'haar_values'))
 
 
-def moving_average(times, values, w=None, t=None):
+@_instrument
+def haar_pyramid(times, values, levels=None):
+    """
+    Returns a list containing the time series obtained with
+    :meth:`haar_downsample` for ``repeats`` from ``1`` up to and including
+    ``levels``.
+
+    All levels are calculated in a single pass, with each level obtained from
+    the previous one. The times and values of all levels are stored in two
+    preallocated buffers, so that the returned ``(times_r, values_r)`` are
+    views into these buffers, and the total memory used is about the same as
+    that of the original series.
+
+    If ``levels`` is ``None``, levels are added until a level with a single
+    sample is reached. As in :meth:`haar_downsample`, ``values`` can be a 2-d
+    array with one trace per row.
+
+    This can be useful for plotting long time series at different zoom
+    levels.
+    """
+    times, values = _check(times, values)
+    if levels is None:
+        levels = max(0, len(times).bit_length() - 1)
+
+    return list(zip(
+        _haar_levels(times, levels), _haar_levels(values, levels)))
+
+
+@_instrument
+def lttb_downsample(times, values, n):
+    """
+    Returns a downsampled time series of ``n`` points selected with the
+    "largest triangle three buckets" (LTTB) algorithm.
+
+    The first and last points are always included. The remaining points are
+    split into ``n - 2`` buckets with (nearly) equal numbers of samples, and
+    from each bucket the point is selected that forms the largest triangle
+    with the previously selected point and the average of the next bucket.
+    This retains the visual shape of a signal (including most spikes) much
+    better than averaging, and is well suited for plotting.
+
+    If ``n >= len(times)``, the original ``times`` and ``values`` are
+    returned. A ``ValueError`` is raised if ``n`` is less than 3.
+
+    The averages of all buckets are calculated at once, but the selection
+    itself proceeds bucket by bucket, so that the run time is proportional to
+    ``len(times)`` plus ``n`` Python steps.
+
+    If ``values`` is a 2-d array with one trace per row, the points are
+    selected for all traces at once, and 2-d arrays ``(times_2, values_2)``
+    are returned, with the selected points for trace ``k`` in row ``k``.
+
+    See also :meth:`minmax_downsample`.
+    """
+    times, values = _check(times, values)
+    n = int(n)
+    if n < 3:
+        raise ValueError(f'The number of points must be at least 3, got {n}.')
+    m = len(times)
+    if n >= m:
+        return times, values
+
+    # Bucket k contains the points edges[k] to edges[k + 1]
+    edges = 1 + (np.arange(n - 1) * (m - 2)) // (n - 2)
+    counts = np.diff(edges)
+    t = np.add.reduceat(times[:-1], edges[:-1]) / counts
+    v = np.add.reduceat(values[..., :-1], edges[:-1], axis=-1) / counts
+    t = np.append(t[1:], times[-1])
+    v = np.concatenate((v[..., 1:], values[..., -1:]), axis=-1)
+
+    # Select points for all traces at once, with a column vector of selected
+    # indices a and values va.
+    x = values.reshape(-1, m)
+    v = v.reshape(len(x), n - 2)
+    selected = np.empty((len(x), n), dtype=np.intp)
+    selected[:, 0], selected[:, -1] = 0, m - 1
+    a = np.zeros((len(x), 1), dtype=np.intp)
+    for k in range(n - 2):
+        i, j = edges[k], edges[k + 1]
+        ta, va = times[a], np.take_along_axis(x, a, 1)
+        area = np.abs((ta - t[k]) * (x[:, i:j] - va)
+                      - (ta - times[i:j]) * (v[:, k:k + 1] - va))
+        a = i + np.argmax(area, axis=1)[:, None]
+        selected[:, k + 1:k + 2] = a
+    selected = selected.reshape(values.shape[:-1] + (n, ))
+    return times[selected], _points._take(values, selected)
+
+
+@_instrument
+def minmax_downsample(times, values, n):
+    """
+    Returns a downsampled time series that contains the minimum and maximum
+    of ``values`` in each of (at most) ``n`` buckets.
+
+    The samples are divided into buckets of ``ceil(len(times) / n)`` samples
+    (with a possibly shorter final bucket), and the points with the lowest and
+    highest value in each bucket are returned, in their original order. This
+    results in at most ``2 * n`` points, which preserve the full range of the
+    signal (including spikes). For example, a long recording can be reduced to
+    roughly two points per horizontal pixel before plotting.
+
+    If ``2 * n >= len(times)``, the original ``times`` and ``values`` are
+    returned. A ``ValueError`` is raised if ``n`` is less than 1.
+
+    If ``values`` is a 2-d array with one trace per row, 2-d arrays
+    ``(times_2, values_2)`` are returned, with the points for trace ``k`` in
+    row ``k``. To give each row the same length, the minimum and maximum of
+    every bucket are both included, even when they are the same point.
+
+    See also :meth:`lttb_downsample` and :meth:`haar_downsample`.
+    """
+    times, values = _check(times, values)
+    n = int(n)
+    if n < 1:
+        raise ValueError(f'The number of buckets must be at least 1, got {n}.')
+    m = len(times)
+    if 2 * n >= m:
+        return times, values
+
+    # Find the extrema in all full buckets at once, then in the final bucket
+    b = -(-m // n)
+    k = m // b
+    v = values[..., :k * b].reshape(values.shape[:-1] + (k, b))
+    i = np.arange(0, k * b, b)
+    lo, hi = i + np.argmin(v, axis=-1), i + np.argmax(v, axis=-1)
+    if k * b < m:
+        v = values[..., k * b:]
+        lo = np.concatenate(
+            (lo, k * b + np.argmin(v, axis=-1)[..., None]), axis=-1)
+        hi = np.concatenate(
+            (hi, k * b + np.argmax(v, axis=-1)[..., None]), axis=-1)
+
+    # Sort within buckets and remove duplicates
+    i = np.sort(np.stack((lo, hi), axis=-1), axis=-1)
+    i = i.reshape(i.shape[:-2] + (-1, ))
+    if values.ndim < 2:
+        i = i[np.concatenate(([True], i[1:] != i[:-1]))]
+    return times[i], _points._take(values, i)
+
+
+@_instrument
+def moving_average(times, values, w=None, t=None, workers=None, out=None):
     """
     Applies a moving average filter to ``v``, using a window of either ``w``
     samples or a number derived from the duration ``t``.
@@ -70,16 +276,44 @@ def moving_average(times, values, w=None, t=None):
     method :meth:`window_size`.
 
     Returns a new time series ``x, y`` of length ``len(times) - w + 1``.
+
+    For wide windows, the average is calculated using running sums, which
+    takes a time proportional to ``len(times)`` instead of
+    ``len(times) * w``. To limit the accumulation of rounding errors, the
+    running sums are recalculated from scratch every ``max(w, 1024)`` samples.
+    The results typically agree with a direct calculation to within a relative
+    tolerance of ``1e-12``, as measured against the largest absolute value in
+    ``values``.
+
+    As in :meth:`gaussian_smoothing`, ``values`` can be a 2-d array with one
+    trace per row.
+
+    If ``workers`` is set to a number greater than 1, the signal is split into
+    overlapping chunks of at most :meth:`chunk_size` samples, which are
+    smoothed concurrently in a pool of ``workers`` threads and written into a
+    single output array. NumPy releases the GIL during these calculations, so
+    that this can be much faster for long signals on multi-core machines.
+    The chunks are aligned with the blocks used for the running sums (or, in
+    :meth:`gaussian_smoothing`, the FFT segments), so that the results are
+    identical to those obtained with a single thread.
+
+    To avoid allocating a new array for the result, an array ``out`` of shape
+    ``values.shape[:-1] + (len(times) - w + 1, )`` can be passed in, which
+    will then be filled and returned as ``y`` (the returned ``x`` is a view
+    into ``times``). The running sums are calculated inside ``out``, and
+    direct convolutions are performed in small blocks, so that no other
+    arrays are created whose size depends on the length of the input. Both
+    the shape and the data type of ``out`` are checked before any
+    calculations are made, and a ``ValueError`` is raised if it cannot hold
+    the results (e.g. if it has an integer type).
     """
-    times, values = np.asarray(times), np.asarray(values)
-    if len(times) != len(values):
-        raise ValueError('Times and values vectors must have same size.')
+    times, values = _check(times, values)
 
     w = window_size(times, w, t)
-    t = times[w // 2: -(w // 2)]
-    return t, np.convolve(values, np.ones(w), 'valid') / w
+    return times[w // 2: -(w // 2)], _moving_average(values, w, workers, out)
 
 
+@_instrument
 def window_size(times, w=None, t=None):
     """
     Returns a window size of either ``w`` samples or duration ``t``.
@@ -90,13 +324,24 @@ def window_size(times, w=None, t=None):
     ``t / dt``, where ``dt`` is the sampling interval. The nearest odd integer
     is defined as ``1 + 2 * ((t / dt) // 2)``.
     """
+    return _window_size(times, w, t)
+
+
+def _window_size(times, w=None, t=None, dt=None):
+    """
+    Implementation of :meth:`window_size`, using the sampling interval ``dt``
+    if given, and calculating it (only if needed) otherwise.
+
+    If ``times`` is ``None``, the window size is not checked against the
+    length of the time series.
+    """
     if w is None:
         if t is None:
             raise ValueError(
                 'No window size specified: w and t are both None.')
 
         t = float(t)
-        dt = d.sampling_interval(times)
+        dt = d.sampling_interval(times) if dt is None else dt
         if t / dt < 2.9:
             raise ValueError(
                 'Invalid window size: must be at least 3 times the sampling'
@@ -116,9 +361,302 @@ def window_size(times, w=None, t=None):
         raise ValueError(
             'Two window sizes specified: w and t are both not None.')
 
-    if w > len(times):
+    if times is not None and w > len(times):
         raise ValueError(
             'Invalid window size: Must be no greater than length of times'
             f' vector ({len(times)}), got {w}.')
     return w
 
+
+def _all_finite(values):
+    """
+    Checks if all entries in ``values`` are finite, processing long arrays in
+    chunks (along the last axis).
+
+    To avoid creating temporary arrays, this checks if the sum of each chunk
+    is finite. As a result, finite values whose sum overflows are also
+    rejected, but for these the direct methods are preferable anyway.
+    """
+    for i, j in _chunks._chunks(values.shape[-1]):
+        if not np.isfinite(np.sum(values[..., i:j])):
+            return False
+    return True
+
+
+def _check(times, values):
+    """
+    Returns ``times`` and ``values`` as arrays, after checking that the length
+    of ``values`` along its last axis equals that of ``times``.
+    """
+    times, values = np.asarray(times), np.asarray(values)
+    if values.ndim < 1 or values.shape[-1] != len(times):
+        raise ValueError('Times and values vectors must have same size.')
+    return times, values
+
+
+def _convolve_direct(values, k, out):
+    """
+    Writes ``np.convolve(values, k, 'valid')`` for every row of ``values`` into
+    ``out``, and returns ``out``.
+
+    NumPy has no convolution along an axis, so N-d arrays are convolved row by
+    row. Each row is convolved in blocks of ``_DIRECT_BLOCK`` outputs, so that
+    only small temporary arrays are created. The results are the same as
+    those of a single call to ``np.convolve``.
+    """
+    w, m = len(k), out.shape[-1]
+    for i in np.ndindex(values.shape[:-1]):
+        x, y = values[i], out[i]
+        for a in range(0, m, _DIRECT_BLOCK):
+            b = min(m, a + _DIRECT_BLOCK)
+            y[a:b] = np.convolve(x[a:b + w - 1], k, 'valid')
+    return out
+
+
+def _fft_convolve(values, k, L, batch=None, out=None, kf=None,
+                  workspace=None):
+    """
+    Returns ``np.convolve(values, k, 'valid')`` for real arrays, calculated
+    with the overlap-save method and FFTs of length ``L``.
+
+    Segments are transformed in batches of about ``batch`` samples at a time
+    (by default :meth:`chunk_size`), to limit memory use. For N-d ``values``,
+    every row is convolved, and each batch contains the same segments from
+    all rows.
+
+    The result is written into ``out``, if given. The FFT of the kernel can
+    be passed in as ``kf``, and the temporary arrays used for each batch are
+    taken from ``workspace`` (if given, see :meth:`_array`).
+    """
+    batch = _chunks.chunk_size() if batch is None else batch
+    n, w = values.shape[-1], len(k)
+    m = n - w + 1
+    step = L - w + 1
+    kf = np.fft.rfft(k, L) if kf is None else kf
+
+    # Each segment values[i:i + L] provides the outputs y[i:i + step]
+    rows = values.reshape(-1, n)
+    r = len(rows)
+    y = _output(out, values.shape[:-1] + (m, ))
+    y2 = y.reshape(r, m)
+    segments = -(-m // step)
+    batch = min(segments, max(1, batch // (L * r)))
+    xb = _array(workspace, 'fft_convolve_x', (r, (batch - 1) * step + L))
+    fb = _array(workspace, 'fft_convolve_f', (r, batch, L // 2 + 1), complex)
+    zb = _array(workspace, 'fft_convolve_z', (r, batch, L))
+    for a in range(0, segments, batch):
+        b = min(segments, a + batch)
+        i, j = a * step, (b - 1) * step + L
+        x = xb[:, :j - i]
+        c = min(n, j) - i
+        x[:, :c] = rows[:, i:j]
+        x[:, c:] = 0
+        x = as_strided(x, shape=(r, b - a, L),
+                       strides=(x.strides[0], step * x.itemsize, x.itemsize))
+        f = _fft(np.fft.rfft, x, L, fb[:, :b - a])
+        f *= kf
+        z = _fft(np.fft.irfft, f, L, zb[:, :b - a])[..., w - 1:]
+
+        # Copy the outputs of all full segments at once, then the rest
+        j = min(m, b * step)
+        c = (j - i) // step
+        x = y2[:, i:i + c * step]
+        s = x.strides[1]
+        as_strided(x, shape=(r, c, step), strides=(x.strides[0], step * s, s)
+                   )[...] = z[:, :c]
+        if i + c * step < j:
+            y2[:, i + c * step:j] = z[:, c, :j - i - c * step]
+
+    if not np.may_share_memory(y, y2):
+        y[...] = y2.reshape(y.shape)
+    return y
+
+
+def _fft_size(w):
+    """
+    Returns the FFT length ``L`` that minimises the cost of an overlap-save
+    convolution with a kernel of length ``w``, estimated as
+    ``L * log2(L) / (L - w + 1)``.
+    """
+    L = 1 << int(2 * w - 1).bit_length()
+    return min((L << i for i in range(6)),
+               key=lambda L: L * np.log2(L) / (L - w + 1))
+
+
+def _gaussian_fft_size(w):
+    """
+    Returns the FFT length used by :meth:`_gaussian_smoothing` for finite real
+    values and a window of size ``w``, or ``None`` if a direct convolution is
+    expected to be faster.
+    """
+    L = _fft_size(w)
+    return None if w < _FFT_COST * L * np.log2(L) / (L - w + 1) else L
+
+
+@functools.lru_cache(maxsize=32)
+def _gaussian_kernel(w):
+    """
+    Returns a tuple ``(k, total)`` containing a read-only Gaussian kernel of
+    size ``w`` and its sum.
+    """
+    k = np.exp(-np.linspace(-2, 2, w)**2)
+    k.setflags(write=False)
+    return k, sum(k)
+
+
+@functools.lru_cache(maxsize=32)
+def _gaussian_kernel_fft(w, L):
+    """
+    Returns a read-only array containing the FFT of length ``L`` of the kernel
+    returned by :meth:`_gaussian_kernel`.
+    """
+    kf = np.fft.rfft(_gaussian_kernel(w)[0], L)
+    kf.setflags(write=False)
+    return kf
+
+
+def _gaussian_smoothing(values, w, workers=None, out=None, workspace=None):
+    """
+    Returns the smoothed values calculated by :meth:`gaussian_smoothing`,
+    using either a direct convolution or FFTs, depending on which is expected
+    to be faster.
+    """
+    k, total = _gaussian_kernel(w)
+    y = _output(out, values.shape[:-1] + (values.shape[-1] - w + 1, ),
+                np.result_type(values, k))
+    L = _gaussian_fft_size(w)
+    if L is None or np.iscomplexobj(values) or not _all_finite(values):
+        _map_chunks(lambda x, y: _convolve_direct(x, k, y),
+                    values, w, 1, y, workers)
+    else:
+        # Workspaces can't be shared between threads
+        kf = _gaussian_kernel_fft(w, L)
+        ws = workspace if workers is None else None
+        _map_chunks(lambda x, y: _fft_convolve(x, k, L, None, y, kf, ws),
+                    values, w, L - w + 1, y, workers)
+    y /= total
+    return y
+
+
+def _haar(x, repeats, out=None, workspace=None, key=None):
+    """
+    Applies :meth:`_haar_step` ``repeats > 0`` times to ``x``, storing the
+    final result in ``out`` (if given), and any intermediate results in the
+    array stored under ``key`` in the ``workspace`` (if given).
+    """
+    if repeats > 1:
+        x = _haar_levels(x, repeats - 1, workspace, key)[-1]
+    return _haar_step(x, out)
+
+
+def _haar_levels(x, levels, workspace=None, key=None):
+    """
+    Applies :meth:`_haar_step` ``levels`` times to ``x``, and returns a list
+    of the results, stored as views into a single buffer (which is taken from
+    the ``workspace``, if given).
+    """
+    lengths = [x.shape[-1] >> r for r in range(1, levels + 1)]
+    buffer = _array(workspace, key, x.shape[:-1] + (sum(lengths), ),
+                    dtype=(0.5 * x[..., :0]).dtype)
+    results, i = [], 0
+    for m in lengths:
+        x = _haar_step(x, buffer[..., i:i + m])
+        results.append(x)
+        i += m
+    return results
+
+
+def _haar_step(x, out=None):
+    """
+    Averages the adjacent samples in ``x`` (along its last axis), omitting the
+    final sample if the length is odd, and stores the result in ``out`` (if
+    given).
+    """
+    m = x.shape[-1] // 2
+    if out is None:
+        return 0.5 * (x[..., 0:2 * m:2] + x[..., 1:2 * m:2])
+    np.add(x[..., 0:2 * m:2], x[..., 1:2 * m:2], out=out)
+    out *= 0.5
+    return out
+
+
+def _map_chunks(f, values, w, align, out, workers=None):
+    """
+    Calls ``f(values, out)``, where ``f`` is a filter that writes the
+    ``n - w + 1`` outputs for ``n`` input samples (along the last axis) that
+    are fully covered by a window of size ``w`` into ``out``, and returns
+    ``out``.
+
+    If ``workers`` is greater than 1, the outputs are divided into chunks of at
+    most :meth:`chunk_size` outputs, rounded up to a multiple of ``align``.
+    The input for each chunk, including ``w - 1`` samples of overlap with the
+    next, is then passed to ``f`` in a pool of ``workers`` threads, along with
+    the part of ``out`` that the chunk's results should be written to.
+    """
+    if workers is None:
+        return f(values, out)
+    workers = int(workers)
+    if workers < 1:
+        raise ValueError(
+            f'The number of workers must be at least 1, got {workers}.')
+    m = values.shape[-1] - w + 1
+    size = min(_chunks.chunk_size(), -(-m // workers))
+    size = align * -(-size // align)
+    if workers == 1 or size >= m:
+        return f(values, out)
+
+    def chunk(i):
+        j = min(m, i + size)
+        f(values[..., i:j + w - 1], out[..., i:j])
+
+    with concurrent.futures.ThreadPoolExecutor(workers) as pool:
+        for future in [pool.submit(chunk, i) for i in range(0, m, size)]:
+            future.result()
+    return out
+
+
+def _moving_average(values, w, workers=None, out=None):
+    """
+    Returns the averages calculated by :meth:`moving_average`.
+    """
+    y = _output(out, values.shape[:-1] + (values.shape[-1] - w + 1, ),
+                np.result_type(values, np.float64))
+    if w < _RUNNING_SUM_WIDTH or not _all_finite(values):
+        k = np.ones(w)
+        _map_chunks(lambda x, y: _convolve_direct(x, k, y),
+                    values, w, 1, y, workers)
+    else:
+        _map_chunks(lambda x, y: _moving_sum(x, w, y),
+                    values, w, max(w, _RUNNING_SUM_BLOCK), y, workers)
+    y /= w
+    return y
+
+
+def _moving_sum(values, w, out, b=_RUNNING_SUM_BLOCK):
+    """
+    Writes the sums of all windows ``values[k:k + w]`` for ``k`` from ``0`` to
+    ``len(values) - w`` into ``out``, using running sums that are restarted
+    every ``max(w, b)`` windows. For N-d ``values``, the windows are taken
+    along the last axis.
+    """
+    n = out.shape[-1]
+    b = max(w, b)
+
+    # Set y[k] to the difference between the sums of windows k and k - 1, and
+    # then replace every b-th entry with the full sum of its window. Integer
+    # values are subtracted in the output type, so that they can't overflow.
+    np.subtract(values[..., w:], values[..., :n - 1], out=out[..., 1:],
+                dtype=out.dtype)
+    i = np.arange(0, n, b)
+    out[..., i] = _points._reduce_on(np.add, values, i, i + w, out.dtype)
+
+    # Turn into running sums, in blocks of b. This is done row by row,
+    # because NumPy makes a temporary copy if the blocks span several rows.
+    k = n // b
+    s = out.strides[-1]
+    for i in np.ndindex(out.shape[:-1]):
+        x = as_strided(out[i], shape=(k, b), strides=(b * s, s))
+        np.cumsum(x, axis=-1, out=x)
+        x = out[i][k * b:]
+        np.cumsum(x, out=x)
+    return out
@@ -5,16 +5,41 @@
 # This file is part of Datkit.
 # For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
 #
+import functools
+
 import numpy as np
+from numpy.lib.stride_tricks import as_strided
 
 import datkit
+from . import _chunks
+from ._profiling import _instrument
+from ._workspace import _array, _fft, _output
 
 
-def amplitude_spectrum(times, values):
+@_instrument
+def amplitude_spectrum(times, values, n=None, out=None, workspace=None):
     """
     Calculates the amplitude spectrum of a regularly spaced time series
     ``(times, current)``, returning a tuple ``(frequency, amplitude)``.
 
+    The spectrum is calculated with a single FFT of length ``n``. By default
+    this equals ``len(times)``, but a larger ``n`` can be given to zero-pad the
+    signal, or ``n='fast'`` to zero-pad to the nearest length for which the
+    FFT is fast (a product of powers of 2, 3, and 5). Amplitudes are always
+    scaled by the length of the original signal.
+
+    The ``values`` can also be a 2-d array of shape ``(traces, samples)``, for
+    example with one trace per sweep in an experiment, in which case all
+    spectra are calculated at once and a 2-d array of amplitudes is returned.
+    The returned frequency array is cached and read-only, and is shared
+    between calls with the same ``n`` and sampling interval.
+
+    The amplitudes can be written into an existing array ``out``, which must
+    have the same shape as the returned amplitudes. If a :class:`Workspace`
+    is also given, the temporary array holding the FFT result is reused
+    between calls, so that (with NumPy 2.0 or later) no large new arrays are
+    created.
+
     Example::
 
         t = np.linspace(0, 10, 1000)
@@ -30,20 +55,18 @@ def amplitude_spectrum(times, values):
         plt.show()
 
     """
-    dt = datkit.sampling_interval(times)
-    n = len(times)
-    # Select only the positive frequencies
-    m = n // 2
-    # FFT, normalised by number of point
-    a = np.absolute(np.fft.fft(values)[:m]) / n
+    f, x = _rfft(times, values, n, workspace)
+    # Normalise by number of points
+    a = np.absolute(x, out=_output(out, x.shape))
+    a /= len(times)
     # Only using one half, so multiply values of mirrored points by 2
-    a[1:-1] *= 2
-    # Get corresponding frequencies and return
-    f = np.fft.fftfreq(n, dt)[:m]
+    a[..., 1:-1] *= 2
     return f, a
 
 
-def power_spectral_density(times, values):
+@_instrument
+def power_spectral_density(times, values, n=None, out=None,
+                           workspace=None):
     """
     Estimates the power spectral density of a regularly spaced time series
     ``(times, current)``, returning a tuple ``(frequency, density)``.
@@ -51,8 +74,11 @@ def power_spectral_density(times, values):
     For times in units "T" and values in units "V", the returned frequencies
     will be in units "F=1/T" and the densities in "V^2/F".
 
-    For a less noisy version, use ``scipy.signal.welch(values,
-    1 / datkit.sampling_interval(times))`` instead.
+    The arguments ``n`` (for zero-padding), ``out`` and ``workspace`` (to
+    reuse memory), and 2-d ``values`` (for multiple traces) are handled as in
+    :meth:`amplitude_spectrum`.
+
+    For a less noisy version, use :meth:`welch_power_spectral_density`.
 
     Example::
 
@@ -70,11 +96,189 @@ def power_spectral_density(times, values):
         plt.show()
 
     """
+    f, x = _rfft(times, values, n, workspace)
+    p = np.absolute(x, out=_output(out, x.shape))
+    p *= p
+    p *= datkit.sampling_interval(times) / len(times)
+    p[..., 1:-1] *= 2
+    return f, p
+
+
+@_instrument
+def welch_amplitude_spectrum(times, values, segment_size=256, overlap=None,
+                             window='hann', detrend=True):
+    """
+    Estimates the amplitude spectrum of a regularly spaced time series
+    ``(times, values)`` by averaging over overlapping segments, returning a
+    tuple ``(frequency, amplitude)``.
+
+    The signal is split into segments as described in
+    :meth:`welch_power_spectral_density`, and the squared amplitudes of all
+    segments are averaged before taking the square root. Amplitudes are
+    corrected for the window, so that (as in :meth:`amplitude_spectrum`) a
+    sine wave with amplitude ``A`` results in a peak of height ``A``, but
+    spread out over a few frequency bins.
+
+    Compared to :meth:`amplitude_spectrum`, this gives a much less noisy
+    estimate, at the cost of a lower frequency resolution.
+    """
+    f, p, w = _welch(times, values, segment_size, overlap, window, detrend)
+    a = np.sqrt(p, out=p)
+    a /= np.sum(w)
+    a[..., 1:len(w) - (len(w) // 2)] *= 2
+    return f, a
+
+
+@_instrument
+def welch_power_spectral_density(times, values, segment_size=256,
+                                 overlap=None, window='hann', detrend=True):
+    """
+    Estimates the power spectral density of a regularly spaced time series
+    ``(times, values)`` using Welch's method, returning a tuple
+    ``(frequency, density)``.
+
+    The signal is split into segments of ``segment_size`` samples, which
+    overlap by ``overlap`` samples (by default half a segment). Any samples
+    that do not fit in a final segment are ignored. If the signal is shorter
+    than ``segment_size``, a single segment containing the full signal is
+    used. If ``detrend`` is ``True`` the mean of each segment is subtracted,
+    after which it is multiplied by a ``window`` and transformed with an FFT.
+    The window can be given as ``'hann'``, ``'hamming'``, or ``'boxcar'`` (no
+    window), or as an array of length ``segment_size``. Finally, the
+    periodograms of all segments are averaged.
+
+    The default settings and the scaling of the result are the same as in
+    ``scipy.signal.welch(values, 1 / dt)``. As in
+    :meth:`power_spectral_density`, for times in units "T" and values in
+    units "V", the returned frequencies will be in units "F=1/T" and the
+    densities in "V^2/F".
+
+    As in :meth:`power_spectral_density`, ``values`` can be a 2-d array of
+    shape ``(traces, samples)``, in which case a 2-d array of densities is
+    returned.
+
+    Segments are transformed in batches of at most :meth:`chunk_size`
+    samples, so that memory use does not depend on the length of the signal.
+    """
+    f, p, w = _welch(times, values, segment_size, overlap, window, detrend)
+    p /= np.sum(w**2) / datkit.sampling_interval(times)
+    p[..., 1:len(w) - (len(w) // 2)] *= 2
+    return f, p
+
+
+def _fast_length(n):
+    """
+    Returns the smallest integer ``>= n`` that is a product of powers of 2, 3,
+    and 5.
+    """
+    best = 1 << max(0, int(n - 1).bit_length())
+    p5 = 1
+    while p5 < best:
+        p35 = p5
+        while p35 < best:
+            # Multiply by the smallest power of 2 that reaches n
+            x = p35
+            while x < n:
+                x *= 2
+            best = min(best, x)
+            p35 *= 3
+        p5 *= 5
+    return best
+
+
+@functools.lru_cache(maxsize=32)
+def _frequencies(n, dt):
+    """
+    Returns a read-only array with the first ``n // 2`` frequencies of an FFT
+    of length ``n`` and sampling interval ``dt``.
+    """
+    f = np.fft.rfftfreq(n, dt)[:n // 2]
+    f.setflags(write=False)
+    return f
+
+
+def _rfft(times, values, n=None, workspace=None):
+    """
+    Returns a tuple ``(f, x)`` with the first ``n // 2`` frequencies and terms
+    of the FFT of ``values`` along its last axis, as used by
+    :meth:`amplitude_spectrum` and :meth:`power_spectral_density`.
+
+    If a ``workspace`` is given, the FFT is stored in a reused array.
+    """
+    values = np.asarray(values)
+    if values.ndim < 1 or values.shape[-1] != len(times):
+        raise ValueError('Times and values vectors must have same size.')
     dt = datkit.sampling_interval(times)
+    if n is None:
+        n = len(times)
+    elif n == 'fast':
+        n = _fast_length(len(times))
+    elif n < len(times):
+        raise ValueError(
+            f'The FFT length n must be at least len(times), got {n}.')
+    n = int(n)
+    x = _array(workspace, 'spectrum', values.shape[:-1] + (n // 2 + 1, ),
+               np.result_type(values.dtype, np.complex64))
+    x = _fft(np.fft.rfft, values, n, x)
+    return _frequencies(n, float(dt)), x[..., :n // 2]
+
+
+def _welch(times, values, segment_size, overlap, window, detrend):
+    """
+    Returns a tuple ``(f, p, w)`` with the frequencies ``f`` and the mean of
+    the squared absolute FFTs ``p`` of all windowed segments, along with the
+    window ``w`` that was used.
+    """
+    values = np.asarray(values)
     n = len(times)
-    m = n // 2
-    p = np.absolute(np.fft.fft(values)[:m])**2 * dt / n
-    p[1:-1] *= 2
-    f = np.fft.fftfreq(n, dt)[:m]
-    return f, p
+    if values.ndim < 1 or values.shape[-1] != n:
+        raise ValueError('Times and values vectors must have same size.')
+    dt = datkit.sampling_interval(times)
+
+    # Check segments and overlap
+    size = min(n, int(segment_size))
+    if size < 2:
+        raise ValueError(
+            f'The segment size must be at least 2, got {segment_size}.')
+    overlap = size // 2 if overlap is None else int(overlap)
+    if overlap < 0 or overlap >= size:
+        raise ValueError(
+            'The overlap must be non-negative and smaller than the segment'
+            f' size, got {overlap}.')
+    step = size - overlap
+    segments = 1 + (n - size) // step
+
+    # Create window
+    if isinstance(window, str):
+        k = 2 * np.pi * np.arange(size) / size
+        if window == 'hann':
+            w = 0.5 - 0.5 * np.cos(k)
+        elif window == 'hamming':
+            w = 0.54 - 0.46 * np.cos(k)
+        elif window == 'boxcar':
+            w = np.ones(size)
+        else:
+            raise ValueError(f'Unknown window: {window}.')
+    else:
+        w = np.asarray(window, dtype=float)
+        if w.shape != (size, ):
+            raise ValueError(
+                f'The window must be a 1-d array of length {size}.')
 
+    # Transform segments in batches, for all rows at once
+    rows = values.reshape(-1, n)
+    p = np.zeros((len(rows), size // 2 + 1))
+    batch = max(1, _chunks.chunk_size() // (size * len(rows)))
+    for a in range(0, segments, batch):
+        b = min(segments, a + batch)
+        x = np.ascontiguousarray(
+            rows[:, a * step:(b - 1) * step + size], dtype=float)
+        x = as_strided(x, shape=(len(rows), b - a, size),
+                       strides=(x.strides[0], step * 8, 8))
+        if detrend:
+            x = x - np.mean(x, axis=-1, keepdims=True)
+        x = np.abs(np.fft.rfft(x * w))
+        p += np.sum(x * x, axis=-2)
+    p /= segments
+    p = p.reshape(values.shape[:-1] + (size // 2 + 1, ))
+    return np.fft.rfftfreq(size, dt), p, w
@@ -0,0 +1,162 @@
+#
+# Smoothing filters that can be applied to data arriving in chunks.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import numpy as np
+
+from . import _smoothing
+
+
+class _StreamingFilter:
+    """
+    Base class for filters that can be applied to a time series that arrives
+    in chunks, for example during a live recording.
+
+    Each call to :meth:`process` takes the next chunk ``(times, values)`` and
+    returns the filtered samples that are ready. After the final chunk,
+    :meth:`flush` returns any samples that were held back. Together, the
+    returned chunks form the same time series as obtained by applying the
+    corresponding batch method to the full recording.
+
+    Batch methods that use running sums or FFTs process their outputs in
+    blocks, and the rounding errors in each output depend on where its block
+    starts. To obtain identical results, the stored samples always start at
+    the same block boundaries as in the batch method, so that memory use
+    depends on the block size but not on the length of the recording.
+
+    Subclasses implement a method ``_blocks()`` that returns a tuple
+    ``(b, causal)``, where ``b`` is the number of outputs in each block of the
+    batch method and ``causal`` is ``True`` if the outputs in an incomplete
+    block are unaffected by the samples that complete it (otherwise they are
+    held back until the block is complete, or until :meth:`flush` is called).
+    They also implement ``_filter(values)``, which returns the filtered values
+    for at least ``w`` samples starting at a block boundary, in ``'valid'``
+    mode.
+    """
+    def __init__(self, w=None, t=None, dt=None):
+        if t is not None and dt is None:
+            raise ValueError(
+                'A sampling interval dt must be given to set the window size'
+                ' from a duration t.')
+        self._w = _smoothing._window_size(None, w, t, dt)
+        self._b, self._causal = self._blocks()
+        self.reset()
+
+    def _emit(self, final):
+        """
+        Returns the ready outputs that have not been returned before, and
+        discards stored samples that are no longer needed.
+        """
+        w, b, k = self._w, self._b, self._k
+        times, values = self._times, self._values
+        m = max(0, len(times) - w + 1)
+        e = m if (final or self._causal) else m // b * b
+
+        # Store samples from the start of the block containing output e
+        a = e // b * b
+        self._times, self._values = times[a:].copy(), values[a:].copy()
+        self._k = e - a
+        if e <= k:
+            return times[:0], np.zeros(0)
+        y = self._filter(values[:e + w - 1])
+        return times[k + w // 2:e + w // 2], y[k:]
+
+    def flush(self):
+        """
+        Returns a tuple ``(x, y)`` with any filtered data that was held back,
+        and then calls :meth:`reset`.
+        """
+        x = y = np.zeros(0)
+        if self._times is not None:
+            x, y = self._emit(True)
+        self.reset()
+        return x, y
+
+    def process(self, times, values):
+        """
+        Processes the next chunk ``(times, values)`` and returns a tuple
+        ``(x, y)`` with the newly available filtered data.
+
+        The returned arrays are empty if fewer than ``w`` samples have been
+        received so far, or if the new outputs are held back (see
+        :meth:`flush`).
+        """
+        times, values = np.asarray(times), np.asarray(values)
+        if len(times) != len(values):
+            raise ValueError('Times and values vectors must have same size.')
+        if self._times is not None:
+            times = np.concatenate((self._times, times))
+            values = np.concatenate((self._values, values))
+        self._times, self._values = times, values
+        return self._emit(False)
+
+    def reset(self):
+        """
+        Discards any stored samples, so that a new time series can be
+        processed.
+        """
+        self._times = self._values = None
+        self._k = 0
+
+    @property
+    def w(self):
+        """ The window size, as a number of samples. """
+        return self._w
+
+
+class StreamingGaussianSmoothing(_StreamingFilter):
+    """
+    Applies the same filter as :meth:`datkit.gaussian_smoothing` to a time
+    series that arrives in chunks.
+
+    Each call to :meth:`process` takes the next chunk ``(times, values)`` and
+    returns the smoothed samples that are ready. After the final chunk,
+    :meth:`flush` returns any samples that were held back. Together, the
+    returned chunks are identical to the result of
+    :meth:`datkit.gaussian_smoothing` for the full recording (if all values
+    are finite).
+
+    For narrow windows, every smoothed sample is returned as soon as its
+    window has been received. For wide windows, where FFTs are used, results
+    are returned in blocks of a few times ``w`` samples, and the final
+    incomplete block is returned by :meth:`flush`. The memory used is
+    independent of the length of the recording.
+
+    The window size can be set with either ``w`` (a number of samples) or a
+    duration ``t``, in which case the sampling interval ``dt`` must also be
+    given (see :meth:`datkit.window_size`).
+    """
+    def _blocks(self):
+        L = _smoothing._gaussian_fft_size(self._w)
+        return (1, True) if L is None else (L - self._w + 1, False)
+
+    def _filter(self, values):
+        return _smoothing._gaussian_smoothing(values, self._w)
+
+
+class StreamingMovingAverage(_StreamingFilter):
+    """
+    Applies the same filter as :meth:`datkit.moving_average` to a time series
+    that arrives in chunks.
+
+    Each call to :meth:`process` takes the next chunk ``(times, values)`` and
+    returns every new average whose window has been fully received. Together,
+    the returned chunks are identical to the result of
+    :meth:`datkit.moving_average` for the full recording (if all values are
+    finite), and :meth:`flush` always returns empty arrays. The memory used is
+    independent of the length of the recording.
+
+    The window size can be set with either ``w`` (a number of samples) or a
+    duration ``t``, in which case the sampling interval ``dt`` must also be
+    given (see :meth:`datkit.window_size`).
+    """
+    def _blocks(self):
+        w = self._w
+        if w < _smoothing._RUNNING_SUM_WIDTH:
+            return 1, True
+        return max(w, _smoothing._RUNNING_SUM_BLOCK), True
+
+    def _filter(self, values):
+        return _smoothing._moving_average(values, self._w)
@@ -0,0 +1,599 @@
+#
+# A time series class that caches information about its data.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import numpy as np
+
+import datkit
+from . import _points
+from . import _smoothing
+
+
+class TimeSeries:
+    """
+    Represents a time series ``(times, values)``, and provides methods that
+    are equivalent to the module-level functions in datkit, but that cache
+    information about the series between calls.
+
+    For example, ``TimeSeries(times, values).mean_on(t0, t1)`` returns the
+    same result as ``datkit.mean_on(times, values, t0, t1)``. The sampling
+    interval, the results of :meth:`is_increasing` and
+    :meth:`is_regularly_increasing`, cumulative sums of the values, and tables
+    of extrema are calculated only once, when first needed. This makes
+    repeated queries on the same (long) time series considerably cheaper.
+
+    For example, the first call to :meth:`mean_on`, :meth:`sum_on`, or
+    :meth:`variance_on` builds a table of cumulative sums in ``O(n)`` time,
+    after which each call takes a constant time, regardless of the interval
+    length. On a typical machine, building the table for ``n = 10^7`` takes
+    about as long as ``10^4`` calls to :meth:`datkit.mean_on`, so that the
+    table pays off when many (or very long) intervals are queried. Similarly,
+    the first call to e.g. :meth:`max_on` or :meth:`imin_on` builds a table of
+    the extrema on runs of consecutive blocks of values, after which the
+    extremum on any interval is found by scanning at most a few hundred
+    values.
+
+    If the times are regularly increasing, indices for large arrays of
+    queries (e.g. in :meth:`indices_on` or :meth:`value_near`) are calculated
+    directly from ``times[0]`` and the sampling interval instead of with
+    binary searches, so that each lookup takes a constant time. By default,
+    this is checked on the first lookup, by comparing a few samples with the
+    times predicted from the sampling interval, but it can also be set by
+    passing in ``regular=True`` (or ``regular=False`` to always use binary
+    searches).
+
+    The arguments ``times`` and ``values`` are converted to numpy arrays
+    without copying (where possible). Because results are cached, the arrays
+    should not be modified after the time series is created.
+    """
+    __slots__ = (
+        '_times', '_values', '_dt', '_increasing', '_regular', '_fast',
+        '_shift', '_sums', '_squares', '_max', '_min', '_abs_max',
+    )
+
+    def __init__(self, times, values, regular=None):
+        times, values = np.asarray(times), np.asarray(values)
+        if len(times.shape) != 1:
+            raise ValueError('Times must be a 1-d numpy array.')
+        if values.ndim != 1:
+            raise ValueError('Values must be a 1-d numpy array.')
+        if len(times) < 1:
+            raise ValueError('Times must contain at least one value.')
+        if len(times) != len(values):
+            raise ValueError('Times and values vectors must have same size.')
+        self._times = times
+        self._values = values
+
+        # Lazily evaluated properties
+        self._dt = None
+        self._increasing = None
+        self._regular = None
+        self._fast = None if regular is None else bool(regular)
+        self._shift = None
+        self._sums = None
+        self._squares = None
+        self._max = None
+        self._min = None
+        self._abs_max = None
+
+    def __len__(self):
+        return len(self._times)
+
+    def _cumulative_sums(self, squares=False):
+        """
+        Returns a tuple ``(c, s)`` where ``s`` is a :class:`_PrefixSums` for
+        ``values - c``, or for ``(values - c)**2`` if ``squares=True``.
+
+        Subtracting the mean ``c`` before summing greatly reduces rounding
+        errors in both the sums and the variance.
+
+        If the values contain ``nan`` or infinite values, ``None`` is returned
+        instead, and sums should be calculated directly.
+        """
+        if self._sums is None:
+            v = self._values
+            self._shift = np.mean(v)
+            if not np.isfinite(self._shift):
+                self._sums = False
+            else:
+                self._sums = _PrefixSums(v - self._shift)
+        if self._sums is False:
+            return None
+        if squares:
+            if self._squares is None:
+                self._squares = _PrefixSums((self._values - self._shift)**2)
+            return self._shift, self._squares
+        return self._shift, self._sums
+
+    def _lookup_step(self):
+        """
+        Returns the sampling interval to use for arithmetic lookups, or
+        ``None`` if binary searches should be used.
+        """
+        if self._fast is None:
+            self._fast = (
+                len(self) > 1 and _points._steady(self._times, self.dt))
+        return self.dt if self._fast else None
+
+    def abs_max_on(self, t0=None, t1=None, include_left=True,
+                   include_right=False):
+        """ See :meth:`datkit.abs_max_on`. """
+        i = self.iabs_max_on(t0, t1, include_left, include_right)
+        return self._times[i], self._values[i]
+
+    def abs_maxima_on(self, t0=None, t1=None, include_left=True,
+                      include_right=False):
+        """ See :meth:`datkit.abs_maxima_on`. """
+        i = self.iabs_maxima_on(t0, t1, include_left, include_right)
+        return self._times[i], self._values[i]
+
+    def amplitude_spectrum(self, n=None, out=None, workspace=None):
+        """ See :meth:`datkit.amplitude_spectrum`. """
+        return datkit.amplitude_spectrum(
+            self._times, self._values, n, out, workspace)
+
+    def data_on(self, t0=None, t1=None, include_left=True,
+                include_right=False):
+        """ See :meth:`datkit.data_on`. """
+        i, j = self.index_on(t0, t1, include_left, include_right)
+        return self._times[i:j], self._values[i:j]
+
+    @property
+    def dt(self):
+        """
+        The sampling interval, as returned by :meth:`datkit.sampling_interval`.
+        """
+        if self._dt is None:
+            self._dt = datkit.sampling_interval(self._times)
+        return self._dt
+
+    def first_irregularity(self, reltol=1e-12):
+        """ See :meth:`datkit.first_irregularity`. """
+        return datkit.first_irregularity(self._times, reltol)
+
+    def gaussian_smoothing(self, w=None, t=None, workers=None, out=None,
+                           workspace=None):
+        """ See :meth:`datkit.gaussian_smoothing`. """
+        return datkit.gaussian_smoothing(
+            self._times, self._values, self.window_size(w, t),
+            workers=workers, out=out, workspace=workspace)
+
+    def haar_downsample(self, repeats=1, out=None, workspace=None):
+        """ See :meth:`datkit.haar_downsample`. """
+        return datkit.haar_downsample(
+            self._times, self._values, repeats, out, workspace)
+
+    def haar_pyramid(self, levels=None):
+        """ See :meth:`datkit.haar_pyramid`. """
+        return datkit.haar_pyramid(self._times, self._values, levels)
+
+    def iabs_max_on(self, t0=None, t1=None, include_left=True,
+                    include_right=False):
+        """ See :meth:`datkit.iabs_max_on`. """
+        i, j = self.index_on(t0, t1, include_left, include_right)
+        if self._abs_max is None:
+            self._abs_max = _RangeExtrema(np.abs(self._values))
+        return self._abs_max.index(i, j)
+
+    def iabs_maxima_on(self, t0=None, t1=None, include_left=True,
+                       include_right=False):
+        """ See :meth:`datkit.iabs_maxima_on`. """
+        i, j = self.indices_on(t0, t1, include_left, include_right)
+        if self._abs_max is None:
+            self._abs_max = _RangeExtrema(np.abs(self._values))
+        return self._abs_max.indices(i, j)
+
+    def imax_on(self, t0=None, t1=None, include_left=True,
+                include_right=False):
+        """ See :meth:`datkit.imax_on`. """
+        i, j = self.index_on(t0, t1, include_left, include_right)
+        if self._max is None:
+            self._max = _RangeExtrema(self._values)
+        return self._max.index(i, j)
+
+    def imaxima_on(self, t0=None, t1=None, include_left=True,
+                   include_right=False):
+        """ See :meth:`datkit.imaxima_on`. """
+        i, j = self.indices_on(t0, t1, include_left, include_right)
+        if self._max is None:
+            self._max = _RangeExtrema(self._values)
+        return self._max.indices(i, j)
+
+    def imin_on(self, t0=None, t1=None, include_left=True,
+                include_right=False):
+        """ See :meth:`datkit.imin_on`. """
+        i, j = self.index_on(t0, t1, include_left, include_right)
+        if self._min is None:
+            self._min = _RangeExtrema(self._values, False)
+        return self._min.index(i, j)
+
+    def iminima_on(self, t0=None, t1=None, include_left=True,
+                   include_right=False):
+        """ See :meth:`datkit.iminima_on`. """
+        i, j = self.indices_on(t0, t1, include_left, include_right)
+        if self._min is None:
+            self._min = _RangeExtrema(self._values, False)
+        return self._min.indices(i, j)
+
+    def index(self, t, ttol=1e-9):
+        """ See :meth:`datkit.index`. """
+        return _points._index(self._times, t, ttol, self._lookup_step())
+
+    def index_crossing(self, value=0):
+        """ See :meth:`datkit.index_crossing`. """
+        return datkit.index_crossing(self._values, value)
+
+    def index_crossings(self, value=0, direction=0, hysteresis=0,
+                        min_separation=0):
+        """ See :meth:`datkit.index_crossings`. """
+        return datkit.index_crossings(
+            self._values, value, direction, hysteresis, min_separation)
+
+    def index_near(self, t):
+        """ See :meth:`datkit.index_near`. """
+        return _points._index_near(
+            self._times, t, self._dt, self._lookup_step())
+
+    def index_on(self, t0=None, t1=None, include_left=True,
+                 include_right=False):
+        """ See :meth:`datkit.index_on`. """
+        return _points._index_on(self._times, t0, t1, include_left,
+                                 include_right)
+
+    def index_steps(self, tolerance=0, min_length=1):
+        """ See :meth:`datkit.index_steps`. """
+        return datkit.index_steps(self._values, tolerance, min_length)
+
+    def indices_on(self, t0=None, t1=None, include_left=True,
+                   include_right=False):
+        """ See :meth:`datkit.indices_on`. """
+        return _points._indices_on(self._times, t0, t1, include_left,
+                                   include_right, self._lookup_step())
+
+    def is_increasing(self):
+        """ See :meth:`datkit.is_increasing`. """
+        if self._increasing is None:
+            self._increasing = datkit.is_increasing(self._times)
+        return self._increasing
+
+    def is_regularly_increasing(self, reltol=1e-12):
+        """
+        See :meth:`datkit.is_regularly_increasing`.
+
+        Only the result for the default ``reltol`` is cached.
+        """
+        if reltol != 1e-12:
+            return datkit.is_regularly_increasing(self._times, reltol)
+        if self._regular is None:
+            self._regular = datkit.is_regularly_increasing(self._times)
+        return self._regular
+
+    def lttb_downsample(self, n):
+        """ See :meth:`datkit.lttb_downsample`. """
+        return datkit.lttb_downsample(self._times, self._values, n)
+
+    def max_on(self, t0=None, t1=None, include_left=True,
+               include_right=False):
+        """ See :meth:`datkit.max_on`. """
+        i = self.imax_on(t0, t1, include_left, include_right)
+        return self._times[i], self._values[i]
+
+    def maxima_on(self, t0=None, t1=None, include_left=True,
+                  include_right=False):
+        """ See :meth:`datkit.maxima_on`. """
+        i = self.imaxima_on(t0, t1, include_left, include_right)
+        return self._times[i], self._values[i]
+
+    def mean_on(self, t0=None, t1=None, include_left=True,
+                include_right=False):
+        """
+        See :meth:`datkit.mean_on`.
+
+        The mean is calculated from cached cumulative sums, so that each call
+        takes a constant time. Results may differ from :meth:`datkit.mean_on`
+        by a small rounding error.
+        """
+        i, j = self.index_on(t0, t1, include_left, include_right)
+        cs = self._cumulative_sums() if j > i else None
+        if cs is None:
+            return np.mean(self._values[i:j])
+        c, s = cs
+        return c + s.sum(i, j) / (j - i)
+
+    def means_on(self, t0=None, t1=None, include_left=True,
+                 include_right=False):
+        """
+        See :meth:`datkit.means_on`.
+
+        As with :meth:`mean_on`, cached cumulative sums are used.
+        """
+        i, j = self.indices_on(t0, t1, include_left, include_right)
+        cs = self._cumulative_sums()
+        if cs is None:
+            return _points._means_on(self._values, i, j)
+        c, s = cs
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(j > i, c + s.sum(i, j) / (j - i), np.nan)
+
+    def min_on(self, t0=None, t1=None, include_left=True,
+               include_right=False):
+        """ See :meth:`datkit.min_on`. """
+        i = self.imin_on(t0, t1, include_left, include_right)
+        return self._times[i], self._values[i]
+
+    def minima_on(self, t0=None, t1=None, include_left=True,
+                  include_right=False):
+        """ See :meth:`datkit.minima_on`. """
+        i = self.iminima_on(t0, t1, include_left, include_right)
+        return self._times[i], self._values[i]
+
+    def minmax_downsample(self, n):
+        """ See :meth:`datkit.minmax_downsample`. """
+        return datkit.minmax_downsample(self._times, self._values, n)
+
+    def moving_average(self, w=None, t=None, workers=None, out=None):
+        """ See :meth:`datkit.moving_average`. """
+        return datkit.moving_average(
+            self._times, self._values, self.window_size(w, t),
+            workers=workers, out=out)
+
+    def power_spectral_density(self, n=None, out=None, workspace=None):
+        """ See :meth:`datkit.power_spectral_density`. """
+        return datkit.power_spectral_density(
+            self._times, self._values, n, out, workspace)
+
+    def sampling_interval(self):
+        """ See :meth:`datkit.sampling_interval` and :meth:`dt`. """
+        return self.dt
+
+    def sum_on(self, t0=None, t1=None, include_left=True,
+               include_right=False):
+        """
+        See :meth:`datkit.sum_on`.
+
+        As with :meth:`mean_on`, cached cumulative sums are used.
+        """
+        i, j = self.index_on(t0, t1, include_left, include_right)
+        cs = self._cumulative_sums() if j > i else None
+        if cs is None:
+            return np.sum(self._values[i:j])
+        c, s = cs
+        return s.sum(i, j) + c * (j - i)
+
+    def time_crossing(self, value=0):
+        """ See :meth:`datkit.time_crossing`. """
+        return datkit.time_crossing(self._times, self._values, value)
+
+    def time_crossings(self, value=0, direction=0, hysteresis=0,
+                       min_separation=0):
+        """ See :meth:`datkit.time_crossings`. """
+        return datkit.time_crossings(self._times, self._values, value,
+                                     direction, hysteresis, min_separation)
+
+    def time_steps(self, tolerance=0, min_length=1):
+        """ See :meth:`datkit.time_steps`. """
+        return datkit.time_steps(
+            self._times, self._values, tolerance, min_length)
+
+    @property
+    def times(self):
+        """ The times in this series, as a numpy array. """
+        return self._times
+
+    def value_at(self, t, ttol=1e-9):
+        """ See :meth:`datkit.value_at`. """
+        return self._values[self.index(t, ttol)]
+
+    def value_interpolated(self, t, mask=False):
+        """ See :meth:`datkit.value_interpolated`. """
+        return _points._value_interpolated(
+            self._times, self._values, t, self._lookup_step(), mask)
+
+    def value_near(self, t, mask=False):
+        """ See :meth:`datkit.value_near`. """
+        return _points._value_near(
+            self._times, self._values, t, self._dt, self._lookup_step(), mask)
+
+    @property
+    def values(self):
+        """ The values in this series, as a numpy array. """
+        return self._values
+
+    def variance_on(self, t0=None, t1=None, include_left=True,
+                    include_right=False):
+        """
+        See :meth:`datkit.variance_on`.
+
+        As with :meth:`mean_on`, cached cumulative sums (of the values and of
+        their squares) are used. The sums are taken around the mean of all
+        values, so that if the values on the interval are far from this mean
+        compared to their spread (e.g. on one level of a step signal), the
+        variance is lost in the rounding errors of the sums. In this case,
+        which is detected from an upper bound on these errors, the variance
+        is calculated directly from the values on the interval instead.
+        """
+        i, j = self.index_on(t0, t1, include_left, include_right)
+        cs = self._cumulative_sums() if j > i else None
+        if cs is None:
+            return np.var(self._values[i:j])
+        n = j - i
+        s1 = cs[1].sum(i, j)
+        squares = self._cumulative_sums(True)[1]
+        p0, p1 = squares.prefix(i), squares.prefix(j)
+        r = (p1 - p0) - s1 * s1 / n
+
+        # The error in s1 is bounded using sum(|x[:j]|) <= sqrt(j * p1)
+        error = squares.rounding(j) * (p0 + p1) * (1 + 2 * np.sqrt(j / n))
+        if not r > 1e6 * error:
+            return np.var(self._values[i:j])
+        return r / n
+
+    def welch_amplitude_spectrum(self, segment_size=256, overlap=None,
+                                 window='hann', detrend=True):
+        """ See :meth:`datkit.welch_amplitude_spectrum`. """
+        return datkit.welch_amplitude_spectrum(
+            self._times, self._values, segment_size, overlap, window, detrend)
+
+    def welch_power_spectral_density(self, segment_size=256, overlap=None,
+                                     window='hann', detrend=True):
+        """ See :meth:`datkit.welch_power_spectral_density`. """
+        return datkit.welch_power_spectral_density(
+            self._times, self._values, segment_size, overlap, window, detrend)
+
+    def window_size(self, w=None, t=None):
+        """ See :meth:`datkit.window_size`. """
+        return _smoothing._window_size(
+            self._times, w, t, None if t is None else self.dt)
+
+
+class _PrefixSums:
+    """
+    Stores cumulative sums of a 1-d array ``x``, so that ``sum(x[i:j])`` can
+    be calculated in constant time.
+
+    To limit the accumulation of rounding errors, sums are stored on two
+    levels: a cumulative sum within each block of ``b`` values, and a
+    cumulative sum of the (pairwise summed) block totals. The error in each
+    sum is then proportional to ``b + len(x) / b`` instead of ``len(x)``.
+    """
+    __slots__ = ('_b', '_local', '_blocks')
+
+    def __init__(self, x, b=1024):
+        x = np.asarray(x, dtype=float)
+        n = len(x)
+        m = n - n % b
+        self._b = b
+        self._local = np.empty(n)
+        np.cumsum(x[:m].reshape(-1, b), axis=1,
+                  out=self._local[:m].reshape(-1, b))
+        np.cumsum(x[m:], out=self._local[m:])
+        totals = np.sum(x[:m].reshape(-1, b), axis=1)
+        if m < n:
+            totals = np.append(totals, np.sum(x[m:]))
+        self._blocks = np.zeros(1 + len(totals))
+        np.cumsum(totals, out=self._blocks[1:])
+
+    def prefix(self, j):
+        """ Returns ``sum(x[:j])``, for an integer or array of integers. """
+        if np.ndim(j) > 0:
+            q, r = np.divmod(j, self._b)
+            return self._blocks[q] + np.where(r > 0, self._local[j - 1], 0)
+        q, r = divmod(j, self._b)
+        return self._blocks[q] + self._local[j - 1] if r else self._blocks[q]
+
+    def rounding(self, j):
+        """
+        Returns an upper bound on the relative rounding error in
+        ``prefix(j)``.
+        """
+        return np.finfo(float).eps * (self._b + j / self._b)
+
+    def sum(self, i, j):
+        """ Returns ``sum(x[i:j])``, for integers or arrays of integers. """
+        return self.prefix(j) - self.prefix(i)
+
+
+class _RangeExtrema:
+    """
+    Stores information about the extrema of a 1-d array ``x``, so that the
+    index of the first maximum (or minimum, if ``maximum=False``) on any
+    interval ``x[i:j]`` can be found quickly.
+
+    The array is divided into blocks of ``b`` values, and a sparse table is
+    created with the index of the first extremum on every sequence of ``2^k``
+    consecutive blocks. The extremum on any run of full blocks can then be
+    found by comparing two entries in this table, so that each query scans at
+    most ``2 * b`` values (at the start and end of the interval). The table
+    stores about ``(n / b) * log2(n / b)`` indices.
+
+    As with ``np.argmax`` and ``np.argmin``, the first ``nan`` counts as the
+    extremum of any interval that contains ``nan`` values.
+    """
+    __slots__ = ('_x', '_b', '_arg', '_ufunc', '_table')
+
+    def __init__(self, x, maximum=True, b=64):
+        self._x = x = np.asarray(x)
+        self._b = b
+        self._arg = np.argmax if maximum else np.argmin
+        self._ufunc = np.maximum if maximum else np.minimum
+
+        # Extremum in every block, and in every sequence of 2, 4, 8, etc.
+        # blocks. Row k contains nb - 2^k + 1 entries, padded with zeros.
+        nb = len(x) // b
+        self._table = np.zeros((max(1, nb.bit_length()), nb), dtype=np.intp)
+        level = self._table[0]
+        level[:] = np.arange(0, nb * b, b)
+        level += self._arg(x[:nb * b].reshape(nb, b), axis=1)
+        for k in range(1, len(self._table)):
+            m = nb - (1 << k) + 1
+            h = 1 << (k - 1)
+            self._table[k, :m] = self._better(level[:m], level[h:h + m])
+            level = self._table[k]
+
+    def _better(self, p, q):
+        """
+        Returns ``p`` or ``q``, whichever points to the more extreme value,
+        where ``p`` and ``q`` are arrays of indices and ``p <= q``.
+        """
+        xp, xq = self._x[p], self._x[q]
+        q_wins = xq > xp if self._ufunc is np.maximum else xq < xp
+        if xp.dtype.kind in 'fc':
+            q_wins |= np.isnan(xq) & ~np.isnan(xp)
+        return np.where(q_wins, q, p)
+
+    def index(self, i, j):
+        """
+        Returns the index of the first extremum in ``x[i:j]``, where
+        ``i < j``.
+        """
+        # Short intervals are faster to scan in full
+        i, j = int(i), int(j)
+        b, x, arg = self._b, self._x, self._arg
+        b0 = -(-i // b)
+        b1 = min(j // b, self._table.shape[1])
+        if b1 - b0 < 32:
+            return i + arg(x[i:j])
+
+        # Find extremum in head, full blocks, and tail, and select the first
+        k = (b1 - b0).bit_length() - 1
+        c = [self._table[k, b0], self._table[k, b1 - (1 << k)]]
+        if i < b0 * b:
+            c.insert(0, i + arg(x[i:b0 * b]))
+        if b1 * b < j:
+            c.append(b1 * b + arg(x[b1 * b:j]))
+        return c[arg(x[c])]
+
+    def indices(self, i, j):
+        """
+        Returns an array with the index of the first extremum in each interval
+        ``x[i[k]:j[k]]``, where all ``i[k] < j[k]``.
+        """
+        n = j - i
+        if np.any(n < 1):
+            k = np.flatnonzero(n < 1)[0]
+            raise ValueError(f'Interval {k} does not contain any values.')
+
+        # Find extremum in full blocks, if any
+        b, nb = self._b, self._table.shape[1]
+        b0 = np.minimum(-(-i // b), nb)
+        b1 = np.minimum(j // b, nb)
+        full = b0 < b1
+        best = np.zeros(len(i), dtype=np.intp)
+        if np.any(full):
+            p, q = b0[full], b1[full]
+            k = np.zeros(len(p), dtype=np.intp)
+            while np.any(1 << (k + 1) <= q - p):
+                k += 1 << (k + 1) <= q - p
+            best[full] = self._better(
+                self._table[k, p], self._table[k, q - (1 << k)])
+
+        # Gather candidates from head, full blocks, and tail, and find first
+        h = np.where(full, b0 * b, j)
+        starts = np.stack((i, best, b1 * b), axis=1).ravel()
+        lengths = np.stack((h - i, full, np.where(full, j - b1 * b, 0)),
+                           axis=1).ravel()
+        idx = _points._ranges(starts, lengths)
+        n = np.sum(lengths.reshape(-1, 3), axis=1)
+        return idx[_points._first_extrema(self._ufunc, self._x[idx], n)]
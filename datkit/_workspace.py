@@ -0,0 +1,112 @@
+#
+# Reusable memory for repeated calculations on inputs of the same shape.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import inspect
+
+import numpy as np
+
+
+#: True if NumPy's FFT methods accept an ``out`` argument (NumPy 2.0 or later)
+_FFT_OUT = 'out' in inspect.signature(np.fft.rfft).parameters
+
+
+class Workspace:
+    """
+    Stores temporary arrays that can be reused between calls to datkit methods
+    on inputs of the same shape.
+
+    A workspace can be passed to :meth:`gaussian_smoothing`,
+    :meth:`haar_downsample`, :meth:`amplitude_spectrum`, and
+    :meth:`power_spectral_density`. Together with an ``out`` argument for the
+    result, this lets a stream of inputs of the same shape (for example the
+    sweeps of a repeated protocol) be processed without allocating any new
+    arrays whose size depends on the input, except in the first call::
+
+        w = datkit.Workspace()
+        y = np.empty(len(times) - 500)
+        for values in sweeps:
+            datkit.gaussian_smoothing(times, values, 501, out=y, workspace=w)
+            ...
+
+    (The method :meth:`moving_average` does not need a workspace to do
+    this.)
+
+    Filter kernels and their FFTs (the "plans" for each calculation) do not
+    depend on the input, and are cached separately, so that they are shared
+    between all workspaces.
+
+    Arrays are created when first needed, and replaced if a call requires a
+    different shape or data type. For best results, a separate workspace
+    should be used for each type of call, and a workspace should never be
+    used by more than one thread at a time. Methods that use FFTs can only
+    write their results into preallocated arrays with NumPy 2.0 or later.
+    """
+    def __init__(self):
+        self._arrays = {}
+
+    def clear(self):
+        """
+        Discards all stored arrays.
+        """
+        self._arrays.clear()
+
+    def nbytes(self):
+        """
+        Returns the total size of all stored arrays, in bytes.
+        """
+        return sum(x.nbytes for x in self._arrays.values())
+
+
+def _array(workspace, key, shape, dtype=np.float64):
+    """
+    Returns an uninitialised array of the given ``shape`` and ``dtype``.
+
+    If a :class:`Workspace` is given, the array stored under ``key`` is
+    returned if it has the right shape and dtype, or created and stored
+    otherwise. If ``workspace`` is ``None``, a new array is returned.
+    """
+    if workspace is None:
+        return np.empty(shape, dtype=dtype)
+    shape, dtype = tuple(shape), np.dtype(dtype)
+    x = workspace._arrays.get(key)
+    if x is None or x.shape != shape or x.dtype != dtype:
+        x = workspace._arrays[key] = np.empty(shape, dtype=dtype)
+    return x
+
+
+def _fft(f, x, n, out):
+    """
+    Returns ``f(x, n)`` for a NumPy FFT method ``f``, writing the result into
+    ``out`` if this is supported.
+    """
+    if _FFT_OUT:
+        return f(x, n, out=out)
+    return f(x, n)
+
+
+def _fits(out, shape, dtype):
+    """
+    Returns ``True`` if ``out`` is an array of the given ``shape``, to which
+    values of type ``dtype`` can be written (possibly with a loss of precision,
+    e.g. from ``float64`` to ``float32``, but not from floats to integers).
+    """
+    return (isinstance(out, np.ndarray) and out.shape == tuple(shape)
+            and np.can_cast(dtype, out.dtype, 'same_kind'))
+
+
+def _output(out, shape, dtype=np.float64):
+    """
+    Returns ``out`` after checking that it has the given ``shape`` and can hold
+    values of type ``dtype`` (see :meth:`_fits`), or a new array of the given
+    ``shape`` and ``dtype`` if ``out`` is ``None``.
+    """
+    if out is None:
+        return np.empty(shape, dtype=dtype)
+    if not _fits(out, shape, dtype):
+        raise ValueError(
+            f'The argument out must be an array of shape {tuple(shape)}, with'
+            f' a data type that can hold {np.dtype(dtype)} values.')
+    return out
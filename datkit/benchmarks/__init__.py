@@ -0,0 +1,19 @@
+#
+# Benchmark suite
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+"""
+Benchmarks for the datkit methods.
+
+The benchmarks are written for `airspeed velocity
+<https://asv.readthedocs.io/>`_, which can be used to track performance over
+the repository history (see ``asv.conf.json``). They can also be run without
+asv, using::
+
+    python -m datkit.benchmarks
+
+Run with ``--help`` for options, e.g. to select benchmarks, to set the largest
+signal size, or to compare against results saved in a previous run.
+"""
@@ -0,0 +1,11 @@
+#
+# Runs the benchmarks without asv.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+from .runner import main
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#
+# Benchmarks the methods to check time vectors, and the chunk size setting.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import datkit as d
+
+from .common import SIZES, signal, with_peakmem
+
+
+@with_peakmem
+class CheckTimes:
+    """ Benchmarks methods from the hidden _check_times module. """
+    params = [SIZES]
+    param_names = ['n']
+    timeout = 600
+
+    def setup(self, n):
+        self.times, self.values = signal(n)
+
+    def time_first_irregularity(self, n):
+        d.first_irregularity(self.times)
+
+    def time_is_increasing(self, n):
+        d.is_increasing(self.times)
+
+    def time_is_regularly_increasing(self, n):
+        d.is_regularly_increasing(self.times)
+
+    def time_sampling_interval(self, n):
+        d.sampling_interval(self.times)
+
+
+@with_peakmem
+class ChunkSize:
+    """ Benchmarks the effect of :meth:`datkit.set_chunk_size`. """
+    params = [[2**12, 2**16, 2**20, 2**24]]
+    param_names = ['chunk_size']
+    timeout = 600
+
+    def setup(self, size):
+        self.times, self.values = signal(10**6)
+        self.default = d.chunk_size()
+        d.set_chunk_size(size)
+
+    def teardown(self, size):
+        d.set_chunk_size(self.default)
+
+    def time_chunk_size(self, size):
+        d.chunk_size()
+
+    def time_is_regularly_increasing(self, size):
+        d.is_regularly_increasing(self.times)
+
+    def time_max_on(self, size):
+        d.max_on(self.times, self.values)
+
+    def time_moving_average(self, size):
+        d.moving_average(self.times, self.values, 1001)
@@ -0,0 +1,23 @@
+#
+# Benchmarks the time taken to import datkit in a new process.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+
+
+class Import:
+    """
+    Benchmarks importing datkit in a new process, and the first use of a
+    datkit method (which imports NumPy and the submodule that defines it).
+    """
+    timeout = 60
+
+    def timeraw_import_datkit(self):
+        return 'import datkit'
+
+    def timeraw_first_call(self):
+        return 'import datkit as d\nd.sampling_interval([0, 1])'
+
+    def timeraw_import_numpy(self):
+        return 'import numpy'
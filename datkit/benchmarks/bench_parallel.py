@@ -0,0 +1,26 @@
+#
+# Benchmarks processing many recordings in parallel.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import datkit as d
+
+from .common import SIZES, signal, with_peakmem
+
+
+@with_peakmem
+class ParallelMap:
+    """
+    Benchmarks :meth:`datkit.parallel_map` on 16 recordings of ``n`` samples,
+    using ``workers`` processes.
+    """
+    params = [SIZES[:5], [1, 2, 4]]
+    param_names = ['n', 'workers']
+    timeout = 600
+
+    def setup(self, n, workers):
+        self.series = [signal(n)] * 16
+
+    def time_parallel_map(self, n, workers):
+        d.parallel_map(d.welch_power_spectral_density, self.series, workers)
@@ -0,0 +1,186 @@
+#
+# Benchmarks the methods to find points and perform operations on intervals.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import numpy as np
+
+import datkit as d
+
+from .common import SIZES, intervals, signal, with_peakmem
+
+
+@with_peakmem
+class Points:
+    """ Benchmarks single queries on a signal of ``n`` samples. """
+    params = [SIZES]
+    param_names = ['n']
+    timeout = 600
+
+    def setup(self, n):
+        self.times, self.values = signal(n)
+        self.t = self.times[n // 3]
+        self.t0, self.t1 = self.times[n // 4], self.times[3 * n // 4]
+
+    def time_abs_max_on(self, n):
+        d.abs_max_on(self.times, self.values, self.t0, self.t1)
+
+    def time_data_on(self, n):
+        d.data_on(self.times, self.values, self.t0, self.t1)
+
+    def time_iabs_max_on(self, n):
+        d.iabs_max_on(self.times, self.values, self.t0, self.t1)
+
+    def time_imax_on(self, n):
+        d.imax_on(self.times, self.values, self.t0, self.t1)
+
+    def time_imin_on(self, n):
+        d.imin_on(self.times, self.values, self.t0, self.t1)
+
+    def time_index(self, n):
+        d.index(self.times, self.t)
+
+    def time_index_crossing(self, n):
+        d.index_crossing(self.values[n // 2:], -0.5)
+
+    def time_index_crossings(self, n):
+        d.index_crossings(self.values, 0.5, hysteresis=0.2)
+
+    def time_index_near(self, n):
+        d.index_near(self.times, self.t + 0.01)
+
+    def time_index_on(self, n):
+        d.index_on(self.times, self.t0, self.t1)
+
+    def time_max_on(self, n):
+        d.max_on(self.times, self.values, self.t0, self.t1)
+
+    def time_mean_on(self, n):
+        d.mean_on(self.times, self.values, self.t0, self.t1)
+
+    def time_min_on(self, n):
+        d.min_on(self.times, self.values, self.t0, self.t1)
+
+    def time_sum_on(self, n):
+        d.sum_on(self.times, self.values, self.t0, self.t1)
+
+    def time_time_crossing(self, n):
+        d.time_crossing(self.times[n // 2:], self.values[n // 2:], -0.5)
+
+    def time_time_crossings(self, n):
+        d.time_crossings(self.times, self.values, 0.5, hysteresis=0.2)
+
+    def time_value_at(self, n):
+        d.value_at(self.times, self.values, self.t)
+
+    def time_value_interpolated(self, n):
+        d.value_interpolated(self.times, self.values, self.t + 0.01)
+
+    def time_value_near(self, n):
+        d.value_near(self.times, self.values, self.t + 0.01)
+
+    def time_variance_on(self, n):
+        d.variance_on(self.times, self.values, self.t0, self.t1)
+
+
+@with_peakmem
+class Queries:
+    """
+    Compares ``queries`` scalar queries with a single batch query, on
+    intervals that split a signal of ``n`` samples into equal parts.
+    """
+    params = [SIZES, [10, 1000, 100000]]
+    param_names = ['n', 'queries']
+    timeout = 600
+
+    def setup(self, n, k):
+        if k > n // 10:
+            raise NotImplementedError('Too many queries for this size.')
+        self.times, self.values = signal(n)
+        self.t0, self.t1 = intervals(self.times, k)
+        self.t = self.t0 + 0.01
+        self.pairs = list(zip(self.t0, self.t1))
+
+    def time_batch_abs_maxima_on(self, n, k):
+        d.abs_maxima_on(self.times, self.values, self.t0, self.t1)
+
+    def time_batch_iabs_maxima_on(self, n, k):
+        d.iabs_maxima_on(self.times, self.values, self.t0, self.t1)
+
+    def time_batch_imaxima_on(self, n, k):
+        d.imaxima_on(self.times, self.values, self.t0, self.t1)
+
+    def time_batch_iminima_on(self, n, k):
+        d.iminima_on(self.times, self.values, self.t0, self.t1)
+
+    def time_batch_indices_on(self, n, k):
+        d.indices_on(self.times, self.t0, self.t1)
+
+    def time_batch_maxima_on(self, n, k):
+        d.maxima_on(self.times, self.values, self.t0, self.t1)
+
+    def time_batch_means_on(self, n, k):
+        d.means_on(self.times, self.values, self.t0, self.t1)
+
+    def time_batch_minima_on(self, n, k):
+        d.minima_on(self.times, self.values, self.t0, self.t1)
+
+    def time_batch_value_at(self, n, k):
+        d.value_at(self.times, self.values, self.t0)
+
+    def time_batch_value_interpolated(self, n, k):
+        d.value_interpolated(self.times, self.values, self.t)
+
+    def time_batch_value_near(self, n, k):
+        d.value_near(self.times, self.values, self.t)
+
+    def time_scalar_imax_on(self, n, k):
+        for t0, t1 in self.pairs:
+            d.imax_on(self.times, self.values, t0, t1)
+
+    def time_scalar_index_on(self, n, k):
+        for t0, t1 in self.pairs:
+            d.index_on(self.times, t0, t1)
+
+    def time_scalar_max_on(self, n, k):
+        for t0, t1 in self.pairs:
+            d.max_on(self.times, self.values, t0, t1)
+
+    def time_scalar_mean_on(self, n, k):
+        for t0, t1 in self.pairs:
+            d.mean_on(self.times, self.values, t0, t1)
+
+    def time_scalar_value_interpolated(self, n, k):
+        for t in self.t:
+            d.value_interpolated(self.times, self.values, t)
+
+    def time_scalar_value_near(self, n, k):
+        for t in self.t:
+            d.value_near(self.times, self.values, t)
+
+
+@with_peakmem
+class Steps:
+    """
+    Benchmarks finding the segments of a noisy step protocol of ``n`` samples,
+    with a step every 1000 samples, and using them to analyse a signal.
+    """
+    params = [SIZES]
+    param_names = ['n']
+    timeout = 600
+
+    def setup(self, n):
+        self.times, self.values = signal(n)
+        self.protocol = np.where(np.arange(n) // 1000 % 2, 20.0, -80.0)
+        self.protocol += 0.01 * self.values
+
+    def time_index_steps(self, n):
+        d.index_steps(self.protocol, 1, 10)
+
+    def time_step_means(self, n):
+        t0, t1, v = d.time_steps(self.times, self.protocol, 1, 10)
+        d.means_on(self.times, self.values, t0, t1, include_right=True)
+
+    def time_time_steps(self, n):
+        d.time_steps(self.times, self.protocol, 1, 10)
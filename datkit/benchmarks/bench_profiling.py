@@ -0,0 +1,30 @@
+#
+# Benchmarks the overhead of profiling datkit calls.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import contextlib
+
+import datkit as d
+
+from .common import intervals, signal, with_peakmem
+
+
+@with_peakmem
+class Profiling:
+    """
+    Benchmarks 1000 scalar queries on a signal of 10000 samples, with and
+    without profiling.
+    """
+    params = [[False, True]]
+    param_names = ['profiling']
+
+    def setup(self, enabled):
+        self.times, self.values = signal(10000)
+        self.pairs = list(zip(*intervals(self.times, 1000)))
+
+    def time_scalar_mean_on(self, enabled):
+        with d.profiling() if enabled else contextlib.nullcontext():
+            for t0, t1 in self.pairs:
+                d.mean_on(self.times, self.values, t0, t1)
@@ -0,0 +1,101 @@
+#
+# Benchmarks the smoothing and downsampling methods.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import numpy as np
+
+import datkit as d
+
+from .common import SIZES, signal, with_peakmem
+
+
+@with_peakmem
+class Downsampling:
+    """ Benchmarks downsampling a signal of ``n`` samples. """
+    params = [SIZES]
+    param_names = ['n']
+    timeout = 600
+
+    def setup(self, n):
+        self.times, self.values = signal(n)
+        m = n >> 3
+        self.out = (np.empty(m), np.empty(m))
+        self.workspace = d.Workspace()
+
+    def time_haar_downsample(self, n):
+        d.haar_downsample(self.times, self.values, 3)
+
+    def time_haar_downsample_out(self, n):
+        d.haar_downsample(self.times, self.values, 3, out=self.out,
+                          workspace=self.workspace)
+
+    def time_haar_pyramid(self, n):
+        d.haar_pyramid(self.times, self.values)
+
+    def time_lttb_downsample(self, n):
+        d.lttb_downsample(self.times, self.values, 1000)
+
+    def time_minmax_downsample(self, n):
+        d.minmax_downsample(self.times, self.values, 1000)
+
+
+@with_peakmem
+class Smoothing:
+    """ Benchmarks smoothing a signal of ``n`` samples with a window ``w``. """
+    params = [SIZES, [5, 101, 1001, 10001]]
+    param_names = ['n', 'w']
+    timeout = 600
+
+    def setup(self, n, w):
+        if w >= n:
+            raise NotImplementedError('Window larger than signal.')
+        self.times, self.values = signal(n)
+        self.out = np.empty(n - w + 1)
+        self.workspace = d.Workspace()
+
+    def time_gaussian_smoothing(self, n, w):
+        d.gaussian_smoothing(self.times, self.values, w)
+
+    def time_gaussian_smoothing_out(self, n, w):
+        d.gaussian_smoothing(self.times, self.values, w, out=self.out,
+                             workspace=self.workspace)
+
+    def time_moving_average(self, n, w):
+        d.moving_average(self.times, self.values, w)
+
+    def time_moving_average_out(self, n, w):
+        d.moving_average(self.times, self.values, w, out=self.out)
+
+    def time_streaming_gaussian_smoothing(self, n, w):
+        f = d.StreamingGaussianSmoothing(w)
+        for i in range(0, n, 10000):
+            f.process(self.times[i:i + 10000], self.values[i:i + 10000])
+        f.flush()
+
+    def time_streaming_moving_average(self, n, w):
+        f = d.StreamingMovingAverage(w)
+        for i in range(0, n, 10000):
+            f.process(self.times[i:i + 10000], self.values[i:i + 10000])
+        f.flush()
+
+    def time_window_size(self, n, w):
+        d.window_size(self.times, t=w * 0.1)
+
+
+@with_peakmem
+class Threads:
+    """ Benchmarks smoothing with a pool of ``workers`` threads. """
+    params = [SIZES[3:], [1, 2, 4]]
+    param_names = ['n', 'workers']
+    timeout = 600
+
+    def setup(self, n, workers):
+        self.times, self.values = signal(n)
+
+    def time_gaussian_smoothing(self, n, workers):
+        d.gaussian_smoothing(self.times, self.values, 1001, workers=workers)
+
+    def time_moving_average(self, n, workers):
+        d.moving_average(self.times, self.values, 1001, workers=workers)
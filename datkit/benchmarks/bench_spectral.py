@@ -0,0 +1,48 @@
+#
+# Benchmarks the spectral analysis methods.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import numpy as np
+
+import datkit as d
+
+from .common import SIZES, signal, with_peakmem
+
+
+@with_peakmem
+class Spectra:
+    """ Benchmarks spectra of a signal of ``n`` samples. """
+    params = [SIZES]
+    param_names = ['n']
+    timeout = 600
+
+    def setup(self, n):
+        self.times, self.values = signal(n)
+        self.out = np.empty(n // 2)
+        self.workspace = d.Workspace()
+
+    def time_amplitude_spectrum(self, n):
+        d.amplitude_spectrum(self.times, self.values)
+
+    def time_amplitude_spectrum_fast(self, n):
+        d.amplitude_spectrum(
+            self.times[:n - 1], self.values[:n - 1], 'fast')
+
+    def time_amplitude_spectrum_out(self, n):
+        d.amplitude_spectrum(self.times, self.values, out=self.out,
+                             workspace=self.workspace)
+
+    def time_power_spectral_density(self, n):
+        d.power_spectral_density(self.times, self.values)
+
+    def time_power_spectral_density_out(self, n):
+        d.power_spectral_density(self.times, self.values, out=self.out,
+                                 workspace=self.workspace)
+
+    def time_welch_amplitude_spectrum(self, n):
+        d.welch_amplitude_spectrum(self.times, self.values)
+
+    def time_welch_power_spectral_density(self, n):
+        d.welch_power_spectral_density(self.times, self.values)
@@ -0,0 +1,84 @@
+#
+# Benchmarks queries on TimeSeries objects.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import datkit as d
+
+from .common import SIZES, intervals, signal, with_peakmem
+
+
+@with_peakmem
+class TimeSeriesQueries:
+    """
+    Benchmarks ``queries`` scalar or batch queries on a :class:`TimeSeries` of
+    ``n`` samples, with and without cached information.
+    """
+    params = [SIZES, [10, 1000, 100000]]
+    param_names = ['n', 'queries']
+    timeout = 600
+
+    def setup(self, n, k):
+        if k > n // 10:
+            raise NotImplementedError('Too many queries for this size.')
+        self.times, self.values = signal(n)
+        self.t0, self.t1 = intervals(self.times, k)
+        self.pairs = list(zip(self.t0, self.t1))
+
+        # Create a time series with all caches filled
+        self.series = d.TimeSeries(self.times, self.values)
+        self.series.means_on(self.t0, self.t1)
+        self.series.imaxima_on(self.t0, self.t1)
+
+    def time_batch_imaxima_on(self, n, k):
+        self.series.imaxima_on(self.t0, self.t1)
+
+    def time_batch_means_on(self, n, k):
+        self.series.means_on(self.t0, self.t1)
+
+    def time_cold_batch_means_on(self, n, k):
+        d.TimeSeries(self.times, self.values).means_on(self.t0, self.t1)
+
+    def time_scalar_imax_on(self, n, k):
+        for t0, t1 in self.pairs:
+            self.series.imax_on(t0, t1)
+
+    def time_scalar_mean_on(self, n, k):
+        for t0, t1 in self.pairs:
+            self.series.mean_on(t0, t1)
+
+
+@with_peakmem
+class Crossover:
+    """
+    Compares queries on intervals of ``w`` samples on a :class:`TimeSeries`
+    with cached sums, with the same queries using the datkit methods, for a
+    signal of 10^6 samples. The time to build the cache is measured with a
+    "cold" query.
+    """
+    params = [[10, 100, 1000, 10000, 100000, 1000000]]
+    param_names = ['w']
+
+    def setup(self, w):
+        self.times, self.values = signal(10**6)
+        self.t0 = self.times[0]
+        self.t1 = self.times[w - 1]
+        self.series = d.TimeSeries(self.times, self.values)
+        self.series.variance_on(self.t0, self.t1)
+
+    def time_cached_mean_on(self, w):
+        self.series.mean_on(self.t0, self.t1, include_right=True)
+
+    def time_cached_variance_on(self, w):
+        self.series.variance_on(self.t0, self.t1, include_right=True)
+
+    def time_cold_variance_on(self, w):
+        series = d.TimeSeries(self.times, self.values)
+        series.variance_on(self.t0, self.t1, include_right=True)
+
+    def time_direct_mean_on(self, w):
+        d.mean_on(self.times, self.values, self.t0, self.t1, True, True)
+
+    def time_direct_variance_on(self, w):
+        d.variance_on(self.times, self.values, self.t0, self.t1, True, True)
@@ -0,0 +1,47 @@
+#
+# Benchmarks methods on 2-d arrays with one trace per row.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import datkit as d
+
+from .common import SIZES, intervals, signal, with_peakmem
+
+
+@with_peakmem
+class Traces:
+    """
+    Compares processing ``traces`` rows of ``n`` samples at once with
+    processing them one at a time.
+    """
+    params = [SIZES[:4], [10, 100]]
+    param_names = ['n', 'traces']
+    timeout = 600
+
+    def setup(self, n, traces):
+        self.times, self.values = signal(n, traces)
+        self.t0, self.t1 = intervals(self.times, 100)
+
+    def time_gaussian_smoothing(self, n, traces):
+        d.gaussian_smoothing(self.times, self.values, 501)
+
+    def time_means_on(self, n, traces):
+        d.means_on(self.times, self.values, self.t0, self.t1)
+
+    def time_moving_average(self, n, traces):
+        d.moving_average(self.times, self.values, 101)
+
+    def time_power_spectral_density(self, n, traces):
+        d.power_spectral_density(self.times, self.values)
+
+    def time_rows_means_on(self, n, traces):
+        for row in self.values:
+            d.means_on(self.times, row, self.t0, self.t1)
+
+    def time_rows_moving_average(self, n, traces):
+        for row in self.values:
+            d.moving_average(self.times, row, 101)
+
+    def time_welch_power_spectral_density(self, n, traces):
+        d.welch_power_spectral_density(self.times, self.values)
@@ -0,0 +1,67 @@
+#
+# Test signals and settings shared by the benchmarks.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import functools
+import os
+
+import numpy as np
+
+
+#: Signal lengths used in the benchmarks
+SIZES = [10**3, 10**4, 10**5, 10**6, 10**7, 10**8]
+
+#: Benchmarks on signals with more samples than this are skipped. The default
+#: can be changed with the environment variable DATKIT_BENCHMARK_MAX_SIZE.
+max_size = int(float(os.environ.get('DATKIT_BENCHMARK_MAX_SIZE', '1e6')))
+
+
+def intervals(times, k):
+    """
+    Returns a tuple ``(t0, t1)`` of arrays with the start and end times of
+    ``k`` consecutive intervals that together cover ``times``.
+    """
+    edges = times[np.linspace(0, len(times) - 1, k + 1).astype(int)]
+    return edges[:-1], edges[1:]
+
+
+@functools.lru_cache(maxsize=2)
+def signal(n, traces=None):
+    """
+    Returns a tuple ``(times, values)`` containing a read-only test signal of
+    ``n`` regularly spaced samples: a sine wave with a period of 1000 samples,
+    plus normally distributed noise.
+
+    If ``traces`` is given, ``values`` has shape ``(traces, n)``.
+    """
+    skip_if_larger(n * (traces or 1))
+    times = np.arange(n) * 0.1
+    shape = (n, ) if traces is None else (traces, n)
+    values = np.random.default_rng(1).normal(0, 0.1, shape)
+    values += np.sin(times * (2 * np.pi / 100))
+    times.setflags(write=False)
+    values.setflags(write=False)
+    return times, values
+
+
+def skip_if_larger(n):
+    """
+    Raises a ``NotImplementedError``, which asv and the runner treat as a
+    skipped benchmark, if ``n`` is greater than :attr:`max_size`.
+    """
+    if n > max_size:
+        raise NotImplementedError(
+            f'Skipping size {n}, which exceeds the maximum {max_size}.')
+
+
+def with_peakmem(cls):
+    """
+    Class decorator that adds a ``peakmem_`` benchmark for every ``time_``
+    benchmark, so that asv records the peak memory use of each method.
+    """
+    for name in dir(cls):
+        if name.startswith('time_'):
+            setattr(cls, 'peakmem_' + name[5:], getattr(cls, name))
+    return cls
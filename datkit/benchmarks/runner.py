@@ -0,0 +1,209 @@
+#
+# Runs the benchmarks without asv, recording time and peak memory.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import argparse
+import functools
+import gc
+import importlib
+import inspect
+import itertools
+import json
+import os
+import pkgutil
+import re
+import subprocess
+import sys
+import timeit
+import tracemalloc
+
+from . import common
+
+
+# Script used to run ``timeraw_`` benchmarks in a new process
+_RAW = """
+import sys
+code = compile(sys.argv[2], '<benchmark>', 'exec')
+if sys.argv[1] == 'peakmem':
+    import tracemalloc
+    tracemalloc.start()
+    exec(code, {})
+    print(tracemalloc.get_traced_memory()[1])
+else:
+    import time
+    t = time.perf_counter()
+    exec(code, {})
+    print(time.perf_counter() - t)
+"""
+
+
+def discover(pattern=None):
+    """
+    Yields tuples ``(name, cls, method, params)`` for every combination of a
+    benchmark method and its parameters, where ``name`` is a unique name that
+    includes the parameter values.
+
+    If a regular expression ``pattern`` is given, only benchmarks whose name
+    contains a match are returned.
+    """
+    package = importlib.import_module(__package__)
+    for info in pkgutil.iter_modules(package.__path__):
+        if not info.name.startswith('bench_'):
+            continue
+        module = importlib.import_module(f'{__package__}.{info.name}')
+        for cname, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ != module.__name__:
+                continue
+            names = getattr(cls, 'param_names', [])
+            combinations = itertools.product(*getattr(cls, 'params', []))
+            for params in combinations:
+                suffix = ', '.join(f'{k}={v}' for k, v in zip(names, params))
+                for method in sorted(dir(cls)):
+                    if not method.startswith(('time_', 'timeraw_')):
+                        continue
+                    name = f'{info.name}.{cname}.{method}({suffix})'
+                    if pattern is None or re.search(pattern, name):
+                        yield name, cls, method, params
+
+
+def measure(cls, method, params, repeat=3, number=None):
+    """
+    Runs a single benchmark, and returns a tuple ``(time, peakmem)`` with the
+    fastest time per call (in seconds) and the peak memory allocated during a
+    call (in bytes), or ``None`` if the benchmark is skipped.
+
+    If ``number`` is not given, it is chosen so that each of the ``repeat``
+    measurements takes at least 0.2 seconds. Benchmarks starting with
+    ``timeraw_`` return code that is run once in a new process for each
+    measurement, as in asv.
+    """
+    bench = cls()
+    if method.startswith('timeraw_'):
+        return _measure_raw(getattr(bench, method)(*params), repeat)
+    try:
+        if hasattr(bench, 'setup'):
+            bench.setup(*params)
+    except NotImplementedError:
+        return None
+    try:
+        f = functools.partial(getattr(bench, method), *params)
+        gc.collect()
+
+        # The first call also warms up any caches
+        tracemalloc.start()
+        try:
+            f()
+            peakmem = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+        timer = timeit.Timer(f)
+        if number is None:
+            number = timer.autorange()[0]
+        time = min(timer.repeat(repeat, number)) / number
+    finally:
+        if hasattr(bench, 'teardown'):
+            bench.teardown(*params)
+    return time, peakmem
+
+
+def run(pattern=None, max_size=None, repeat=3, number=None, compare=None,
+        stream=None):
+    """
+    Runs all benchmarks matching ``pattern``, prints their time and peak
+    memory use to ``stream`` (by default ``sys.stdout``), and returns a list
+    of results that can be stored as JSON.
+
+    Signals with more than ``max_size`` samples are skipped (the default is
+    set in :attr:`common.max_size`). If a list of results from an earlier run
+    is given as ``compare``, the ratio of new and old times is printed too.
+    """
+    old = {r['name']: r['time'] for r in compare or []}
+    stream = sys.stdout if stream is None else stream
+    default, results = common.max_size, []
+    if max_size is not None:
+        common.max_size = int(max_size)
+    try:
+        for name, cls, method, params in discover(pattern):
+            r = measure(cls, method, params, repeat, number)
+            if r is None:
+                continue
+            results.append({'name': name, 'time': r[0], 'peakmem': r[1]})
+            line = f'{name:<72} {_format_time(r[0]):>10} {r[1] / 1e6:10.3f} MB'
+            if name in old:
+                line += f' {r[0] / old[name]:8.2f}x'
+            print(line, file=stream, flush=True)
+    finally:
+        common.max_size = default
+        common.signal.cache_clear()
+    return results
+
+
+def main(args=None):
+    """
+    Runs the benchmarks with command line arguments ``args`` (by default
+    ``sys.argv[1:]``).
+    """
+    parser = argparse.ArgumentParser(
+        prog='python -m datkit.benchmarks',
+        description='Runs the datkit benchmarks, recording the fastest time'
+                    ' per call and the peak memory allocated during a call.')
+    parser.add_argument(
+        'pattern', nargs='?',
+        help='Only run benchmarks whose name matches this regular expression,'
+             ' e.g. "Smoothing.*n=1000000".')
+    parser.add_argument(
+        '--max-size', type=float, default=common.max_size,
+        help='Skip signals with more samples than this (default: %(default)d'
+             ', or DATKIT_BENCHMARK_MAX_SIZE).')
+    parser.add_argument(
+        '--repeat', type=int, default=3,
+        help='The number of repeated measurements (default: %(default)d).')
+    parser.add_argument(
+        '--number', type=int,
+        help='The number of calls per measurement (default: enough calls to'
+             ' take at least 0.2 seconds).')
+    parser.add_argument(
+        '--save', metavar='FILE', help='Store the results as JSON.')
+    parser.add_argument(
+        '--compare', metavar='FILE',
+        help='Compare with results stored in an earlier run.')
+    args = parser.parse_args(args)
+
+    compare = None
+    if args.compare:
+        with open(args.compare) as f:
+            compare = json.load(f)
+    results = run(
+        args.pattern, args.max_size, args.repeat, args.number, compare)
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent=1)
+
+
+def _format_time(t):
+    """ Formats a time in seconds with an appropriate unit. """
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if t >= scale:
+            return f'{t / scale:.3f} {unit}'
+    return f'{t / 1e-9:.1f} ns'
+
+
+def _measure_raw(code, repeat):
+    """
+    Runs ``code`` in ``repeat + 1`` new processes, and returns the fastest
+    time and the peak memory allocated, as in :meth:`measure`.
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(p for p in sys.path if p)
+
+    def run(mode):
+        p = subprocess.run(
+            [sys.executable, '-c', _RAW, mode, code], env=env, check=True,
+            stdout=subprocess.PIPE, universal_newlines=True)
+        return float(p.stdout)
+
+    peakmem = int(run('peakmem'))
+    return min(run('time') for i in range(repeat)), peakmem
@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+#
+# Tests the benchmark suite.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import contextlib
+import inspect
+import io
+import json
+import os
+import tempfile
+
+import datkit as d
+import datkit.tests
+from datkit.benchmarks import runner
+
+
+class BenchmarksTest(datkit.tests.TestCase):
+    """ Tests the benchmarks in datkit.benchmarks. """
+
+    def test_discover(self):
+        # Every public method and class is used in a benchmark
+        classes = set(x[1] for x in runner.discover())
+        source = '\n'.join(inspect.getsource(cls) for cls in classes)
+        for name in dir(d):
+            if name.startswith('_') or name == 'Profile':
+                continue
+            if callable(getattr(d, name)):
+                self.assertTrue('d.' + name + '(' in source, name)
+
+        # Selecting benchmarks
+        names = [x[0] for x in runner.discover(r'Smoothing\.time_moving')]
+        self.assertIn('bench_smoothing.Smoothing.time_moving_average'
+                      '(n=1000, w=5)', names)
+        self.assertEqual(len(names), 2 * 6 * 4)
+
+    def test_run(self):
+        # All benchmarks run on small signals
+        stream = io.StringIO()
+        results = runner.run(max_size=1000, repeat=1, number=1, stream=stream)
+        self.assertEqual(len(stream.getvalue().splitlines()), len(results))
+        names = [r['name'] for r in results]
+        self.assertIn('bench_points.Queries.time_batch_means_on'
+                      '(n=1000, queries=10)', names)
+        self.assertNotIn('bench_points.Queries.time_batch_means_on'
+                         '(n=1000, queries=1000)', names)
+        self.assertNotIn('bench_smoothing.Smoothing.time_moving_average'
+                         '(n=10000, w=5)', names)
+        self.assertIn('bench_import.Import.timeraw_import_datkit()', names)
+        for r in results:
+            self.assertGreater(r['time'], 0)
+            self.assertGreaterEqual(r['peakmem'], 0)
+
+        # Comparing with a previous run
+        stream = io.StringIO()
+        results[0]['time'] = 1e9
+        runner.run(results[0]['name'].split('(')[0], 1000, 1, 1, results,
+                   stream)
+        self.assertRegex(stream.getvalue().splitlines()[0], r'0\.00x$')
+
+    def test_main(self):
+        # Run from the command line, saving and comparing results
+        with tempfile.TemporaryDirectory() as dirname:
+            path = os.path.join(dirname, 'results.json')
+            args = ['CheckTimes.time_is_increasing', '--max-size', '1e3',
+                    '--repeat', '1', '--number', '10']
+            stream = io.StringIO()
+            with contextlib.redirect_stdout(stream):
+                runner.main(args + ['--save', path])
+                runner.main(args + ['--compare', path])
+            with open(path) as f:
+                results = json.load(f)
+        self.assertEqual(len(results), 1)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].endswith('x'))
+
+        # Format of times
+        self.assertEqual(runner._format_time(2), '2.000 s')
+        self.assertEqual(runner._format_time(2e-3), '2.000 ms')
+        self.assertEqual(runner._format_time(2e-6), '2.000 us')
+        self.assertEqual(runner._format_time(2e-9), '2.0 ns')
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -14,6 +14,36 @@ import datkit.tests
 class CheckTimesTest(datkit.tests.TestCase):
     """ Tests methods from the hidden _check_times module. """
 
+    def test_first_irregularity(self):
+
+        x = np.linspace(0, 1, 101)
+        self.assertIsNone(d.first_irregularity(x))
+        x[50] += 0.001
+        self.assertEqual(d.first_irregularity(x), 49)
+        self.assertEqual(d.first_irregularity(x, reltol=0.2), None)
+        x = np.linspace(0, 2, 201)
+        x[130] = np.nan
+        self.assertEqual(d.first_irregularity(x), 129)
+        self.assertEqual(d.first_irregularity(x[::-1]), 0)
+        self.assertEqual(d.first_irregularity([0, 1, 2, 3, 5, 6]), 0)
+        self.assertEqual(d.first_irregularity([0, 1, 2, 3, 4, 6]), 0)
+        self.assertIsNone(d.first_irregularity([0, 2, 4, 6, 8]))
+        self.assertIsNone(d.first_irregularity([0, 2]))
+
+        # Long arrays, checked in chunks of increasing size
+        x = np.arange(10**6) * 0.5
+        self.assertIsNone(d.first_irregularity(x))
+        for i in (150, 1023, 1024, 1025, 3071, 3072, 654321, 10**6 - 2):
+            y = np.copy(x)
+            y[i + 1:] += 0.01
+            self.assertEqual(d.first_irregularity(y), i)
+
+        self.assertRaisesRegex(
+            ValueError, 'two values', d.first_irregularity, [0])
+
+        # Test if input is unchanged
+        self.assertUnchanged(d.first_irregularity, np.linspace(0, 1, 101))
+
     def test_is_increasing(self):
 
         x = np.linspace(0, 1, 101)
@@ -33,6 +63,12 @@ class CheckTimesTest(datkit.tests.TestCase):
         self.assertFalse(d.is_increasing(y))
         z = np.concatenate((np.arange(5), [-8, -6, -4], np.arange(10, 30)))
         self.assertFalse(d.is_increasing(z))
+        x = np.arange(10**6)
+        self.assertTrue(d.is_increasing(x))
+        for i in (1, 1023, 1024, 1025, 5000, 10**6 - 1):
+            y = np.copy(x)
+            y[i] = y[i - 1]
+            self.assertFalse(d.is_increasing(y))
 
         self.assertRaisesRegex(ValueError, 'two values', d.is_increasing, [])
         self.assertRaisesRegex(ValueError, 'two values', d.is_increasing, [0])
@@ -91,6 +127,63 @@ class CheckTimesTest(datkit.tests.TestCase):
         # Test if input is unchanged
         self.assertUnchanged(d.sampling_interval, np.linspace(0, 1, 10))
 
+    def test_sampling_interval_cache(self):
+        # Test caching of sampling intervals
+
+        cache = d._check_times._INTERVALS
+        cache.clear()
+
+        # Repeated calls on the same array use the cache
+        x = np.arange(1000) / 100
+        dt = d.sampling_interval(x)
+        self.assertEqual(len(cache), 1)
+        self.assertIs(d.sampling_interval(x), dt)
+        self.assertEqual(len(cache), 1)
+
+        # Lists and tuples are not cached, views are cached separately
+        self.assertEqual(d.sampling_interval(list(x)), dt)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(d.sampling_interval(x[10:]), dt)
+        self.assertEqual(len(cache), 2)
+
+        # Changes to the array are detected
+        x[:50] *= 2
+        self.assertEqual(d.sampling_interval(x), np.mean(np.diff(x[:100])))
+        x[150] = 100
+        self.assertIs(d.sampling_interval(x), d.sampling_interval(x))
+        y = np.arange(10.0)
+        self.assertEqual(d.sampling_interval(y), 1)
+        y[9] = 18
+        self.assertEqual(d.sampling_interval(y), 2)
+        y.dtype = np.int64
+        self.assertNotEqual(d.sampling_interval(y), 2)
+
+        # Entries for deleted arrays are not reused
+        cache.clear()
+        x = np.arange(10.0)
+        d.sampling_interval(x)
+        ref = cache[id(x)][0]
+        del x
+        self.assertIsNone(ref())
+        for i in range(10):
+            x = np.arange(10.0) * i
+            self.assertEqual(d.sampling_interval(x), i)
+
+        # The cache has a maximum size
+        n = d._check_times._INTERVALS_SIZE
+        xs = [np.arange(10.0) * i for i in range(n + 5)]
+        for i, x in enumerate(xs):
+            self.assertEqual(d.sampling_interval(x), i)
+        self.assertEqual(len(cache), n)
+        self.assertNotIn(id(xs[0]), cache)
+        self.assertIn(id(xs[-1]), cache)
+
+        # Invalid arrays are not cached
+        cache.clear()
+        self.assertRaisesRegex(
+            ValueError, 'two', d.sampling_interval, np.array([1.0]))
+        self.assertEqual(len(cache), 0)
+
 
 if __name__ == '__main__':
     import unittest
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+#
+# Tests processing large (memory-mapped) arrays in chunks.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import os
+import tempfile
+import tracemalloc
+
+import numpy as np
+
+import datkit as d
+import datkit.tests
+
+
+class ChunksTest(datkit.tests.TestCase):
+    """ Tests methods from the hidden _chunks module. """
+
+    def test_chunk_size(self):
+        size = d.chunk_size()
+        self.assertEqual(size, 2**20)
+        try:
+            d.set_chunk_size(10)
+            self.assertEqual(d.chunk_size(), 10)
+            self.assertEqual(list(d._chunks._chunks(25)),
+                             [(0, 10), (10, 20), (20, 25)])
+            self.assertEqual(list(d._chunks._chunks(20)), [(0, 10), (10, 20)])
+            self.assertEqual(list(d._chunks._chunks(0)), [])
+
+            # Results don't depend on chunk size
+            t = np.arange(95) * 0.1
+            v = np.sin(t)
+            self.assertTrue(d.is_increasing(t))
+            self.assertTrue(d.is_regularly_increasing(t))
+            t[10] = t[9]
+            self.assertFalse(d.is_increasing(t))
+            self.assertFalse(d.is_regularly_increasing(t))
+            i, j = d.index_crossings(v, 0.5)
+            d.set_chunk_size(2)
+            k, m = d.index_crossings(v, 0.5)
+            self.assertEqual(list(i), list(k))
+            self.assertEqual(list(j), list(m))
+            self.assertEqual(len(i), 4)
+
+            self.assertRaisesRegex(
+                ValueError, 'at least 2', d.set_chunk_size, 1)
+        finally:
+            d.set_chunk_size(size)
+        self.assertEqual(d.chunk_size(), size)
+
+    def test_memory_mapped(self):
+        # Tests that memory-mapped arrays that are larger than the chunk size
+        # are processed without creating copies.
+        size = d.chunk_size()
+        cap = 2 * 2**20     # Memory cap in bytes
+        n = 3 * 10**6       # Samples per file (24MB per file)
+        d.set_chunk_size(2**15)
+        with tempfile.TemporaryDirectory() as path:
+            try:
+                times = np.lib.format.open_memmap(
+                    os.path.join(path, 'times.npy'), mode='w+', shape=(n, ))
+                times[:] = np.arange(n) * 0.1
+                values = np.lib.format.open_memmap(
+                    os.path.join(path, 'values.npy'), mode='w+', shape=(n, ))
+                values[:] = np.sin(times * 0.01)
+                t, v = np.array(times), np.array(values)
+                self.assertGreater(times.nbytes, 4 * cap)
+
+                def peak(f, *args):
+                    # Returns the result and peak memory use of f(*args)
+                    tracemalloc.start()
+                    try:
+                        r = f(*args)
+                        return r, tracemalloc.get_traced_memory()[1]
+                    finally:
+                        tracemalloc.stop()
+
+                # Methods returning a small result
+                for f, args in (
+                        (d.sampling_interval, (times, )),
+                        (d.is_increasing, (times, )),
+                        (d.is_regularly_increasing, (times, )),
+                        (d.index_crossing, (values, 0.5)),
+                        (d.index_crossings, (values, 0.5)),
+                        (d.time_crossings, (times, values, 0.5)),
+                        (d.index_on, (times, 1000, 200000)),
+                        (d.mean_on, (times, values, 1000, 200000)),
+                        (d.max_on, (times, values, 1000, 200000)),
+                        (d.abs_max_on, (times, values, 1000, 200000)),
+                        (d.value_interpolated, (times, values, 12345.67)),
+                ):
+                    r, m = peak(f, *args)
+                    self.assertLess(m, cap, f.__name__)
+                    x = f(*[t if a is times else v if a is values else a
+                            for a in args])
+                    self.assertTrue(np.all(np.asarray(r) == np.asarray(x)),
+                                    f.__name__)
+
+                # Smoothing methods: output plus a bounded amount
+                for w in (5, 101, 2001):
+                    for f in (d.moving_average, d.gaussian_smoothing):
+                        (x, y), m = peak(f, times, values, w)
+                        self.assertLess(m, y.nbytes + cap)
+                        x2, y2 = f(t, v, w)
+                        self.assertTrue(np.all(x == x2))
+                        self.assertLess(np.max(np.abs(y - y2)), 1e-12)
+                del times, values
+            finally:
+                d.set_chunk_size(size)
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+#
+# Tests the lazy loading of datkit methods.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import os
+import subprocess
+import sys
+
+import datkit as d
+import datkit.tests
+
+
+class ImportsTest(datkit.tests.TestCase):
+    """ Tests the lazy loading of methods in the main module. """
+
+    def test_import(self):
+        # Importing datkit does not import NumPy or any submodules
+        code = '; '.join([
+            'import sys',
+            'import datkit as d',
+            'print(sorted(x for x in sys.modules if x.startswith("datkit.")))',
+            'print("numpy" in sys.modules)',
+            'd.max_on',
+            'print("numpy" in sys.modules, "datkit._points" in sys.modules)',
+        ])
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(p for p in sys.path if p)
+        p = subprocess.run(
+            [sys.executable, '-c', code], env=env, check=True,
+            stdout=subprocess.PIPE, universal_newlines=True)
+        self.assertEqual(p.stdout.splitlines(), [
+            "['datkit._datkit_version']", 'False', 'True True'])
+
+    def test_getattr(self):
+        # Public names are loaded from their submodules
+        self.assertIs(d.__getattr__('max_on'), d._points.max_on)
+        self.assertIs(d.__getattr__('TimeSeries'), d._time_series.TimeSeries)
+        self.assertIs(
+            d.__getattr__('_parallel'), sys.modules['datkit._parallel'])
+        self.assertRaisesRegex(
+            AttributeError, "no attribute 'foo'", d.__getattr__, 'foo')
+
+        # All public names are listed
+        self.assertEqual(len(d.__all__), len(set(d.__all__)))
+        for name in d.__all__:
+            self.assertIn(name, dir(d))
+            self.assertTrue(hasattr(d, name), name)
+        self.assertIn('__version__', dir(d))
+        self.assertNotIn('_MODULES', d.__all__)
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
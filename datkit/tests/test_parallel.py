@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+#
+# Tests the parallel processing methods.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import functools
+import pickle
+
+import numpy as np
+
+import datkit as d
+import datkit.tests
+
+
+def _pipeline(times, values, w=11):
+    """ Pipeline used in tests, must be defined at module level. """
+    if not d.is_regularly_increasing(times):
+        raise ValueError('Irregular sampling.')
+    x, y = d.moving_average(times, values, w)
+    return d.max_on(x, y), d.mean_on(times, values)
+
+
+def _writeable(times, values):
+    """ Checks if arrays are writeable. """
+    return times.flags.writeable or values.flags.writeable
+
+
+def _series(n):
+    """ Yields ``n`` time series, of which every fifth is irregular. """
+    for k in range(n):
+        t = np.arange(500 + 10 * k) * 0.5
+        if k % 5 == 3:
+            t[100] += 0.1
+        yield t, np.sin(t * (1 + k))
+
+
+class ParallelTest(datkit.tests.TestCase):
+    """ Tests methods from the hidden _parallel module. """
+
+    def test_parallel_map(self):
+
+        # Results are in order, and the same as in serial processing
+        expected = [d._parallel._call(_pipeline, t, v) for t, v in _series(12)]
+        for workers in (1, 2, 3):
+            results = d.parallel_map(_pipeline, _series(12), workers)
+            self.assertEqual(len(results), 12)
+            for k, (r, e) in enumerate(zip(results, expected)):
+                if k % 5 == 3:
+                    self.assertIsInstance(r, ValueError)
+                    self.assertIn('Irregular', str(r))
+                else:
+                    self.assertEqual(r, e)
+
+        # Partial functions, list input, and 2-d values
+        f = functools.partial(_pipeline, w=3)
+        t = np.arange(100) * 0.1
+        v = np.stack((np.sin(t), np.cos(t)))
+        results = d.parallel_map(f, [(t, v), (t, v[0])], 2)
+        self.assertEqual(results[0][1][1], np.mean(v[1]))
+        self.assertEqual(results[1][1], np.mean(v[0]))
+
+        # Arrays are read-only in workers
+        self.assertEqual(d.parallel_map(_writeable, [(t, v)], 2), [False])
+
+        # Input that cannot be shared or pickled results in an error
+        results = d.parallel_map(
+            _pipeline, [(t, [[1], [1, 2]]), (t, t)], workers=2)
+        self.assertIsInstance(results[0], ValueError)
+        self.assertEqual(results[1], _pipeline(t, t))
+        results = d.parallel_map(lambda t, v: 1, [(t, t)], workers=2)
+        self.assertIsInstance(results[0], Exception)
+
+        # Arrays of objects cannot be shared
+        results = d.parallel_map(_pipeline, [(t, np.array([None] * 100))], 2)
+        self.assertIn('objects', str(results[0]))
+
+        # Errors while reading the input are raised after cleaning up
+        def series():
+            yield from _series(8)
+            raise IOError('Unable to read.')
+
+        self.assertRaisesRegex(
+            IOError, 'Unable to read', d.parallel_map, _pipeline, series(), 2)
+
+        # Empty input, or one worker per CPU
+        self.assertEqual(d.parallel_map(_pipeline, []), [])
+        self.assertEqual(d.parallel_map(_pipeline, _series(2)),
+                         [_pipeline(t, v) for t, v in _series(2)])
+
+        # Wrong arguments
+        self.assertRaisesRegex(
+            ValueError, 'at least 1', d.parallel_map, _pipeline, [], 0)
+
+    def test_run(self):
+        # Test the worker method in this process
+
+        def run(function, *arrays):
+            blocks, specs = d._parallel._share(*arrays)
+            try:
+                return pickle.loads(d._parallel._run(function, *specs))
+            finally:
+                d._parallel._release(blocks)
+
+        t = np.arange(100) * 0.1
+        v = np.sin(t)
+        self.assertEqual(run(_pipeline, t, v), _pipeline(t, v))
+        self.assertEqual(run(_writeable, t, v), False)
+        e = run(_pipeline, t[::-1], v)
+        self.assertIsInstance(e, ValueError)
+        self.assertIsNone(e.__traceback__)
+        e = run(lambda t, v: lambda: 1, t, v)
+        self.assertIsInstance(e, RuntimeError)
+        self.assertIn('Unable to pickle', str(e))
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -24,10 +24,31 @@ class PointsTest(datkit.tests.TestCase):
         self.assertEqual(d.abs_max_on(t, v, 1.5, 2), (t[99], v[99]))
         self.assertEqual(d.abs_max_on(t, v, 1.5, 2, False, True), (2, 1))
 
+        # Multiple traces
+        x, y = d.abs_max_on(t, np.stack((v, -v, 0.5 * v)), 0.5, 1)
+        self.assertEqual(list(x), [t[49]] * 3)
+        self.assertEqual(list(y), [v[49], -v[49], 0.5 * v[49]])
+
         t = np.linspace(0, 2, 101)
         v = np.cos(t * np.pi)
         self.assertUnchanged(d.abs_max_on, t, v)
 
+    def test_abs_maxima_on(self):
+        t = np.linspace(0, 2, 101)
+        v = np.cos(t * np.pi)
+        x, y = d.abs_maxima_on(t, v, [0, 0.5, 0.6, 1.5], [1, 1, 1.5, 2])
+        self.assertEqual(list(x), [0, t[49], 1, t[99]])
+        self.assertEqual(list(y), [1, v[49], -1, v[99]])
+        x, y = d.abs_maxima_on(t, v, [0.5, 1.5], [1, 2], False, True)
+        self.assertEqual(list(x), [1, 2])
+        self.assertEqual(list(y), [-1, 1])
+        self.assertRaisesRegex(
+            ValueError, 'Interval 1', d.abs_maxima_on, t, v, [0, 3], [1, 4])
+
+        t = np.linspace(0, 2, 101)
+        v = np.cos(t * np.pi)
+        self.assertUnchanged(d.abs_maxima_on, t, v, [0, 1], [1, 2])
+
     def test_data_on(self):
         t = [0, 1, 2, 3, 4, 5, 6, 7]
         v = [10, 11, 12, 13, 14, 15, 16, 17]
@@ -37,6 +58,11 @@ class PointsTest(datkit.tests.TestCase):
         self.assertEqual(d.data_on(t, v, t1=2, include_right=True),
                          ([0, 1, 2], [10, 11, 12]))
 
+        # Multiple traces
+        x, y = d.data_on(t, [v, v[::-1]], 3, 5)
+        self.assertEqual(x, [3, 4])
+        self.assertTrue(np.all(y == [[13, 14], [14, 13]]))
+
         t = [0, 1, 2, 3, 4, 5, 6, 7]
         v = [10, 11, 12, 13, 14, 15, 16, 17]
         self.assertUnchanged(d.data_on, t, v)
@@ -55,6 +81,42 @@ class PointsTest(datkit.tests.TestCase):
         v = np.sin(t * np.pi)
         self.assertUnchanged(d.iabs_max_on, t, v)
 
+    def test_iabs_maxima_on(self):
+        t = np.linspace(0, 2, 101)
+        v = np.cos(t * np.pi)
+        t0 = [0, 0.5, 0.5, 0.6, 1.5]
+        t1 = [1, 1, 1, 1.5, 2]
+        self.assertEqual(list(d.iabs_maxima_on(t, v, t0, t1)),
+                         [0, 49, 49, 50, 99])
+        self.assertEqual(list(d.iabs_maxima_on(t, v, t0, t1, False, True)),
+                         [50, 50, 50, 50, 100])
+
+        # Long intervals on a long array
+        r = np.random.default_rng(1)
+        t = np.arange(10000)
+        v = np.round(r.normal(0, 2, t.shape))
+        t0 = r.integers(0, 5000, 50)
+        t1 = t0 + r.integers(1, 5000, 50)
+        self.assertEqual(list(d.iabs_maxima_on(t, v, t0, t1)),
+                         [d.iabs_max_on(t, v, a, b) for a, b in zip(t0, t1)])
+
+        # Multiple traces
+        v = np.round(r.normal(0, 2, (3, len(t))))
+        v[1, 7000] = np.nan
+        i = d.iabs_maxima_on(t, v, t0, t1)
+        self.assertEqual(i.shape, (3, 50))
+        for k in range(3):
+            self.assertTrue(np.all(i[k] == d.iabs_maxima_on(t, v[k], t0, t1)))
+        i = d.iabs_maxima_on(t, v, t0[:2], t1[:2])
+        self.assertEqual(i.shape, (3, 2))
+        for k in range(3):
+            self.assertTrue(
+                np.all(i[k] == d.iabs_maxima_on(t, v[k], t0[:2], t1[:2])))
+
+        t = np.linspace(0, 2, 30)
+        v = np.sin(t * np.pi)
+        self.assertUnchanged(d.iabs_maxima_on, t, v, [0, 1], [1, 2])
+
     def test_imax_on(self):
         t = np.linspace(0, 2, 101)
         v = np.cos(t * np.pi)
@@ -68,6 +130,43 @@ class PointsTest(datkit.tests.TestCase):
         v = np.cos(t * np.pi + 3)
         self.assertUnchanged(d.imax_on, t, v)
 
+    def test_imaxima_on(self):
+        t = np.linspace(0, 2, 101)
+        v = np.cos(t * np.pi)
+        self.assertEqual(
+            list(d.imaxima_on(t, v, [0, 0.5, 0.6, 1.5], [1, 1, 1.5, 2])),
+            [0, 25, 74, 99])
+        self.assertEqual(list(d.imaxima_on(t, v, 1.5, 2, False, True)), [100])
+        self.assertEqual(list(d.imaxima_on(t, v)), [0])
+
+        # First occurrence is returned, or first nan
+        t = np.arange(8)
+        v = np.array([1, 3, 3, 2, 3, np.nan, 1, np.nan])
+        self.assertEqual(list(d.imaxima_on(t, v, [0, 2, 3, 6], [5, 5, 8, 8])),
+                         [1, 2, 5, 7])
+
+        # Long intervals on a long array
+        r = np.random.default_rng(1)
+        t = np.arange(10000)
+        v = np.round(r.normal(0, 2, t.shape))
+        t0 = r.integers(0, 5000, 50)
+        t1 = t0 + r.integers(1, 5000, 50)
+        self.assertEqual(list(d.imaxima_on(t, v, t0, t1)),
+                         [d.imax_on(t, v, a, b) for a, b in zip(t0, t1)])
+
+        # Empty intervals
+        self.assertRaisesRegex(
+            ValueError, 'Interval 2', d.imaxima_on, t, v, [1, 2, 3], [2, 3, 3])
+
+        # No intervals
+        self.assertEqual(d.imaxima_on(t, v, [], []).shape, (0, ))
+        self.assertEqual(
+            d.imaxima_on(t, np.stack((v, v)), [], []).shape, (2, 0))
+
+        t = np.linspace(0, 2, 31)
+        v = np.cos(t * np.pi + 3)
+        self.assertUnchanged(d.imaxima_on, t, v, [0, 1], [1, 2])
+
     def test_imin_on(self):
         t = np.linspace(0, 2, 101)
         v = np.cos(t * np.pi)
@@ -81,6 +180,27 @@ class PointsTest(datkit.tests.TestCase):
         v = np.cos(t * 2 * np.pi)
         self.assertUnchanged(d.imin_on, t, v)
 
+    def test_iminima_on(self):
+        t = np.linspace(0, 2, 101)
+        v = np.cos(t * np.pi)
+        self.assertEqual(
+            list(d.iminima_on(t, v, [0, 0.5, 0.5, 1.5], [1, 2, 1.5, 2])),
+            [49, 50, 50, 75])
+        self.assertEqual(list(d.iminima_on(t, v, 1.5, 2, False)), [76])
+
+        # Long intervals on a long array
+        r = np.random.default_rng(1)
+        t = np.arange(10000)
+        v = np.round(r.normal(0, 2, t.shape))
+        t0 = r.integers(0, 5000, 50)
+        t1 = t0 + r.integers(1, 5000, 50)
+        self.assertEqual(list(d.iminima_on(t, v, t0, t1)),
+                         [d.imin_on(t, v, a, b) for a, b in zip(t0, t1)])
+
+        t = np.linspace(0, 3, 13)
+        v = np.cos(t * 2 * np.pi)
+        self.assertUnchanged(d.iminima_on, t, v, [0, 1], [1, 2])
+
     def test_index(self):
 
         # Simple tests
@@ -146,6 +266,37 @@ class PointsTest(datkit.tests.TestCase):
         # Any sequence is accepted
         self.assertEqual(d.index(tuple(times), 7.3), 49)
 
+        # Arrays of times
+        times = np.linspace(0, 1, 101)
+        i = d.index(times, [0.5, 0.01 + 1e-10, 1, -1e-10, 0, 0.03])
+        self.assertIsInstance(i, np.ndarray)
+        self.assertEqual(list(i), [50, 1, 100, 0, 0, 3])
+        self.assertEqual(list(d.index(times, [])), [])
+        self.assertEqual(d.index(times, [[0.1, 0.2], [0.3, 0.4]]).shape,
+                         (2, 2))
+        with self.assertRaisesRegex(ValueError, 't=0.015 is not present'):
+            d.index(times, [0.01, 0.015, 0.017])
+        with self.assertRaisesRegex(ValueError, '-0.01 < 0.0'):
+            d.index(times, [0.1, -0.01])
+        with self.assertRaisesRegex(ValueError, '2.0 > 1.0'):
+            d.index(times, [2, 0.1])
+
+        # Regular lookups
+        times = 0.1 * (-25 + np.arange(0, 100, 2))
+        for t in (-2.5, -2.5 - 9e-10, 7.3, 7.3 + 9e-10, 0.1, 4.1 + 1e-10):
+            self.assertEqual(
+                d.index(times, t, regular=True), d.index(times, t))
+        self.assertRaisesRegex(
+            ValueError, 'not present', d.index, times, 0.2, regular=True)
+        self.assertRaisesRegex(
+            ValueError, 'range', d.index, times, 7.3 + 2e-9, regular=True)
+        t = times[::3] + 1e-10
+        self.assertEqual(list(d.index(times, t, regular=True)),
+                         list(d.index(times, t)))
+        times = np.arange(0, 10)
+        self.assertEqual(list(d.index(times, [9, 0, 4], regular=True)),
+                         [9, 0, 4])
+
         # Input is unchanged
         self.assertUnchanged(d.index, np.arange(0, 10), 3)
         self.assertUnchanged(d.index, np.arange(0, 10), 0)
@@ -184,14 +335,95 @@ class PointsTest(datkit.tests.TestCase):
         values = [3, 3, 3, 4, 5, 4, 3, 2, 1, 2, 3, 3, 3]
         self.assertEqual(d.index_crossing(values, 3), (5, 7))
 
+        # Values must be 1-d
+        values = np.array([[1, 2, 3], [3, 2, 1]])
+        self.assertRaisesRegex(
+            ValueError, '1-d array', d.index_crossing, values, 2.5)
+        self.assertRaisesRegex(
+            ValueError, '1-d array', d.index_crossing, 3)
+
         # Annoying case 2: being flat at the selected value
         values = [9, 9, 8, 7, 6, 5, 5, 5, 5, 4, 3, 2, 2]
         self.assertEqual(d.index_crossing(values, 5), (4, 9))
 
+        # Long arrays, scanned in chunks
+        values = np.zeros(300000)
+        values[100000:] = 1
+        self.assertEqual(d.index_crossing(values, 0.5), (99999, 100000))
+        self.assertEqual(d.index_crossing(values[::-1], 0.5),
+                         (199999, 200000))
+        values[5] = -1
+        self.assertEqual(d.index_crossing(values), (5, 100000))
+        values[[7, 30000]] = np.nan
+        self.assertEqual(d.index_crossing(values), (5, 100000))
+
         # Input is unchanged
         values = [4, 5, 6, 7, 8, 6, 7, 8, 9]
         self.assertUnchanged(d.index_crossing, values, 6.5)
 
+    def test_index_crossings(self):
+
+        # Simple tests
+        values = [4, 5, 6, 7, 8, 6, 7, 8, 9]
+        i, j = d.index_crossings(values, 6.5)
+        self.assertEqual(list(i), [2, 4, 5])
+        self.assertEqual(list(j), [3, 5, 6])
+        i, j = d.index_crossings(values, 6.5, direction=1)
+        self.assertEqual(list(i), [2, 5])
+        self.assertEqual(list(j), [3, 6])
+        i, j = d.index_crossings(values, 6.5, direction=-1)
+        self.assertEqual(list(i), [4])
+        self.assertEqual(list(j), [5])
+        i, j = d.index_crossings(values, 1)
+        self.assertEqual(len(i), 0)
+        self.assertEqual(len(j), 0)
+        i, j = d.index_crossings([], 1)
+        self.assertEqual(len(i), 0)
+        self.assertRaisesRegex(
+            ValueError, '1-d array', d.index_crossings, [values, values])
+
+        # Points at the value are skipped, as in index_crossing
+        values = [3, 3, 3, 4, 5, 4, 3, 2, 1, 2, 3, 3, 3, 4, 3]
+        i, j = d.index_crossings(values, 3)
+        self.assertEqual(list(i), [5, 9])
+        self.assertEqual(list(j), [7, 13])
+        values = [9, 9, 8, 7, 6, 5, 5, 5, 5, 4, 3, 2, 2]
+        i, j = d.index_crossings(values, 5)
+        self.assertEqual((i[0], j[0]), d.index_crossing(values, 5))
+
+        # First crossing agrees with index_crossing
+        values = np.sin(np.linspace(0, 20, 1000))
+        i, j = d.index_crossings(values, 0.3)
+        self.assertEqual(len(i), 7)
+        self.assertEqual((i[0], j[0]), d.index_crossing(values, 0.3))
+        self.assertTrue(np.all(values[i] * values[j] < 0.3))
+
+        # Hysteresis
+        values = [0, 2, 0.9, 1.1, 0.9, 1.1, 0.9, 0, 2]
+        i, j = d.index_crossings(values, 1)
+        self.assertEqual(len(i), 7)
+        i, j = d.index_crossings(values, 1, hysteresis=0.5)
+        self.assertEqual(list(i), [0, 1, 7])
+        self.assertEqual(list(j), [1, 7, 8])
+        i, j = d.index_crossings(values, 1, hysteresis=5)
+        self.assertEqual(len(i), 0)
+        self.assertRaisesRegex(ValueError, 'negative', d.index_crossings,
+                               values, 1, hysteresis=-1)
+
+        # Minimum separation
+        values = [0, 1, 0, 1, 0, 0, 0, 1, 0, 1]
+        i, j = d.index_crossings(values, 0.5, direction=1)
+        self.assertEqual(list(j), [1, 3, 7, 9])
+        i, j = d.index_crossings(values, 0.5, direction=1, min_separation=3)
+        self.assertEqual(list(i), [0, 6])
+        self.assertEqual(list(j), [1, 7])
+        i, j = d.index_crossings(values, 0.5, direction=1, min_separation=2)
+        self.assertEqual(list(j), [1, 3, 7, 9])
+
+        # Input is unchanged
+        values = [4, 5, 6, 7, 8, 6, 7, 8, 9]
+        self.assertUnchanged(d.index_crossings, values, 6.5)
+
     def test_index_near(self):
 
         # Exact matches
@@ -219,6 +451,34 @@ class PointsTest(datkit.tests.TestCase):
         self.assertEqual(d.index_near(tuple(times), 9.6), 19)
         self.assertEqual(d.index_near(list(times), 9.6), 19)
 
+        # Arrays of times
+        t = [-0.1, -0.24999, 9.6, 9.7499, 2.1, 3.5, 3.25, 3.2501]
+        i = d.index_near(times, t)
+        self.assertIsInstance(i, np.ndarray)
+        self.assertEqual(list(i), [0, 0, 19, 19, 4, 7, 6, 7])
+        self.assertEqual(list(d.index_near(times, [])), [])
+        self.assertRaisesRegex(
+            ValueError, 'range', d.index_near, times, [1, -0.251])
+        self.assertRaisesRegex(
+            ValueError, 'range', d.index_near, times, [9.751, 2])
+
+        # Regular lookups
+        for x in t:
+            self.assertEqual(d.index_near(times, x, regular=True),
+                             d.index_near(times, x))
+        self.assertEqual(list(d.index_near(times, t, regular=True)), list(i))
+        self.assertRaisesRegex(
+            ValueError, 'range', d.index_near, times, -0.251, regular=True)
+
+        # Regular lookups on irregular data are slower, but still correct
+        times = np.array([0, 1, 2, 3, 10, 11, 12, 13, 13.5, 14])
+        t = [0.4, 2.7, 3.1, 6.6, 6.4, 12.7, 13.4, 13.8, 14.1]
+        self.assertEqual(list(d.index_near(times, t, regular=True)),
+                         list(d.index_near(times, t)))
+        for x in t:
+            self.assertEqual(d.index_near(times, x, regular=True),
+                             d.index_near(times, x))
+
         # Input should remain unchanged
         self.assertUnchanged(d.index_near, np.arange(0, 10), 4)
         self.assertUnchanged(d.index_near, np.arange(0, 10), 9)
@@ -294,6 +554,126 @@ class PointsTest(datkit.tests.TestCase):
         self.assertUnchanged(d.index_on, np.arange(0, 10), -5, 4)
         self.assertUnchanged(d.index_on, np.arange(0, 10), 12, 14)
 
+    def test_index_steps(self):
+
+        # Simple tests
+        values = [1, 1, 1, 5, 5, 2, 2, 2, 2]
+        i, j, v = d.index_steps(values)
+        self.assertEqual(list(i), [0, 3, 5])
+        self.assertEqual(list(j), [3, 5, 9])
+        self.assertEqual(list(v), [1, 5, 2])
+        self.assertEqual(v.dtype, float)
+        i, j, v = d.index_steps(values, min_length=3)
+        self.assertEqual(list(i), [0, 5])
+        self.assertEqual(list(j), [3, 9])
+        self.assertEqual(list(v), [1, 2])
+        i, j, v = d.index_steps(values, min_length=5)
+        self.assertEqual((len(i), len(j), len(v)), (0, 0, 0))
+        i, j, v = d.index_steps(values, tolerance=4)
+        self.assertEqual(list(i), [0])
+        self.assertEqual(list(j), [9])
+        self.assertAlmostEqual(v[0], 21 / 9)
+        i, j, v = d.index_steps([3])
+        self.assertEqual((list(i), list(j), list(v)), ([0], [1], [3]))
+        i, j, v = d.index_steps([])
+        self.assertEqual((len(i), len(j), len(v)), (0, 0, 0))
+
+        # Unsigned integers
+        i, j, v = d.index_steps(np.array([3, 0, 0, 3], dtype=np.uint8))
+        self.assertEqual(list(i), [0, 1, 3])
+        self.assertEqual(list(v), [3, 0, 3])
+
+        # Noisy protocol with ramps and transients
+        r = np.random.default_rng(1)
+        levels = [-80, -120, 20, -80]
+        values = np.concatenate([
+            np.repeat(levels, [500, 300, 400, 200]).astype(float),
+            np.linspace(-70, 40, 100)])
+        values[[800, 801, 1200]] = [60, -30, 40]
+        values += r.normal(0, 0.1, values.shape)
+        i, j, v = d.index_steps(values, 1, 10)
+        self.assertEqual(list(i), [0, 500, 802, 1201])
+        self.assertEqual(list(j), [500, 800, 1200, 1400])
+        self.assertTrue(np.allclose(v, levels, atol=0.1))
+        self.assertTrue(np.all(
+            v == d.means_on(np.arange(len(values)), values, i, j)))
+
+        # Results don't depend on chunk size
+        size = d.chunk_size()
+        try:
+            for n in (2, 3, 7, 100):
+                d.set_chunk_size(n)
+                x, y, w = d.index_steps(values, 1, 10)
+                self.assertTrue(np.all(x == i) and np.all(y == j))
+                self.assertTrue(np.all(w == v))
+        finally:
+            d.set_chunk_size(size)
+
+        # Wrong arguments
+        self.assertRaisesRegex(
+            ValueError, 'negative', d.index_steps, values, -1)
+        self.assertRaisesRegex(
+            ValueError, '1-d', d.index_steps, [[1, 2], [3, 4]])
+
+        # Input is unchanged
+        self.assertUnchanged(d.index_steps, [1, 1, 1, 5, 5, 2, 2, 2, 2])
+
+    def test_indices_on(self):
+        t = np.arange(0, 10)
+        t0 = [2, 2, 0.1, -5, -9, 12, 4, 3]
+        t1 = [4, 4.1, 5, 4, -3, 18, 4, 8]
+        for left in (True, False):
+            for right in (True, False):
+                i, j = d.indices_on(t, t0, t1, left, right)
+                self.assertEqual(
+                    list(zip(i, j)),
+                    [d.index_on(t, a, b, left, right) for a, b in zip(t0, t1)])
+
+        # Scalars are broadcast
+        i, j = d.indices_on(t, [1, 2, 3], 5)
+        self.assertEqual(list(i), [1, 2, 3])
+        self.assertEqual(list(j), [5, 5, 5])
+        i, j = d.indices_on(t, 3, 8)
+        self.assertEqual(list(i), [3])
+        self.assertEqual(list(j), [8])
+
+        # Values not specified
+        t = np.arange(0, 20, 2)
+        i, j = d.indices_on(t, t1=[4, 10])
+        self.assertEqual(list(i), [0, 0])
+        self.assertEqual(list(j), [2, 5])
+        i, j = d.indices_on(t, [4, 10])
+        self.assertEqual(list(i), [2, 5])
+        self.assertEqual(list(j), [10, 10])
+
+        # Regular lookups
+        t = np.linspace(0, 2, 101)
+        t0 = [0.5, 0, -1, 0.501, 1, 3, -2]
+        t1 = [1, 2, 3, 1.999, 1, 4, -1]
+        i, j = d.indices_on(t, t0, t1, False, True)
+        x, y = d.indices_on(t, t0, t1, False, True, regular=True)
+        self.assertEqual(list(i), list(x))
+        self.assertEqual(list(j), list(y))
+
+        # Duplicate times
+        t = [0, 1, 1, 1, 2, 3]
+        i, j = d.indices_on(t, [1, 1], [1, 2], False, True)
+        self.assertEqual(list(i), [2, 2])
+        self.assertEqual(list(j), [2, 5])
+
+        # Wrong arguments
+        self.assertRaisesRegex(
+            ValueError, 'at least one', d.indices_on, [], [2], [4])
+        self.assertRaisesRegex(
+            ValueError, 'greater than', d.indices_on, t, [1, 3], [2, 2])
+        self.assertRaisesRegex(
+            ValueError, '1-d', d.indices_on, t, [[1, 2]], [[3, 4]])
+        self.assertRaisesRegex(
+            ValueError, 'shape', d.indices_on, t, [1, 2], [3, 4, 5])
+
+        # Input should stay unchanged
+        self.assertUnchanged(d.indices_on, np.arange(0, 10), [2, 3], [4, 5])
+
     def test_max_on(self):
         t = np.linspace(0, 2, 101)
         v = np.cos(t * np.pi)
@@ -307,6 +687,25 @@ class PointsTest(datkit.tests.TestCase):
         v = np.sin(3 * t * np.pi)
         self.assertUnchanged(d.max_on, t, v)
 
+    def test_maxima_on(self):
+        t = np.linspace(0, 2, 101)
+        v = np.cos(t * np.pi)
+        x, y = d.maxima_on(t, v, [0, 0.5, 0.6, 1.5], [1, 1, 1.5, 2])
+        self.assertEqual(list(x), [0, t[25], t[74], t[99]])
+        self.assertEqual(list(y), [1, v[25], v[74], v[99]])
+        x, y = d.maxima_on(t, v, 1.5, 2, False, True)
+        self.assertEqual(list(x), [t[100]])
+        self.assertEqual(list(y), [v[100]])
+
+        # Multiple traces
+        x, y = d.maxima_on(t, [v, -v], [0, 0.6], [1, 1.5])
+        self.assertTrue(np.all(x == [[0, t[74]], [t[49], t[50]]]))
+        self.assertTrue(np.all(y == [[1, v[74]], [-v[49], -v[50]]]))
+
+        t = np.linspace(0, 1, 11)
+        v = np.sin(3 * t * np.pi)
+        self.assertUnchanged(d.maxima_on, t, v, [0, 0.5], [0.5, 1])
+
     def test_mean_on(self):
         t = np.arange(1, 11)
         self.assertEqual(d.mean_on(t, t, 1, 11), 5.5)
@@ -319,10 +718,50 @@ class PointsTest(datkit.tests.TestCase):
         self.assertEqual(d.mean_on(t, v, 4, 8, False), 37)
         self.assertEqual(d.mean_on(t, v, 4, 8, True, True), 37)
 
+        # Multiple traces
+        self.assertEqual(list(d.mean_on(t, [t, v], 4, 8)), [5.5, 41])
+        self.assertEqual(d.mean_on(t, np.ones((2, 3, 10)), 4, 8).shape, (2, 3))
+
         t = np.arange(1, 11)
         v = -3 + 8 * t[::-1]
         self.assertUnchanged(d.mean_on, t, v, 2, 7)
 
+    def test_means_on(self):
+        t = np.arange(1, 11)
+        self.assertEqual(list(d.means_on(t, t, [1, 4], [11, 8])), [5.5, 5.5])
+        self.assertEqual(list(d.means_on(t, t, [4, 2], [8, 10], False)),
+                         [6, 6])
+        self.assertEqual(list(d.means_on(t, t, 4, 8, True, True)), [6])
+        v = -3 + 8 * t[::-1]
+        self.assertEqual(list(d.means_on(t, v, [1, 4], [11, 8])), [41, 41])
+        self.assertEqual(list(d.means_on(t, v, [4, 2], [8, 10], False)),
+                         [37, 37])
+        self.assertEqual(list(d.means_on(t, v)), [41])
+
+        # Overlapping intervals, and intervals including the last point
+        r = np.random.default_rng(1)
+        v = r.normal(0, 1, t.shape)
+        t0 = [1, 2, 3, 9, 10, 10]
+        t1 = [11, 10, 4, 11, 11, 15]
+        m = d.means_on(t, v, t0, t1)
+        for k, (a, b) in enumerate(zip(t0, t1)):
+            self.assertAlmostEqual(m[k], d.mean_on(t, v, a, b))
+
+        # Empty intervals
+        m = d.means_on(t, v, [1, 2, 3, 11], [1, 3, 3, 12])
+        self.assertTrue(np.isnan(m[0]))
+        self.assertEqual(m[1], v[1])
+        self.assertTrue(np.isnan(m[2]))
+        self.assertTrue(np.isnan(m[3]))
+
+        # Multiple traces
+        m = d.means_on(t, [t, -3 + 8 * t[::-1]], [1, 4, 10], [11, 8, 11])
+        self.assertTrue(np.all(m == [[5.5, 5.5, 10], [41, 41, 5]]))
+
+        t = np.arange(1, 11)
+        v = -3 + 8 * t[::-1]
+        self.assertUnchanged(d.means_on, t, v, [2, 3], [7, 8])
+
     def test_min_on(self):
         t = np.linspace(0, 2, 101)
         v = np.cos(t * np.pi)
@@ -336,6 +775,95 @@ class PointsTest(datkit.tests.TestCase):
         v = np.cos(t * np.pi)
         self.assertUnchanged(d.min_on, t, v, 1.5, 2, False)
 
+    def test_minima_on(self):
+        t = np.linspace(0, 2, 101)
+        v = np.cos(t * np.pi)
+        x, y = d.minima_on(t, v, [0, 0.5, 0.5, 1.5], [1, 2, 1.5, 2])
+        self.assertEqual(list(x), [t[49], t[50], t[50], t[75]])
+        self.assertEqual(list(y), [v[49], v[50], v[50], v[75]])
+        x, y = d.minima_on(t, v, 1.5, 2, False)
+        self.assertEqual(list(x), [t[76]])
+        self.assertEqual(list(y), [v[76]])
+
+        t = np.linspace(0, 2, 101)
+        v = np.cos(t * np.pi)
+        self.assertUnchanged(d.minima_on, t, v, [0, 1.5], 2, False)
+
+    def test_searchsorted(self):
+        # Test arithmetic lookups, used for large numbers of queries
+        from datkit._points import _ARITHMETIC_QUERIES as n, _searchsorted
+
+        times = np.arange(10**5) * 0.1
+        dt = d.sampling_interval(times)
+        r = np.random.default_rng(1)
+        t = np.concatenate((times[::100], r.uniform(-5, 1e4 + 5, n)))
+        i = np.searchsorted(times, t)
+        self.assertTrue(np.all(_searchsorted(times, t, dt) == i))
+        self.assertTrue(np.all(_searchsorted(times, t, dt * 1.01) == i))
+        for f in (d.index_near, d.value_near, d.value_interpolated):
+            args = (times, t) if f is d.index_near else (times, times, t)
+            x = f(*args[:-1], np.clip(t, 0, times[-1]), regular=True)
+            y = f(*args[:-1], np.clip(t, 0, times[-1]))
+            self.assertTrue(np.all(x == y), f)
+        x = d.indices_on(times, t, t + 1, regular=True)
+        y = d.indices_on(times, t, t + 1)
+        self.assertTrue(np.all(x[0] == y[0]) and np.all(x[1] == y[1]))
+
+        # Irregular times, and times with a single value
+        times = np.cumsum(r.uniform(0, 1, 10**4))
+        t = r.uniform(-1, times[-1] + 1, n)
+        i = np.searchsorted(times, t)
+        self.assertTrue(np.all(_searchsorted(times, t, 0.5) == i))
+        self.assertTrue(np.all(_searchsorted([3], t, 1) == (t > 3)))
+
+        # Few queries, nan or infinite queries, or invalid steps
+        self.assertEqual(_searchsorted(times, 5.0, 0.5),
+                         np.searchsorted(times, 5.0))
+        self.assertEqual(_searchsorted(times, np.nan, 0.5), len(times))
+        for x in (np.nan, np.inf, -np.inf):
+            u = t.copy()
+            u[3] = x
+            self.assertTrue(
+                np.all(_searchsorted(times, u, 0.5) ==
+                       np.searchsorted(times, u)))
+        for step in (0, -1, np.nan, np.inf):
+            self.assertTrue(np.all(_searchsorted(times, t, step) == i))
+
+        # Times with a long gap: unresolved queries use binary searches
+        times = np.arange(10**4) * 0.1
+        times[5000:] += 500
+        t = r.uniform(-1, times[-1] + 1, n)
+        self.assertTrue(
+            np.all(_searchsorted(times, t, 0.1) == np.searchsorted(times, t)))
+
+        # Constant times with regular=True
+        times = np.ones(10)
+        self.assertEqual(d.sampling_interval(times), 0)
+        self.assertEqual(
+            list(d.index_near(times, np.ones(n), regular=True)), [0] * n)
+
+        # Detection of regular times
+        from datkit._points import _steady
+        self.assertTrue(_steady(np.arange(10**6) * 0.1, 0.1))
+        self.assertTrue(_steady(np.array([0, 1, 2, 4, 5]), 1.25))
+        self.assertFalse(_steady(np.array([0, 1, 2, 10, 11]), 2.75))
+        self.assertFalse(_steady(np.arange(10), 0))
+        self.assertFalse(_steady(np.arange(10), np.nan))
+
+    def test_sum_on(self):
+        t = np.arange(1, 11)
+        self.assertEqual(d.sum_on(t, t, 1, 11), 55)
+        self.assertEqual(d.sum_on(t, t, 4, 8), 22)
+        self.assertEqual(d.sum_on(t, t, 4, 8, False), 18)
+        self.assertEqual(d.sum_on(t, t, 4, 8, True, True), 30)
+        self.assertEqual(d.sum_on(t, t, 4, 4), 0)
+        v = -3 + 8 * t[::-1]
+        self.assertEqual(d.sum_on(t, v, 4, 8), 164)
+
+        t = np.arange(1, 11)
+        v = -3 + 8 * t[::-1]
+        self.assertUnchanged(d.sum_on, t, v, 2, 7)
+
     def test_time_crossing(self):
         t = np.linspace(1, 5, 100)
         v = np.sin(t) + 1
@@ -343,6 +871,8 @@ class PointsTest(datkit.tests.TestCase):
         self.assertRaises(ValueError, d.time_crossing, t, v)
         t = np.linspace(0, 5, 100)
         self.assertRaises(ValueError, d.time_crossing, t, np.cos(t) - 1)
+        self.assertRaisesRegex(
+            ValueError, '1-d array', d.time_crossing, t, np.array([v, v]))
         t, v = [2, 3, 4, 5], [10, 20, 30, 40]
         self.assertEqual(d.time_crossing(t, v, 25), 3.5)
         self.assertEqual(d.time_crossing(t, v, 31), 4.1)
@@ -354,6 +884,52 @@ class PointsTest(datkit.tests.TestCase):
         v = np.sin(t) + 1
         self.assertUnchanged(d.time_crossing, t, v, 0.1)
 
+    def test_time_crossings(self):
+        t = np.linspace(0, 6 * np.pi, 10000)
+        v = np.cos(t)
+        x = d.time_crossings(t, v)
+        self.assertEqual(len(x), 6)
+        self.assertTrue(np.allclose(x, np.pi * np.arange(0.5, 6), atol=1e-6))
+        self.assertEqual(x[0], d.time_crossing(t, v))
+        x = d.time_crossings(t, v, direction=1)
+        self.assertTrue(np.allclose(x, np.pi * np.arange(1.5, 6, 2)))
+        x = d.time_crossings(t, v, 0.5, direction=-1)
+        self.assertTrue(np.allclose(x, np.pi * (np.arange(0, 6, 2) + 1 / 3)))
+        x = d.time_crossings(t, v, 2)
+        self.assertEqual(len(x), 0)
+
+        # Hysteresis and separation
+        t = [1, 2, 3, 4, 5, 6, 7, 8]
+        v = [0, 2, 0.9, 1.1, 0.9, 0, 2, 0]
+        self.assertEqual(list(d.time_crossings(t, v, 1, hysteresis=0.5)),
+                         [1.5, 4, 6.5, 7.5])
+        self.assertTrue(np.allclose(
+            d.time_crossings(t, v, 1, min_separation=1.5), [1.5, 3.5, 6.5]))
+
+        t = [0, 1, 2, 3, 4, 5, 6]
+        v = [1, 2, 3, 0, 3, 2, 1]
+        self.assertUnchanged(d.time_crossings, t, v, 2.5)
+
+    def test_time_steps(self):
+        t = np.arange(12) * 0.5
+        v = np.repeat([-80, 20, 0, -80], [4, 2, 1, 5])
+        t0, t1, w = d.time_steps(t, v, min_length=2)
+        self.assertEqual(list(t0), [0, 2, 3.5])
+        self.assertEqual(list(t1), [1.5, 2.5, 5.5])
+        self.assertEqual(list(w), [-80, 20, -80])
+
+        # Segments can be used with the methods for many intervals
+        i = 1 + np.arange(12) ** 2
+        self.assertEqual(
+            list(d.means_on(t, v, t0, t1, include_right=True)), list(w))
+        self.assertEqual(
+            list(d.maxima_on(t, i, t0, t1, include_right=True)[1]),
+            [10, 26, 122])
+        t0, t1, w = d.time_steps(t, v, min_length=10)
+        self.assertEqual((len(t0), len(t1), len(w)), (0, 0, 0))
+
+        self.assertUnchanged(d.time_steps, t, v)
+
     def test_value_at(self):
         t = np.arange(0, 10)
         self.assertEqual(d.value_at(t, t, 0), 0)
@@ -363,6 +939,9 @@ class PointsTest(datkit.tests.TestCase):
         self.assertEqual(d.value_at(t, v, 0), 20)
         self.assertEqual(d.value_at(t, v, 5), 30)
 
+        self.assertEqual(d.value_at(t, v, 5, regular=True), 30)
+        self.assertEqual(list(d.value_at(t, v, [5, 0])), [30, 20])
+
         t = np.arange(0, 10)
         v = 10 + t
         self.assertUnchanged(d.value_at, t, v, 3)
@@ -380,13 +959,70 @@ class PointsTest(datkit.tests.TestCase):
                                d.value_interpolated, t, v, 1.9)
         self.assertRaisesRegex(ValueError, 'entries in times',
                                d.value_interpolated, t, v, 7.1)
+        self.assertEqual(d.value_interpolated(t, v, 5.5, regular=True), 1.5)
+        self.assertEqual(d.value_interpolated(t, v, 7, regular=True), 8)
+        self.assertRaisesRegex(ValueError, 'entries in times',
+                               d.value_interpolated, t, v, 1.9, regular=True)
         t, v = [0, 1, 2], [6, 6, 6]
         self.assertEqual(d.value_interpolated(t, v, 0), 6)
         self.assertEqual(d.value_interpolated(t, v, 1), 6)
         self.assertEqual(d.value_interpolated(t, v, 2), 6)
 
+        # Multiple times at once
+        t, v = [2, 3, 4, 5, 6, 7], [5, 0, 3, -1, 4, 8]
+        x = [2, 2.2, 4, 4.5, 5.5, 6.9, 7]
+        y = d.value_interpolated(t, v, x)
+        self.assertIsInstance(y, np.ndarray)
+        self.assertTrue(np.allclose(y, [5, 4, 3, 1, 1.5, 7.6, 8]))
+        y = d.value_interpolated(t, v, x, regular=True)
+        self.assertTrue(np.allclose(y, [5, 4, 3, 1, 1.5, 7.6, 8]))
+        self.assertRaisesRegex(ValueError, 't=7.1',
+                               d.value_interpolated, t, v, [2, 7.1, 1])
+        y = d.value_interpolated(t, v, [1.9, 2, 4.5, 7.1], mask=True)
+        self.assertIsInstance(y, np.ma.MaskedArray)
+        self.assertEqual(list(y.mask), [True, False, False, True])
+        self.assertEqual(list(y.compressed()), [5, 1])
+        y[0] = 3
+        self.assertEqual(list(y.compressed()), [3, 5, 1])
+        self.assertIs(d.value_interpolated(t, v, 1.9, mask=True), np.ma.masked)
+        self.assertEqual(d.value_interpolated(t, v, 4.5, mask=True), 1)
+
+        # Multiple traces
+        w = [v, np.array(v) * 2]
+        self.assertEqual(list(d.value_interpolated(t, w, 4.5)), [1, 2])
+        self.assertRaisesRegex(ValueError, 't=1.9',
+                               d.value_interpolated, t, w, [2, 1.9])
+        y = d.value_interpolated(t, w, [1.9, 2, 4.5], mask=True)
+        self.assertEqual(y.shape, (2, 3))
+        self.assertTrue(np.all(y.mask == [[True, False, False]] * 2))
+        self.assertEqual(list(y.compressed()), [5, 1, 10, 2])
+        y[1, 0] = 3
+        self.assertEqual(list(y.compressed()), [5, 1, 3, 10, 2])
+        y = d.value_interpolated(t, w, 1.9, mask=True)
+        self.assertEqual(list(y.mask), [True, True])
+        x = np.linspace(2, 7, 101)
+        y = d.value_interpolated(t, v, x)
+        for xi, yi in zip(x, y):
+            self.assertAlmostEqual(yi, d.value_interpolated(t, v, xi))
+
+        # A single time, or no times
+        self.assertEqual(d.value_interpolated([2], [5], 2), 5)
+        self.assertEqual(list(d.value_interpolated([2], [5], [2, 2])), [5, 5])
+        self.assertEqual(
+            list(d.value_interpolated([2], [[5], [6]], [2])), [[5], [6]])
+        self.assertRaisesRegex(ValueError, 't=3',
+                               d.value_interpolated, [2], [5], [2, 3])
+        y = d.value_interpolated([2], [5], [1, 2, 3], mask=True)
+        self.assertEqual(list(y.mask), [True, False, True])
+        self.assertEqual(list(y.compressed()), [5])
+        self.assertIs(d.value_interpolated([2], [5], 3, mask=True),
+                      np.ma.masked)
+        self.assertRaisesRegex(ValueError, 'at least one',
+                               d.value_interpolated, [], [], [2])
+
         t, v = [2, 3, 4, 5, 6, 7], [5, 0, 3, -1, 4, 8]
         self.assertUnchanged(d.value_interpolated, t, v, 3)
+        self.assertUnchanged(d.value_interpolated, t, v, [3, 4.5])
 
     def test_value_near(self):
         t = np.arange(0, 10)
@@ -400,13 +1036,51 @@ class PointsTest(datkit.tests.TestCase):
         self.assertEqual(d.value_at(t, v, 0), 20)
         self.assertEqual(d.value_at(t, v, 5), 30)
 
+        # Multiple times at once
+        v = list(v)
+        y = d.value_near(t, v, [0.1, 5.7, 8.9])
+        self.assertEqual(list(y), [20, 32, 38])
+        self.assertEqual(list(d.value_near(t, v, [4.4], regular=True)), [28])
+        self.assertRaisesRegex(
+            ValueError, 'too far outside', d.value_near, t, v, [1, 9.6])
+        y = d.value_near(t, v, [-0.6, -0.4, 3, 9.4, 9.6], mask=True)
+        self.assertIsInstance(y, np.ma.MaskedArray)
+        self.assertEqual(list(y.mask), [True, False, False, False, True])
+        self.assertEqual(list(y.compressed()), [20, 26, 38])
+        y[4] = 3
+        self.assertEqual(list(y.compressed()), [20, 26, 38, 3])
+        self.assertIs(d.value_near(t, v, 9.6, mask=True), np.ma.masked)
+        self.assertEqual(d.value_near(t, v, 9.4, mask=True), 38)
+
+        # Multiple traces
+        w = [v, v[::-1]]
+        self.assertEqual(list(d.value_near(t, w, 5.7)), [32, 26])
+        y = d.value_near(t, w, [0.1, 8.9])
+        self.assertTrue(np.all(y == [[20, 38], [38, 20]]))
+        y = d.value_near(t, w, [-0.6, 0.1], mask=True)
+        self.assertTrue(np.all(y.mask == [[True, False]] * 2))
+        self.assertEqual(list(y.compressed()), [20, 38])
+        self.assertEqual(list(d.value_at(t, w, 5)), [30, 28])
+
         t = np.arange(0, 10)
         v = 30 + 2 * t
         self.assertUnchanged(d.value_at, t, v, 0)
         self.assertUnchanged(d.value_at, t, v, 5)
 
+    def test_variance_on(self):
+        t = np.arange(1, 11)
+        self.assertEqual(d.variance_on(t, t, 1, 11), 8.25)
+        self.assertEqual(d.variance_on(t, t, 4, 8), 1.25)
+        self.assertEqual(d.variance_on(t, t, 4, 8, False), 2 / 3)
+        self.assertEqual(d.variance_on(t, t, 4, 8, True, True), 2)
+        v = 3 * t
+        self.assertEqual(d.variance_on(t, v, 4, 8), 11.25)
+
+        t = np.arange(1, 11)
+        v = -3 + 8 * t[::-1]
+        self.assertUnchanged(d.variance_on, t, v, 2, 7)
+
 
 if __name__ == '__main__':
     import unittest
     unittest.main()
-
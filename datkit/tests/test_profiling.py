@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+#
+# Tests the profiling methods.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import json
+import sys
+import threading
+import tracemalloc
+
+import numpy as np
+
+import datkit as d
+import datkit.tests
+
+
+class ProfilingTest(datkit.tests.TestCase):
+    """ Tests methods from the hidden _profiling module. """
+
+    def test_profiling(self):
+        t = np.arange(1000) * 0.1
+        v = np.sin(t)
+        with d.profiling() as p:
+            for i in range(3):
+                d.mean_on(t, v, 10, 20)
+            d.data_on(t, v, 10, 20)
+            d.moving_average(t, v, w=11)
+            self.assertRaises(ValueError, d.moving_average, t, v[:-1], 3)
+        d.mean_on(t, v)
+
+        # Calls made inside other datkit methods are not recorded
+        stats = p.to_dict()
+        self.assertEqual(
+            set(stats), set(('mean_on', 'data_on', 'moving_average')))
+        self.assertEqual(stats['mean_on']['calls'], 3)
+        self.assertEqual(stats['mean_on']['elements'], 3 * 2000)
+        self.assertEqual(stats['data_on']['calls'], 1)
+        self.assertEqual(stats['moving_average']['calls'], 2)
+        for s in stats.values():
+            self.assertGreater(s['time'], 0)
+            self.assertNotIn('bytes', s)
+
+        # Methods used by a time series, but not its cached queries
+        s = d.TimeSeries(t, v)
+        with d.profiling() as p:
+            s.amplitude_spectrum()
+            s.imax_on(2, 3)
+        self.assertIn('amplitude_spectrum', p.to_dict())
+        self.assertNotIn('imax_on', p.to_dict())
+
+        # Results are sorted by time, and can be exported
+        x = p.to_dict()
+        self.assertEqual(json.loads(p.to_json()), x)
+        self.assertIn('amplitude_spectrum', p.summary())
+        p.clear()
+        self.assertEqual(p.to_dict(), {})
+        self.assertEqual(len(p.summary().splitlines()), 1)
+
+        # Wrappers keep the name and docstring
+        self.assertEqual(d.mean_on.__name__, 'mean_on')
+        self.assertEqual(d.mean_on.__doc__, d._points.mean_on.__doc__)
+
+    def test_profiling_memory(self):
+        t = np.arange(100000) * 0.1
+        v = np.sin(t)
+        with d.profiling(memory=True) as p, d.profiling() as q:
+            d.moving_average(t, v, 11)
+            d.moving_average(t, v, 11)
+            d.max_on(t, v)
+        self.assertFalse(tracemalloc.is_tracing())
+        stats = p.to_dict()
+        self.assertGreaterEqual(stats['moving_average']['max_bytes'],
+                                v.nbytes)
+        self.assertGreaterEqual(stats['moving_average']['bytes'],
+                                2 * v.nbytes)
+        self.assertLess(stats['max_on']['bytes'], v.nbytes)
+        self.assertIn('Max bytes', p.summary())
+
+        # Nested profiles record the same calls
+        self.assertEqual(
+            [s['calls'] for s in q.to_dict().values()], [2, 1])
+        self.assertNotIn('Max bytes', q.summary())
+
+        # Memory can't be recorded while tracemalloc is in use
+        tracemalloc.start()
+        try:
+            with self.assertRaisesRegex(ValueError, 'tracemalloc'):
+                with d.profiling(memory=True):
+                    pass
+        finally:
+            tracemalloc.stop()
+
+    def test_profiling_threads(self):
+        # Calls from other threads are recorded
+        t = np.arange(1000) * 0.1
+        with d.profiling() as p:
+            threads = [threading.Thread(target=d.is_increasing, args=(t, ))
+                       for i in range(4)]
+            for x in threads:
+                x.start()
+            for x in threads:
+                x.join()
+        self.assertEqual(p.to_dict()['is_increasing']['calls'], 4)
+
+        # Concurrent updates are not lost
+        p = d.Profile()
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            def record():
+                for i in range(2000):
+                    p._record('f', 0.5, 3, None)
+                    p.to_dict()
+
+            threads = [threading.Thread(target=record) for i in range(8)]
+            for x in threads:
+                x.start()
+            for x in threads:
+                x.join()
+        finally:
+            sys.setswitchinterval(interval)
+        s = p.to_dict()['f']
+        self.assertEqual(s['calls'], 16000)
+        self.assertEqual(s['time'], 8000)
+        self.assertEqual(s['elements'], 48000)
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -88,6 +88,96 @@ class SmoothingTest(datkit.tests.TestCase):
             plt.plot(x, z)
             plt.show()
 
+        # Wide windows use FFTs
+        v = r.normal(0, 1, 5000)
+        t = np.arange(len(v))
+        k = np.exp(-np.linspace(-2, 2, 1001)**2)
+        z = np.convolve(v, k, 'valid') / sum(k)
+        x, y = d.gaussian_smoothing(t, v, 1001)
+        self.assertEqual(list(x), list(t[500:-500]))
+        self.assertEqual(len(y), len(z))
+        self.assertLess(np.max(np.abs(y - z)), 1e-12)
+        v[3000] = np.nan
+        x, y = d.gaussian_smoothing(t, v, 1001)
+        self.assertEqual(np.sum(np.isnan(y)), 1001)
+        self.assertLess(np.nanmax(np.abs(y - z)), 1e-12)
+
+        # Overlap-save with various batch sizes and segment counts
+        v[3000] = 0
+        k = k[:21]
+        z = np.convolve(v, k, 'valid')
+        for L, batch in ((32, 1), (64, 100), (1024, 2048), (8192, 8192)):
+            y = d._smoothing._fft_convolve(v, k, L, batch)
+            self.assertLess(np.max(np.abs(y - z)), 1e-12)
+        z = np.convolve(v[::3], k, 'valid')
+        y = d._smoothing._fft_convolve(v[::3], k, 64)
+        self.assertLess(np.max(np.abs(y - z)), 1e-12)
+
+        # Multiple traces give the same results as single traces
+        v = np.stack((v, 2 * v, -v))
+        for w in (5, 1001):
+            x, y = d.gaussian_smoothing(t, v, w)
+            self.assertEqual(y.shape, (3, len(x)))
+            for k in range(3):
+                self.assertTrue(
+                    np.all(y[k] == d.gaussian_smoothing(t, v[k], w)[1]))
+        y = d._smoothing._fft_convolve(v, np.ones(21), 64, 100)
+        self.assertTrue(
+            np.all(y[1] == d._smoothing._fft_convolve(v[1], np.ones(21), 64)))
+        x = np.stack((v, v[::-1]))
+        out = np.zeros((2, len(t) - 20, 3)).transpose(0, 2, 1)
+        y = d._smoothing._fft_convolve(x, np.ones(21), 64, out=out)
+        self.assertIs(y, out)
+        z = d._smoothing._fft_convolve(x[1, 2], np.ones(21), 64)
+        self.assertTrue(np.all(y[1, 2] == z))
+
+        # Multi-threaded results are identical to single-threaded ones
+        size = d.chunk_size()
+        try:
+            d.set_chunk_size(1000)
+            for w in (5, 301, 1001):
+                x, y = d.gaussian_smoothing(t, v, w)
+                for workers in (1, 2, 5):
+                    x2, y2 = d.gaussian_smoothing(t, v, w, workers=workers)
+                    self.assertTrue(np.all(x == x2))
+                    self.assertTrue(np.all(y == y2))
+        finally:
+            d.set_chunk_size(size)
+        self.assertRaisesRegex(ValueError, 'at least 1', d.gaussian_smoothing,
+                               t, v, 3, workers=0)
+
+        # Results can be written into an existing array, and FFT buffers can
+        # be reused between calls
+        ws = d.Workspace()
+        for w in (5, 1001):
+            y = d.gaussian_smoothing(t, v, w)[1]
+            out = np.zeros(y.shape)
+            for workspace in (None, ws, ws):
+                y2 = d.gaussian_smoothing(
+                    t, v, w, out=out, workspace=workspace)[1]
+                self.assertIs(y2, out)
+                self.assertTrue(np.all(y2 == y))
+        self.assertGreater(ws.nbytes(), 0)
+        ws.clear()
+        self.assertEqual(ws.nbytes(), 0)
+        out = np.zeros((4000, 2))[:, 1]
+        y = d.gaussian_smoothing(t, v[1], 1001, out=out, workspace=ws)[1]
+        self.assertIs(y, out)
+        self.assertTrue(np.all(y == d.gaussian_smoothing(t, v[1], 1001)[1]))
+        self.assertRaisesRegex(ValueError, 'out must be', d.gaussian_smoothing,
+                               t, v, 1001, out=np.zeros(4000))
+
+        # The type of out is checked before any calculations are made
+        for w in (11, 1001):
+            out = np.zeros((2, 4000 - w + 1), dtype=int)
+            self.assertRaisesRegex(
+                ValueError, 'hold float64', d.gaussian_smoothing,
+                t, v, w, out=out)
+            self.assertFalse(np.any(out))
+        self.assertRaisesRegex(ValueError, 'hold complex128',
+                               d.gaussian_smoothing, t, v * 1j, 11,
+                               out=np.zeros((2, 3990)))
+
         # Wrong arguments
         self.assertRaisesRegex(
             ValueError, 'same size', d.gaussian_smoothing, t, t[:-1], 3)
@@ -95,6 +185,8 @@ class SmoothingTest(datkit.tests.TestCase):
         # Input is unchanged
         self.assertUnchanged(
             d.gaussian_smoothing, np.arange(11), np.ones(11), 3)
+        self.assertUnchanged(
+            d.gaussian_smoothing, np.arange(3000), np.ones(3000), 1001)
 
     def test_haar_downsample(self):
 
@@ -154,6 +246,51 @@ class SmoothingTest(datkit.tests.TestCase):
             plt.plot(x, z)
             plt.show()
 
+        # Writing to an out argument
+        t = np.arange(21) * 0.5
+        v = np.sin(t)
+        for r in range(4):
+            x, y = d.haar_downsample(t, v, r)
+            out = (np.zeros(len(x)), np.zeros(len(y)))
+            x2, y2 = d.haar_downsample(t, v, r, out=out)
+            self.assertIs(x2, out[0])
+            self.assertIs(y2, out[1])
+            self.assertTrue(np.all(x == x2))
+            self.assertTrue(np.all(y == y2))
+        self.assertRaisesRegex(ValueError, 'length 5', d.haar_downsample,
+                               t, v, 2, out=(np.zeros(5), np.zeros(4)))
+        self.assertRaisesRegex(ValueError, 'length 10', d.haar_downsample,
+                               t, v, out=(np.zeros(10), ))
+        self.assertRaisesRegex(ValueError, 'hold float64', d.haar_downsample,
+                               t, v, 2, out=(np.zeros(5), np.zeros(5, int)))
+        self.assertRaisesRegex(ValueError, 'length 5', d.haar_downsample,
+                               t, v, 2, out=(list(range(5)), np.zeros(5)))
+        out = (np.zeros(5, np.float32), np.zeros(5, np.float32))
+        x2, y2 = d.haar_downsample(t, v, 2, out=out)
+        self.assertIs(y2, out[1])
+        self.assertTrue(np.allclose(y2, d.haar_downsample(t, v, 2)[1]))
+
+        # Multiple traces
+        v = np.stack((v, np.cos(t)))
+        x, y = d.haar_downsample(t, v, 2)
+        self.assertEqual(y.shape, (2, 5))
+        self.assertTrue(np.all(y[1] == d.haar_downsample(t, v[1], 2)[1]))
+        out = (np.zeros(5), np.zeros((2, 5)))
+        x2, y2 = d.haar_downsample(t, v, 2, out=out)
+        self.assertIs(y2, out[1])
+        self.assertTrue(np.all(y == y2))
+        self.assertRaisesRegex(ValueError, 'length 5', d.haar_downsample,
+                               t, v, 2, out=(np.zeros(5), np.zeros(5)))
+
+        # Intermediate levels stored in a workspace
+        ws = d.Workspace()
+        for r in (1, 3, 3):
+            x, y = d.haar_downsample(t, v, r)
+            x2, y2 = d.haar_downsample(t, v, r, workspace=ws)
+            self.assertTrue(np.all(x == x2))
+            self.assertTrue(np.all(y == y2))
+        self.assertEqual(ws.nbytes(), 8 * 3 * (10 + 5))
+
         # Wrong arguments
         self.assertRaisesRegex(
             ValueError, 'same size', d.haar_downsample, t, t[:-1], 3)
@@ -161,6 +298,177 @@ class SmoothingTest(datkit.tests.TestCase):
         # Input is unchanged
         self.assertUnchanged(d.haar_downsample, np.arange(10), np.ones(10))
 
+    def test_haar_pyramid(self):
+
+        # Levels are the same as with haar_downsample
+        r = np.random.default_rng(1)
+        t = np.arange(1001) * 0.1
+        v = r.normal(size=t.shape)
+        p = d.haar_pyramid(t, v)
+        self.assertEqual(len(p), 9)
+        for k, (x, y) in enumerate(p):
+            x2, y2 = d.haar_downsample(t, v, k + 1)
+            self.assertEqual(len(x), len(t) // 2**(k + 1))
+            self.assertTrue(np.all(x == x2))
+            self.assertTrue(np.all(y == y2))
+        self.assertEqual(len(p[-1][0]), 1)
+
+        # Levels are views into a single buffer
+        self.assertIsNotNone(p[0][0].base)
+        self.assertIs(p[0][0].base, p[-1][0].base)
+        self.assertIs(p[0][1].base, p[-1][1].base)
+        self.assertEqual(p[0][1].base.size, sum(len(y) for x, y in p))
+
+        # Number of levels
+        p = d.haar_pyramid(t, v, 2)
+        self.assertEqual(len(p), 2)
+        p = d.haar_pyramid(t, v, 12)
+        self.assertEqual(len(p), 12)
+        self.assertEqual(len(p[-1][0]), 0)
+        self.assertEqual(d.haar_pyramid(t, v, 0), [])
+        self.assertEqual(d.haar_pyramid([1], [2]), [])
+
+        # Integers are averaged as floats
+        p = d.haar_pyramid([1, 2, 3, 4], [5, 8, 6, 7])
+        self.assertEqual(list(p[0][1]), [6.5, 6.5])
+        self.assertEqual(list(p[1][0]), [2.5])
+
+        # Multiple traces
+        p = d.haar_pyramid(t, np.stack((v, -v)), 4)
+        for k, (x, y) in enumerate(p):
+            self.assertEqual(y.shape, (2, len(x)))
+            self.assertTrue(np.all(y[1] == -d.haar_downsample(t, v, k + 1)[1]))
+
+        # Wrong arguments
+        self.assertRaisesRegex(
+            ValueError, 'same size', d.haar_pyramid, t, v[:-1])
+
+        # Input is unchanged
+        self.assertUnchanged(d.haar_pyramid, np.arange(10), np.ones(10))
+
+    def test_lttb_downsample(self):
+
+        # Peaks are retained, first and last points are included
+        t = np.arange(1000) * 0.1
+        v = np.zeros(t.shape)
+        v[[100, 511, 702]] = [5, -3, 2]
+        x, y = d.lttb_downsample(t, v, 20)
+        self.assertEqual(len(x), len(y), 20)
+        self.assertEqual(x[0], t[0])
+        self.assertEqual(x[-1], t[-1])
+        self.assertTrue(np.all(np.diff(x) > 0))
+        self.assertIn(5, y)
+        self.assertIn(-3, y)
+        self.assertIn(2, y)
+        self.assertIn(t[511], x)
+
+        # Every selected point is in the original series, one per bucket
+        r = np.random.default_rng(1)
+        v = r.normal(size=t.shape)
+        x, y = d.lttb_downsample(t, v, 100)
+        i = np.searchsorted(t, x)
+        self.assertTrue(np.all(t[i] == x))
+        self.assertTrue(np.all(v[i] == y))
+        self.assertTrue(np.all(np.diff(i) > 0))
+
+        # Compare with a simple implementation
+        def lttb(t, v, n):
+            i, every = [0], (len(t) - 2) / (n - 2)
+            edges = [1 + int(k * every) for k in range(n - 1)]
+            for k in range(n - 2):
+                a, b = edges[k], edges[k + 1]
+                if k < n - 3:
+                    c = edges[k + 2]
+                    c = (np.mean(t[b:c]), np.mean(v[b:c]))
+                else:
+                    c = (t[-1], v[-1])
+                areas = [abs((t[i[-1]] - c[0]) * (v[j] - v[i[-1]])
+                             - (t[i[-1]] - t[j]) * (c[1] - v[i[-1]]))
+                         for j in range(a, b)]
+                i.append(a + int(np.argmax(areas)))
+            return i + [len(t) - 1]
+
+        for n in (3, 4, 17, 500, 999):
+            x, y = d.lttb_downsample(t, v, n)
+            self.assertEqual(list(x), list(t[lttb(t, v, n)]))
+
+        # Multiple traces are downsampled independently
+        w = np.stack((v, np.sin(t), r.normal(size=t.shape)))
+        x, y = d.lttb_downsample(t, w, 50)
+        self.assertEqual(x.shape, (3, 50))
+        self.assertEqual(y.shape, (3, 50))
+        for k in range(3):
+            x2, y2 = d.lttb_downsample(t, w[k], 50)
+            self.assertTrue(np.all(x[k] == x2))
+            self.assertTrue(np.all(y[k] == y2))
+
+        # Short series are returned as is
+        x, y = d.lttb_downsample(t, v, 1000)
+        self.assertIs(x, t)
+        self.assertIs(y, v)
+
+        # Wrong arguments
+        self.assertRaisesRegex(
+            ValueError, 'at least 3', d.lttb_downsample, t, v, 2)
+        self.assertRaisesRegex(
+            ValueError, 'same size', d.lttb_downsample, t, v[:-1], 10)
+
+        # Input is unchanged
+        self.assertUnchanged(d.lttb_downsample, t, v, 10)
+
+    def test_minmax_downsample(self):
+
+        # Simple tests
+        t = np.arange(10)
+        v = np.array([3, 1, 4, 1, 5, 9, 2, 6, 5, 3])
+        x, y = d.minmax_downsample(t, v, 3)
+        self.assertEqual(list(x), [1, 2, 5, 6, 8, 9])
+        self.assertEqual(list(y), [1, 4, 9, 2, 5, 3])
+        x, y = d.minmax_downsample(t, v, 2)
+        self.assertEqual(list(x), [1, 4, 5, 6])
+        self.assertEqual(list(y), [1, 5, 9, 2])
+        x, y = d.minmax_downsample(t, v, 1)
+        self.assertEqual(list(x), [1, 5])
+        x, y = d.minmax_downsample(t, v, 5)
+        self.assertIs(x, t)
+        self.assertIs(y, v)
+
+        # Duplicates are removed
+        x, y = d.minmax_downsample(t, np.ones(10), 3)
+        self.assertEqual(list(x), [0, 4, 8])
+        self.assertEqual(list(y), [1, 1, 1])
+
+        # Multiple traces, including duplicates
+        x, y = d.minmax_downsample(t, np.stack((v, np.ones(10))), 3)
+        self.assertTrue(np.all(x == [[1, 2, 5, 6, 8, 9], [0, 0, 4, 4, 8, 8]]))
+        self.assertTrue(np.all(y == [[1, 4, 9, 2, 5, 3], [1] * 6]))
+
+        # Spikes are retained, and the extrema in each bucket are returned
+        r = np.random.default_rng(1)
+        t = np.arange(100003) * 0.01
+        v = r.normal(size=t.shape)
+        v[[5000, 77777]] = [100, -100]
+        x, y = d.minmax_downsample(t, v, 1000)
+        self.assertLessEqual(len(x), 2000)
+        self.assertTrue(np.all(np.diff(x) > 0))
+        self.assertIn(100, y)
+        self.assertIn(-100, y)
+        i, b = np.searchsorted(t, x), 101
+        for k in list(range(0, 991, 37)) + [990]:
+            j = i[(i >= k * b) & (i < (k + 1) * b)]
+            w = v[k * b:(k + 1) * b]
+            self.assertEqual(len(j), 2)
+            self.assertEqual(set(v[j]), {np.min(w), np.max(w)})
+
+        # Wrong arguments
+        self.assertRaisesRegex(
+            ValueError, 'at least 1', d.minmax_downsample, t, v, 0)
+        self.assertRaisesRegex(
+            ValueError, 'same size', d.minmax_downsample, t, v[:-1], 10)
+
+        # Input is unchanged
+        self.assertUnchanged(d.minmax_downsample, t, v, 10)
+
     def test_moving_average(self):
 
         # Numerical tests with ones: should return all ones
@@ -217,12 +525,89 @@ class SmoothingTest(datkit.tests.TestCase):
             plt.plot(x, z)
             plt.show()
 
+        # Wide windows use running sums
+        x, y = d.moving_average(t, v, 101)
+        z = np.convolve(v, np.ones(101), 'valid') / 101
+        self.assertEqual(len(y), len(z))
+        self.assertLess(np.max(np.abs(y - z)), 1e-12)
+        x, y = d.moving_average(np.arange(3000), np.arange(3000), 1025)
+        self.assertTrue(np.all(y == np.arange(512, 3000 - 512)))
+        v2 = np.copy(v)
+        v2[500] = np.nan
+        x, y = d.moving_average(t, v2, 101)
+        self.assertEqual(np.sum(np.isnan(y)), 101)
+        self.assertLess(np.nanmax(np.abs(y - z)), 1e-12)
+
+        # Integer values don't overflow in the running sums
+        v2 = r.integers(-32000, 32000, size=t.shape).astype(np.int16)
+        z = np.convolve(v2.astype(float), np.ones(101), 'valid') / 101
+        for workers in (None, 3):
+            y = d.moving_average(t, v2, 101, workers=workers)[1]
+            self.assertLess(np.max(np.abs(y - z)), 1e-9)
+        v2 = np.array([100, -100] * 50, dtype=np.int8)
+        y = d.moving_average(np.arange(100), v2, 17)[1]
+        self.assertTrue(np.allclose(y[::2], 100 / 17))
+        self.assertTrue(np.allclose(y[1::2], -100 / 17))
+
+        # Multiple traces give the same results as single traces
+        v2 = np.stack((v, -v, v[::-1]))
+        for w in (3, 101):
+            x, y = d.moving_average(t, v2, w)
+            self.assertEqual(y.shape, (3, len(x)))
+            for k in range(3):
+                self.assertTrue(
+                    np.all(y[k] == d.moving_average(t, v2[k], w)[1]))
+
+        # Multi-threaded results are identical to single-threaded ones
+        size = d.chunk_size()
+        v2[1, 100] = np.nan
+        try:
+            d.set_chunk_size(100)
+            for w in (3, 21, 101, 501):
+                for x in (v, v2):
+                    y = d.moving_average(t, x, w)[1]
+                    for workers in (2, 3, 9):
+                        y2 = d.moving_average(t, x, w, workers=workers)[1]
+                        self.assertTrue(np.array_equal(y, y2, equal_nan=True))
+        finally:
+            d.set_chunk_size(size)
+        self.assertRaisesRegex(ValueError, 'at least 1', d.moving_average,
+                               t, v, 3, workers=-1)
+
+        # Results can be written into an existing array
+        for w in (3, 101):
+            y = d.moving_average(t, v2, w)[1]
+            out = np.zeros(y.shape)
+            y2 = d.moving_average(t, v2, w, out=out)[1]
+            self.assertIs(y2, out)
+            self.assertTrue(np.array_equal(y, y2, equal_nan=True))
+            out = np.zeros((len(t) - w + 1, 3)).T
+            y2 = d.moving_average(t, v2, w, out=out, workers=3)[1]
+            self.assertTrue(np.array_equal(y, y2, equal_nan=True))
+        self.assertRaisesRegex(ValueError, 'out must be', d.moving_average,
+                               t, v, 3, out=np.zeros(len(t)))
+        self.assertRaisesRegex(ValueError, 'out must be', d.moving_average,
+                               t, v, 3, out=[0] * (len(t) - 2))
+        for w in (3, 101):
+            out = np.zeros(len(t) - w + 1, dtype=np.int32)
+            self.assertRaisesRegex(ValueError, 'hold float64',
+                                   d.moving_average, t, v, w, out=out)
+            self.assertFalse(np.any(out))
+            out = np.zeros(len(t) - w + 1, dtype=np.float32)
+            y2 = d.moving_average(t, v, w, out=out)[1]
+            y = d.moving_average(t, v, w)[1]
+            self.assertLess(np.max(np.abs(y2 - y)), 1e-5)
+
         # Wrong arguments
         self.assertRaisesRegex(
             ValueError, 'same size', d.moving_average, t, v[:-1], 3)
+        self.assertRaisesRegex(
+            ValueError, 'same size', d.moving_average, t, v2[:, :-1], 3)
 
         # Input is unchanged
         self.assertUnchanged(d.moving_average, np.arange(9), np.ones(9), 3)
+        self.assertUnchanged(
+            d.moving_average, np.arange(99), np.arange(99), 21)
 
     def test_window_size(self):
 
@@ -40,6 +40,53 @@ class SpectralTest(datkit.tests.TestCase):
         self.assertAlmostEqual(a[50], 4, 0)
         self.assertLess(a[51], 0.2)
 
+        # Same as with a full FFT
+        x = np.fft.fft(v)
+        self.assertTrue(np.allclose(f, np.fft.fftfreq(len(t), t[1] - t[0])[
+            :len(t) // 2]))
+        x = np.abs(x[:len(t) // 2]) / len(t)
+        x[1:-1] *= 2
+        self.assertTrue(np.allclose(a, x))
+
+        # Zero padding
+        f2, a2 = d.amplitude_spectrum(t, v, 2048)
+        self.assertEqual(len(f2), 1024)
+        self.assertAlmostEqual(f2[1], 1 / (2048 * (t[1] - t[0])))
+        self.assertAlmostEqual(np.max(a2), np.max(a), 0)
+        f2, a2 = d.amplitude_spectrum(t, v, 'fast')
+        self.assertEqual(len(f2), 1250 // 2)
+        self.assertRaisesRegex(
+            ValueError, 'at least len', d.amplitude_spectrum, t, v, 1000)
+
+        # Multiple traces at once
+        v2 = np.array([v, 2 * v, np.cos(t)])
+        f2, a2 = d.amplitude_spectrum(t, v2)
+        self.assertEqual(a2.shape, (3, len(f)))
+        self.assertIs(f, f2)
+        self.assertTrue(np.allclose(a2[0], a))
+        self.assertTrue(np.allclose(a2[1], 2 * a))
+        self.assertTrue(np.allclose(a2[2], d.amplitude_spectrum(t, v2[2])[1]))
+        self.assertRaisesRegex(
+            ValueError, 'same size', d.amplitude_spectrum, t, v2[:, 1:])
+
+        # Results can be written into an existing array, and the FFT result
+        # can be stored in a workspace
+        ws = d.Workspace()
+        for n in (None, 2048, None):
+            f2, a2 = d.amplitude_spectrum(t, v2, n)
+            out = np.zeros(a2.shape)
+            f3, a3 = d.amplitude_spectrum(t, v2, n, out=out, workspace=ws)
+            self.assertIs(a3, out)
+            self.assertTrue(np.all(a2 == a3))
+        self.assertEqual(ws.nbytes(), 16 * 3 * (len(t) // 2 + 1))
+        self.assertRaisesRegex(ValueError, 'out must be', d.amplitude_spectrum,
+                               t, v2, out=np.zeros(len(f)))
+
+        # Frequencies are cached and read-only
+        self.assertFalse(f.flags.writeable)
+        self.assertIs(d.amplitude_spectrum(t, v)[0], f)
+        self.assertIs(d.power_spectral_density(t, v)[0], f)
+
         # Test if input is unchanged
         t = np.linspace(0, 10, 123)
         v = 6 * np.sin(t * (2 * np.pi * 2))
@@ -60,11 +107,177 @@ class SpectralTest(datkit.tests.TestCase):
         self.assertAlmostEqual(psd[30], 245, 0)
         self.assertLess(psd[31], 0.3)
 
+        # Same as with a full FFT
+        x = np.abs(np.fft.fft(v)[:500])**2 * (t[1] - t[0]) / 1000
+        x[1:-1] *= 2
+        self.assertTrue(np.allclose(psd, x))
+
+        # Zero padding
+        f2, p2 = d.power_spectral_density(t, v, 3000)
+        self.assertEqual(len(f2), 1500)
+        self.assertAlmostEqual(f2[30], f[10])
+        self.assertAlmostEqual(p2[30], psd[10], 1)
+        f2, p2 = d.power_spectral_density(t[:997], v[:997], 'fast')
+        self.assertEqual(len(f2), 500)
+
+        # Multiple traces at once
+        v2 = np.array([v, 3 * v])
+        f2, p2 = d.power_spectral_density(t, v2)
+        self.assertEqual(p2.shape, (2, 500))
+        self.assertTrue(np.allclose(p2[0], psd))
+        self.assertTrue(np.allclose(p2[1], 9 * psd))
+
+        # Results can be written into an existing array
+        out = np.zeros(p2.shape)
+        f3, p3 = d.power_spectral_density(t, v2, out=out, workspace=None)
+        self.assertIs(p3, out)
+        self.assertTrue(np.all(p2 == p3))
+        self.assertRaisesRegex(
+            ValueError, 'out must be', d.power_spectral_density, t, v2,
+            out=np.zeros((2, 501)))
+
         # Test if input is unchanged
         t = np.linspace(0, 10, 123)
         v = 6 * np.sin(t * (2 * np.pi * 2))
         self.assertUnchanged(d.power_spectral_density, t, v)
 
+    def _welch(self, t, v, size=256, overlap=None, window='hann',
+               detrend=True, density=True):
+        # Straightforward implementation of scipy.signal.welch, returning
+        # either the density or the spectrum (squared amplitude).
+        size = min(size, len(v))
+        overlap = size // 2 if overlap is None else overlap
+        k = np.arange(size)
+        if isinstance(window, np.ndarray):
+            w = window
+        elif window == 'hann':
+            w = 0.5 - 0.5 * np.cos(2 * np.pi * k / size)
+        else:
+            w = np.ones(size)
+        ps = []
+        for i in range(0, len(v) - size + 1, size - overlap):
+            x = v[i:i + size]
+            if detrend:
+                x = x - np.mean(x)
+            p = np.abs(np.fft.rfft(x * w))**2
+            if density:
+                p /= np.sum(w**2) / (t[1] - t[0])
+            else:
+                p /= np.sum(w)**2
+            p[1:] *= 2
+            if size % 2 == 0:
+                p[-1] /= 2
+            ps.append(p)
+        return np.fft.rfftfreq(size, t[1] - t[0]), np.mean(ps, axis=0)
+
+    def test_fast_length(self):
+        f = d._spectral._fast_length
+        self.assertEqual(f(1), 1)
+        self.assertEqual(f(7), 8)
+        self.assertEqual(f(11), 12)
+        self.assertEqual(f(13), 15)
+        self.assertEqual(f(97), 100)
+        self.assertEqual(f(1001), 1024)
+        self.assertEqual(f(1025), 1080)
+        self.assertEqual(f(4000003), 4050000)
+        for n in range(1, 500):
+            m = f(n)
+            self.assertGreaterEqual(m, n)
+            for p in (2, 3, 5):
+                while m % p == 0:
+                    m //= p
+            self.assertEqual(m, 1)
+
+    def test_welch_amplitude_spectrum(self):
+
+        # Sine waves are detected with their full amplitude
+        r = np.random.default_rng(1)
+        t = np.arange(100000) * 0.001
+        v = 3 * np.sin(2 * np.pi * 50 * t) + 5 * np.cos(2 * np.pi * 120 * t)
+        v += r.normal(0, 0.1, t.shape)
+        f, a = d.welch_amplitude_spectrum(t, v, 1000)
+        self.assertEqual(len(f), 501)
+        self.assertEqual(f[50], 50)
+        self.assertEqual(f[120], 120)
+        self.assertAlmostEqual(a[50], 3, 2)
+        self.assertAlmostEqual(a[120], 5, 2)
+        self.assertLess(a[60], 0.01)
+        f, a = d.welch_amplitude_spectrum(t, v, 1000, window='boxcar')
+        self.assertAlmostEqual(a[50], 3, 2)
+        self.assertAlmostEqual(a[120], 5, 2)
+        self.assertLess(a[51], 0.01)
+
+        # Compare with reference implementation
+        for args in ((256, ), (100, 10, 'boxcar', False), (99, 0)):
+            f1, a1 = d.welch_amplitude_spectrum(t, v, *args)
+            f2, a2 = self._welch(t, v, *args, density=False)
+            self.assertTrue(np.allclose(f1, f2))
+            self.assertTrue(np.allclose(a1[1:-1], np.sqrt(2 * a2[1:-1])))
+            self.assertAlmostEqual(a1[0], np.sqrt(a2[0]))
+
+        # Input is unchanged
+        self.assertUnchanged(d.welch_amplitude_spectrum, t[:500], v[:500])
+
+    def test_welch_power_spectral_density(self):
+
+        # White noise has a flat spectrum, with the variance as its integral
+        r = np.random.default_rng(1)
+        t = np.arange(100000) * 0.001
+        v = r.normal(0, 2, t.shape)
+        f, p = d.welch_power_spectral_density(t, v)
+        self.assertEqual(len(f), 129)
+        self.assertEqual(f[1], 1000 / 256)
+        self.assertAlmostEqual(np.mean(p[1:-1]), 2 * 4 * 0.001, 3)
+        self.assertLess(np.std(p[1:-1]), 0.001)
+        self.assertAlmostEqual(np.sum(p) * f[1] / np.var(v), 1, 2)
+
+        # Compare with reference implementation
+        v += 3 * np.sin(2 * np.pi * 50 * t)
+        for args in ((), (256, ), (128, 0), (1000, 900), (99, 10, 'boxcar'),
+                     (64, 32, np.hamming(64), False), (10**6, )):
+            f1, p1 = d.welch_power_spectral_density(t, v, *args)
+            f2, p2 = self._welch(t, v, *args)
+            self.assertTrue(np.allclose(f1, f2))
+            self.assertTrue(np.allclose(p1, p2))
+
+        # Results don't depend on the batch size
+        size = d.chunk_size()
+        try:
+            d.set_chunk_size(300)
+            f2, p2 = d.welch_power_spectral_density(t, v, *args)
+            self.assertTrue(np.allclose(p1, p2))
+        finally:
+            d.set_chunk_size(size)
+
+        # Multiple traces
+        w = np.stack((v, 2 * v, r.normal(size=t.shape)))
+        f, p = d.welch_power_spectral_density(t, w, 128, 0)
+        self.assertEqual(p.shape, (3, 65))
+        for k in range(3):
+            f2, p2 = d.welch_power_spectral_density(t, w[k], 128, 0)
+            self.assertTrue(np.allclose(p[k], p2, rtol=1e-12, atol=0))
+        self.assertTrue(np.allclose(p[1], 4 * p[0]))
+
+        # Wrong arguments
+        self.assertRaisesRegex(ValueError, 'same size',
+                               d.welch_power_spectral_density, t, v[:-1])
+        self.assertRaisesRegex(ValueError, 'at least 2',
+                               d.welch_power_spectral_density, t, v, 1)
+        self.assertRaisesRegex(ValueError, 'overlap must',
+                               d.welch_power_spectral_density, t, v, 10, 10)
+        self.assertRaisesRegex(ValueError, 'overlap must',
+                               d.welch_power_spectral_density, t, v, 10, -1)
+        self.assertRaisesRegex(ValueError, 'Unknown window',
+                               d.welch_power_spectral_density, t, v,
+                               window='hanning')
+        self.assertRaisesRegex(ValueError, 'length 256',
+                               d.welch_power_spectral_density, t, v,
+                               window=np.ones(10))
+
+        # Input is unchanged
+        self.assertUnchanged(
+            d.welch_power_spectral_density, t[:1000], v[:1000])
+
 
 if __name__ == '__main__':
     import unittest
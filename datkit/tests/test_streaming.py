@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+#
+# Tests the streaming filter classes.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import numpy as np
+
+import datkit as d
+import datkit.tests
+
+
+class StreamingTest(datkit.tests.TestCase):
+    """ Tests the classes from the hidden _streaming module. """
+
+    def _stream(self, f, times, values, sizes):
+        """
+        Feeds ``times, values`` to ``f`` in chunks of the given sizes, and then
+        flushes it.
+        """
+        xs, ys, i = [], [], 0
+        for n in sizes:
+            x, y = f.process(times[i:i + n], values[i:i + n])
+            self.assertEqual(len(x), len(y))
+            xs.append(x)
+            ys.append(y)
+            i += n
+        x, y = f.flush()
+        self.assertEqual(len(x), len(y))
+        xs.append(x)
+        ys.append(y)
+        return np.concatenate(xs), np.concatenate(ys)
+
+    def test_creation(self):
+        f = d.StreamingMovingAverage(5)
+        self.assertEqual(f.w, 5)
+        f = d.StreamingGaussianSmoothing(t=0.5, dt=0.1)
+        self.assertEqual(f.w, 5)
+        self.assertRaisesRegex(
+            ValueError, 'dt must be given', d.StreamingMovingAverage, t=0.5)
+        self.assertRaisesRegex(
+            ValueError, 'odd number', d.StreamingMovingAverage, 4)
+        self.assertRaisesRegex(
+            ValueError, 'both None', d.StreamingMovingAverage)
+        self.assertFalse(hasattr(d, 'StreamingFilter'))
+
+    def test_gaussian_smoothing(self):
+        r = np.random.default_rng(1)
+        t = np.arange(3000) * 0.1
+        v = r.normal(size=t.shape)
+        sizes = [1, 2, 0, 5, 100, 1, 1, 1000, 890, 1000]
+
+        # Direct convolution: identical results
+        x1, y1 = d.gaussian_smoothing(t, v, 11)
+        f = d.StreamingGaussianSmoothing(11)
+        x2, y2 = self._stream(f, t, v, sizes)
+        self.assertTrue(np.all(x1 == x2))
+        self.assertTrue(np.all(y1 == y2))
+
+        # Flushing without data
+        x, y = f.flush()
+        self.assertEqual(len(x), 0)
+        self.assertEqual(len(y), 0)
+
+        # FFT convolution: identical results, returned in blocks
+        x1, y1 = d.gaussian_smoothing(t, v, 1001)
+        f = d.StreamingGaussianSmoothing(1001)
+        x2, y2 = self._stream(f, t, v, sizes)
+        self.assertTrue(np.all(x1 == x2))
+        self.assertTrue(np.all(y1 == y2))
+        for n in (1200, 5000, 40000):
+            t = np.arange(n) * 0.1
+            v = r.normal(size=t.shape)
+            x1, y1 = d.gaussian_smoothing(t, v, 1001)
+            for sizes in ([n], [1] * 1500 + [n], [997] * (n // 997 + 1)):
+                x2, y2 = self._stream(f, t, v, sizes)
+                self.assertTrue(np.all(x1 == x2))
+                self.assertTrue(np.all(y1 == y2))
+
+        # Outputs are held back until their block is complete
+        L = 8192
+        self.assertEqual(f._b, L - 1000)
+        x, y = f.process(t[:L - 1], v[:L - 1])
+        self.assertEqual(len(y), 0)
+        x, y = f.process(t[L - 1:L], v[L - 1:L])
+        self.assertTrue(np.all(x == x1[:L - 1000]))
+        self.assertTrue(np.all(y == y1[:L - 1000]))
+        self.assertLess(len(f._times), L)
+
+        # Reset
+        f.reset()
+        x1, y1 = d.gaussian_smoothing(t[:3000], v[:3000], 1001)
+        x2, y2 = self._stream(f, t, v, [1500, 1500])
+        self.assertTrue(np.all(x1 == x2))
+        self.assertTrue(np.all(y1 == y2))
+
+    def test_moving_average(self):
+        r = np.random.default_rng(2)
+        t = np.arange(3000)
+        v = r.normal(size=t.shape)
+        sizes = [3, 400, 7, 1590, 0, 1000]
+
+        # Direct convolution: identical results
+        x1, y1 = d.moving_average(t, v, 7)
+        f = d.StreamingMovingAverage(7)
+        x2, y2 = self._stream(f, t, v, sizes)
+        self.assertEqual(x2.dtype, t.dtype)
+        self.assertTrue(np.all(x1 == x2))
+        self.assertTrue(np.all(y1 == y2))
+
+        # Running sums: identical results
+        for w in (101, 1501):
+            x1, y1 = d.moving_average(t, v, w)
+            f = d.StreamingMovingAverage(w)
+            x2, y2 = self._stream(f, t, v, sizes)
+            self.assertTrue(np.all(x1 == x2))
+            self.assertTrue(np.all(y1 == y2))
+            x2, y2 = self._stream(f, t, v, [1] * 3000)
+            self.assertTrue(np.all(x1 == x2))
+            self.assertTrue(np.all(y1 == y2))
+        t = np.arange(20000)
+        v = 1e6 + r.normal(size=t.shape)
+        x1, y1 = d.moving_average(t, v, 101)
+        f = d.StreamingMovingAverage(101)
+        x2, y2 = self._stream(f, t, v, [3, 7000, 5000, 2, 7995])
+        self.assertTrue(np.all(x1 == x2))
+        self.assertTrue(np.all(y1 == y2))
+
+        # Outputs are returned as soon as their window is complete
+        f = d.StreamingMovingAverage(101)
+        x, y = f.process(t[:100], v[:100])
+        self.assertEqual(len(y), 0)
+        x, y = f.process(t[100:101], v[100:101])
+        self.assertEqual(len(y), 1)
+        x, y = f.flush()
+        self.assertEqual(len(y), 0)
+
+        # Memory is bounded by the block size
+        for i in range(10):
+            f.process(t[:5000], v[:5000])
+            self.assertLess(len(f._times), 1124)
+
+        # Memory is constant
+        f = d.StreamingMovingAverage(9)
+        for i in range(10):
+            f.process(t, v)
+            self.assertEqual(len(f._times), 8)
+            self.assertEqual(len(f._values), 8)
+
+        # Wrong arguments
+        self.assertRaisesRegex(
+            ValueError, 'same size', f.process, t, v[:-1])
+
+        # Input is unchanged
+        f = d.StreamingMovingAverage(9)
+        self.assertUnchanged(f.process, t, v)
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+#
+# Tests the datkit TimeSeries class.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import numpy as np
+
+import datkit as d
+import datkit.tests
+
+
+class TimeSeriesTest(datkit.tests.TestCase):
+    """ Tests the TimeSeries class from the hidden _time_series module. """
+
+    @classmethod
+    def setUpClass(cls):
+        r = np.random.default_rng(1)
+        cls.t = np.linspace(0, 2, 201)
+        cls.v = np.cos(cls.t * np.pi) + r.normal(0, 0.1, cls.t.shape)
+        cls.s = d.TimeSeries(cls.t, cls.v)
+
+    def test_creation(self):
+        # Test creating a time series, and accessing its data
+
+        t, v = [1, 2, 3], [4, 5, 6]
+        s = d.TimeSeries(t, v)
+        self.assertIsInstance(s.times, np.ndarray)
+        self.assertIsInstance(s.values, np.ndarray)
+        self.assertEqual(list(s.times), t)
+        self.assertEqual(list(s.values), v)
+        self.assertEqual(len(s), 3)
+
+        # Arrays are not copied
+        t, v = np.arange(10), np.ones(10)
+        s = d.TimeSeries(t, v)
+        self.assertIs(s.times, t)
+        self.assertIs(s.values, v)
+
+        # Wrong arguments
+        self.assertRaisesRegex(ValueError, '1-d', d.TimeSeries, [[1]], [[1]])
+        self.assertRaisesRegex(ValueError, 'Values must be a 1-d',
+                               d.TimeSeries, [1, 2], [[1, 2], [3, 4]])
+        self.assertRaisesRegex(ValueError, 'Values must be a 1-d',
+                               d.TimeSeries, [1], 1)
+        self.assertRaisesRegex(
+            ValueError, 'at least one', d.TimeSeries, [], [])
+        self.assertRaisesRegex(
+            ValueError, 'same size', d.TimeSeries, [1, 2], [1, 2, 3])
+
+    def test_check_times(self):
+        # Test methods from _check_times
+
+        s = self.s
+        self.assertEqual(s.dt, d.sampling_interval(self.t))
+        self.assertEqual(s.sampling_interval(), s.dt)
+        self.assertTrue(s.is_increasing())
+        self.assertTrue(s.is_increasing())
+        self.assertTrue(s.is_regularly_increasing())
+        self.assertTrue(s.is_regularly_increasing())
+        self.assertTrue(s.is_regularly_increasing(1e-6))
+
+        s = d.TimeSeries([1, 2, 4, 5], [1, 2, 3, 4])
+        self.assertTrue(s.is_increasing())
+        self.assertFalse(s.is_regularly_increasing())
+        self.assertTrue(s.is_regularly_increasing(1))
+        self.assertEqual(s.first_irregularity(), 0)
+        self.assertIsNone(s.first_irregularity(1))
+        self.assertIsNone(self.s.first_irregularity())
+
+        s = d.TimeSeries([1], [1])
+        self.assertRaisesRegex(ValueError, 'two values', getattr, s, 'dt')
+
+    def test_points(self):
+        # Test methods from _points
+
+        s, t, v = self.s, self.t, self.v
+        intervals = [
+            (None, None), (0, 1), (0.5, 1), (0.6, 1.5), (1.5, 2), (1.5, None),
+            (None, 0.31), (-1, 3)]
+        for t0, t1 in intervals:
+            for a in (True, False):
+                for b in (True, False):
+                    args = (t0, t1, a, b)
+                    self.assertEqual(s.index_on(*args), d.index_on(t, *args))
+                    x, y = s.data_on(*args)
+                    self.assertTrue(np.shares_memory(x, t))
+                    self.assertTrue(np.shares_memory(y, v))
+                    self.assertEqual(x[0], d.data_on(t, v, *args)[0][0])
+                    for name in ('abs_max_on', 'max_on', 'min_on', 'imax_on',
+                                 'imin_on', 'iabs_max_on'):
+                        self.assertEqual(getattr(s, name)(*args),
+                                         getattr(d, name)(t, v, *args))
+                    self.assertAlmostEqual(
+                        s.mean_on(*args), d.mean_on(t, v, *args))
+                    self.assertAlmostEqual(
+                        s.sum_on(*args), d.sum_on(t, v, *args))
+                    self.assertAlmostEqual(
+                        s.variance_on(*args), d.variance_on(t, v, *args))
+
+        # Empty intervals
+        with self.assertWarns(RuntimeWarning):
+            self.assertTrue(np.isnan(s.mean_on(0.5, 0.5)))
+        with self.assertWarns(RuntimeWarning):
+            self.assertTrue(np.isnan(s.variance_on(0.5, 0.5)))
+        self.assertEqual(s.sum_on(0.5, 0.5), 0)
+
+        # Batch methods
+        t0 = [0, 0.5, 0.6, 1.5, 1.5]
+        t1 = [1, 1, 1.5, 2, 10]
+        i, j = s.indices_on(t0, t1)
+        self.assertEqual(list(i), list(d.indices_on(t, t0, t1)[0]))
+        self.assertEqual(list(j), list(d.indices_on(t, t0, t1)[1]))
+        for name in ('imaxima_on', 'iminima_on', 'iabs_maxima_on'):
+            self.assertEqual(list(getattr(s, name)(t0, t1)),
+                             list(getattr(d, name)(t, v, t0, t1)))
+            x = d.TimeSeries(t, v)
+            self.assertEqual(list(getattr(x, name)(t0, t1)),
+                             list(getattr(d, name)(t, v, t0, t1)))
+        for name in ('maxima_on', 'minima_on', 'abs_maxima_on'):
+            x1, y1 = getattr(s, name)(t0, t1, False, True)
+            x2, y2 = getattr(d, name)(t, v, t0, t1, False, True)
+            self.assertEqual(list(x1), list(x2))
+            self.assertEqual(list(y1), list(y2))
+        self.assertTrue(np.allclose(
+            s.means_on(t0, t1), d.means_on(t, v, t0, t1)))
+        m = s.means_on([0, 1, 3], [0, 2, 4])
+        self.assertTrue(np.isnan(m[0]))
+        self.assertTrue(np.isnan(m[2]))
+
+        # Integer values
+        x = d.TimeSeries([0, 1, 2, 3], [1, 2, 3, 5])
+        self.assertEqual(x.mean_on(1, 4), 10 / 3)
+        self.assertEqual(x.mean_on(), 11 / 4)
+        self.assertEqual(x.sum_on(), 11)
+
+        # Values with nan or inf
+        y = np.array(v)
+        y[100] = np.nan
+        x = d.TimeSeries(t, y)
+        self.assertEqual(x.mean_on(0, 0.5), d.mean_on(t, y, 0, 0.5))
+        self.assertEqual(x.sum_on(1.5, 2), d.sum_on(t, y, 1.5, 2))
+        self.assertEqual(x.variance_on(0, 0.5), d.variance_on(t, y, 0, 0.5))
+        self.assertTrue(np.isnan(x.mean_on(0.5, 1.5)))
+        m = x.means_on([0, 0.5, 1.5], [0.5, 1.5, 2])
+        self.assertAlmostEqual(m[0], d.mean_on(t, y, 0, 0.5))
+        self.assertTrue(np.isnan(m[1]))
+        self.assertAlmostEqual(m[2], d.mean_on(t, y, 1.5, 2))
+        y[100] = np.inf
+        x = d.TimeSeries(t, y)
+        self.assertEqual(x.mean_on(0, 0.5), d.mean_on(t, y, 0, 0.5))
+        self.assertEqual(x.mean_on(0.5, 1.5), np.inf)
+
+        # Points
+        self.assertEqual(s.index(0.5), d.index(t, 0.5))
+        self.assertEqual(s.index_near(0.503), d.index_near(t, 0.503))
+        self.assertEqual(s.index_near(-0.004), 0)
+        self.assertRaisesRegex(ValueError, 'range', s.index_near, -0.006)
+        self.assertEqual(s.value_at(0.5), d.value_at(t, v, 0.5))
+        self.assertEqual(s.value_near(0.503), d.value_near(t, v, 0.503))
+        self.assertEqual(s.value_interpolated(0.503),
+                         d.value_interpolated(t, v, 0.503))
+        x = [-1, 0.503, 0.7777, 100]
+        self.assertTrue(np.all(s.value_interpolated(x, mask=True)
+                               == d.value_interpolated(t, v, x, mask=True)))
+        self.assertTrue(np.all(s.value_near(x, mask=True)
+                               == d.value_near(t, v, x, mask=True)))
+        self.assertEqual(list(s.value_near(x, mask=True).mask),
+                         [True, False, False, True])
+        y = s.value_interpolated(x, mask=True)
+        y[0] = 1
+        self.assertEqual(list(y.mask), [False, False, False, True])
+        self.assertEqual(s.index_crossing(), d.index_crossing(v))
+        self.assertEqual(s.time_crossing(0.2), d.time_crossing(t, v, 0.2))
+        i, j = s.index_crossings(0.2, 1, 0.1, 3)
+        k, m = d.index_crossings(v, 0.2, 1, 0.1, 3)
+        self.assertTrue(np.all(i == k) and np.all(j == m))
+        self.assertTrue(np.all(s.time_crossings(0.2, -1, 0.1, 0.5)
+                               == d.time_crossings(t, v, 0.2, -1, 0.1, 0.5)))
+        for x, y in zip(s.index_steps(0.1, 3), d.index_steps(v, 0.1, 3)):
+            self.assertTrue(np.all(x == y))
+        for x, y in zip(s.time_steps(0.1, 3), d.time_steps(t, v, 0.1, 3)):
+            self.assertTrue(np.all(x == y))
+
+    def test_prefix_sums(self):
+        # Test the numerical accuracy of sums and variances
+
+        r = np.random.default_rng(1)
+        t = np.arange(100000)
+        v = 1e6 + r.normal(0, 1, t.shape)
+        s = d.TimeSeries(t, v)
+        for t0, t1 in ((0, 100000), (10, 20), (1023, 1025), (99990, 99999)):
+            self.assertAlmostEqual(
+                s.mean_on(t0, t1) - 1e6, d.mean_on(t, v, t0, t1) - 1e6, 9)
+            self.assertAlmostEqual(
+                s.variance_on(t0, t1), d.variance_on(t, v, t0, t1), 9)
+            self.assertLess(
+                abs(s.sum_on(t0, t1) / d.sum_on(t, v, t0, t1) - 1), 1e-14)
+
+        # Variances on segments far from the mean of all values
+        t = np.arange(1000000)
+        v = np.where(t < 500000, 0, 1e5) + r.normal(0, 1e-2, t.shape)
+        s = d.TimeSeries(t, v)
+        for t0, t1 in ((0, 10), (1000, 2000), (600000, 610000),
+                       (100000, 400000), (500000, 1000000), (400000, 600000)):
+            x, y = s.variance_on(t0, t1), d.variance_on(t, v, t0, t1)
+            self.assertLess(abs(x / y - 1), 1e-9)
+
+        # Sums are used for intervals with a small enough rounding error
+        v = r.normal(0, 1, t.shape)
+        s = d.TimeSeries(t, v)
+        x = s.variance_on(400000, 600000)
+        y = d.variance_on(t, v, 400000, 600000)
+        self.assertNotEqual(x, y)
+        self.assertLess(abs(x / y - 1), 1e-9)
+
+        # Test the table with varying block sizes
+        from datkit._time_series import _PrefixSums
+        x = np.arange(10)
+        for b in (1, 2, 3, 4, 5, 9, 10, 11):
+            p = _PrefixSums(x, b)
+            for i in range(11):
+                self.assertEqual(p.prefix(i), sum(x[:i]))
+                for j in range(i, 11):
+                    self.assertEqual(p.sum(i, j), sum(x[i:j]))
+            self.assertEqual(list(p.prefix(np.arange(11))),
+                             [sum(x[:i]) for i in range(11)])
+
+    def test_range_extrema(self):
+        # Test the table of extrema, using small blocks
+
+        from datkit._time_series import _RangeExtrema
+        r = np.random.default_rng(1)
+        x = np.round(r.normal(0, 2, 3000))
+        x[[10, 500, 501, 2000]] = np.nan
+        i = r.integers(0, 3000, 100)
+        j = np.minimum(i + r.integers(1, 3000, 100), 3000)
+        for b in (1, 2, 3, 8):
+            for maximum, arg in ((True, np.argmax), (False, np.argmin)):
+                e = _RangeExtrema(x, maximum, b)
+                expected = [p + arg(x[p:q]) for p, q in zip(i, j)]
+                self.assertEqual([e.index(p, q) for p, q in zip(i, j)],
+                                 expected)
+                self.assertEqual(list(e.indices(i, j)), expected)
+        self.assertRaisesRegex(
+            ValueError, 'Interval 1', e.indices, np.array([1, 2]),
+            np.array([3, 2]))
+
+        # Test via time series
+        t = np.arange(len(x))
+        s = d.TimeSeries(t, x)
+        self.assertEqual(s.imax_on(5, 2500), d.imax_on(t, x, 5, 2500))
+        self.assertEqual(s.imin_on(20, 400), d.imin_on(t, x, 20, 400))
+        self.assertEqual(
+            s.iabs_max_on(520, 1800), d.iabs_max_on(t, x, 520, 1800))
+
+    def test_regular(self):
+        # Test regular lookups
+
+        t = np.linspace(0, 2, 201)
+        v = np.sin(t)
+        for regular in (None, True, False):
+            s = d.TimeSeries(t, v, regular)
+            for x in (0, 0.5, 0.51, 2):
+                self.assertEqual(s.index(x), d.index(t, x))
+                self.assertEqual(s.value_at(x), d.value_at(t, v, x))
+            for x in (-0.004, 0.505, 0.5051, 1.999, 2.004):
+                self.assertEqual(s.index_near(x), d.index_near(t, x))
+            for x in (0, 0.505, 0.5051, 1.999, 2):
+                self.assertEqual(
+                    s.value_interpolated(x), d.value_interpolated(t, v, x))
+            self.assertEqual(s.index_on(0.5, 1), d.index_on(t, 0.5, 1))
+            self.assertEqual(s.imax_on(0, 1.5), d.imax_on(t, v, 0, 1.5))
+            x = np.array([0.5, 0.7, 0.8])
+            self.assertEqual(list(s.index(x)), list(d.index(t, x)))
+            self.assertEqual(list(s.index_near(x)), list(d.index_near(t, x)))
+            self.assertEqual(list(s.imaxima_on(x, x + 0.2)),
+                             list(d.imaxima_on(t, v, x, x + 0.2)))
+
+        # Detection
+        s = d.TimeSeries(t, v)
+        self.assertEqual(s._lookup_step(), s.dt)
+        s = d.TimeSeries(t, v, False)
+        self.assertIsNone(s._lookup_step())
+        t = np.array([0, 1, 2, 10, 11])
+        s = d.TimeSeries(t, t)
+        self.assertIsNone(s._lookup_step())
+        self.assertEqual(s.index(10), 3)
+        t = np.arange(10**5) * 0.1
+        s = d.TimeSeries(t, t)
+        self.assertFalse(s.is_regularly_increasing())
+        self.assertEqual(s._lookup_step(), s.dt)
+        x = np.linspace(0, t[-1], 1001)
+        self.assertEqual(list(s.index_near(x)), list(d.index_near(t, x)))
+        s = d.TimeSeries([3], [3])
+        self.assertIsNone(s._lookup_step())
+        self.assertEqual(s.index(3), 0)
+
+    def test_smoothing(self):
+        # Test methods from _smoothing
+
+        s, t, v = self.s, self.t, self.v
+        self.assertEqual(s.window_size(5), 5)
+        self.assertEqual(s.window_size(t=0.05), d.window_size(t, t=0.05))
+        self.assertRaisesRegex(
+            ValueError, 'Two window sizes', s.window_size, 3, 0.3)
+        for name in ('moving_average', 'gaussian_smoothing'):
+            x1, y1 = getattr(s, name)(t=0.05)
+            x2, y2 = getattr(d, name)(t, v, t=0.05)
+            self.assertTrue(np.all(x1 == x2))
+            self.assertTrue(np.all(y1 == y2))
+            x1, y1 = getattr(s, name)(t=0.05, workers=2)
+            self.assertTrue(np.all(y1 == y2))
+        for name, arg in (('haar_downsample', 2), ('lttb_downsample', 50),
+                          ('minmax_downsample', 50)):
+            x1, y1 = getattr(s, name)(arg)
+            x2, y2 = getattr(d, name)(t, v, arg)
+            self.assertTrue(np.all(x1 == x2))
+            self.assertTrue(np.all(y1 == y2))
+        for (x1, y1), (x2, y2) in zip(s.haar_pyramid(3),
+                                      d.haar_pyramid(t, v, 3)):
+            self.assertTrue(np.all(x1 == x2))
+            self.assertTrue(np.all(y1 == y2))
+
+    def test_spectral(self):
+        # Test methods from _spectral
+
+        s, t, v = self.s, self.t, self.v
+        for name in ('amplitude_spectrum', 'power_spectral_density'):
+            x1, y1 = getattr(s, name)()
+            x2, y2 = getattr(d, name)(t, v)
+            self.assertTrue(np.all(x1 == x2))
+            self.assertTrue(np.all(y1 == y2))
+            x1, y1 = getattr(s, name)('fast')
+            x2, y2 = getattr(d, name)(t, v, 'fast')
+            self.assertTrue(np.all(x1 == x2))
+            self.assertTrue(np.all(y1 == y2))
+        for name in ('welch_amplitude_spectrum',
+                     'welch_power_spectral_density'):
+            x1, y1 = getattr(s, name)(64, 16, 'hamming', False)
+            x2, y2 = getattr(d, name)(t, v, 64, 16, 'hamming', False)
+            self.assertTrue(np.all(x1 == x2))
+            self.assertTrue(np.all(y1 == y2))
+
+
+if __name__ == '__main__':
+    import unittest
+    unittest.main()
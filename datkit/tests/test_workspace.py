@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+#
+# Tests reusing memory with out arguments and workspaces.
+#
+# This file is part of Datkit.
+# For copyright, sharing, and licensing, see https://github.com/myokit/datkit/
+#
+import tracemalloc
+import unittest
+import unittest.mock
+
+import numpy as np
+
+import datkit as d
+import datkit.tests
+
+
+def _peak(f, *args, **kwargs):
+    """ Returns the peak memory allocated during ``f(*args, **kwargs)``. """
+    tracemalloc.start()
+    try:
+        f(*args, **kwargs)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+class WorkspaceTest(datkit.tests.TestCase):
+    """ Tests methods from the hidden _workspace module. """
+
+    @classmethod
+    def setUpClass(cls):
+        n = 1 << 20
+        cls.t = np.arange(n) * 0.1
+        cls.v = np.random.default_rng(1).normal(size=(2, n))
+        cls.limit = cls.v.nbytes // 16
+
+    def check(self, f, shape, out=None, **kwargs):
+        # Checks that repeated calls don't allocate memory
+        out = np.empty(shape) if out is None else out
+        ws = d.Workspace()
+        f(self.t, self.v, out=out, workspace=ws, **kwargs)
+        nbytes = ws.nbytes()
+        for i in range(3):
+            self.assertLess(_peak(f, self.t, self.v, out=out, workspace=ws,
+                                  **kwargs), self.limit)
+        self.assertEqual(ws.nbytes(), nbytes)
+
+        # But do without out and workspace
+        self.assertGreater(_peak(f, self.t, self.v, **kwargs), self.limit)
+
+    def test_haar_downsample(self):
+        n = len(self.t) >> 3
+        out = (np.empty(n), np.empty((2, n)))
+        self.check(d.haar_downsample, None, out, repeats=3)
+
+    def test_moving_average(self):
+        for w in (5, 501):
+            m = len(self.t) - w + 1
+            out = np.empty((2, m))
+            d.moving_average(self.t, self.v, w, out=out)
+            for i in range(3):
+                self.assertLess(_peak(d.moving_average, self.t, self.v, w,
+                                      out=out), self.limit)
+            self.assertGreater(
+                _peak(d.moving_average, self.t, self.v, w), self.limit)
+
+    def test_fft(self):
+        # Without FFT out arguments (NumPy < 2), results are the same
+        t, v = self.t[:5000], self.v[:, :5000]
+        ws = d.Workspace()
+        x = d.gaussian_smoothing(t, v, 1001, workspace=ws)[1]
+        y = d.power_spectral_density(t, v, workspace=ws)[1]
+        with unittest.mock.patch('datkit._workspace._FFT_OUT', False):
+            out = np.zeros(x.shape)
+            self.assertIs(d.gaussian_smoothing(
+                t, v, 1001, out=out, workspace=ws)[1], out)
+            self.assertTrue(np.all(out == x))
+            out = np.zeros(y.shape)
+            self.assertIs(d.power_spectral_density(
+                t, v, out=out, workspace=ws)[1], out)
+            self.assertTrue(np.all(out == y))
+
+    def test_gaussian_smoothing(self):
+        self.check(d.gaussian_smoothing, (2, len(self.t) - 10), w=11)
+
+    @unittest.skipIf(not d._workspace._FFT_OUT, 'FFT out requires NumPy 2')
+    def test_spectra(self):
+        m = len(self.t) // 2
+        self.check(d.gaussian_smoothing, (2, len(self.t) - 1000), w=1001)
+        self.check(d.amplitude_spectrum, (2, m))
+        self.check(d.power_spectral_density, (2, m))
+
+
+if __name__ == '__main__':
+    unittest.main()
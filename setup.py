@@ -67,7 +67,7 @@ setup(
     #include_package_data=True,
 
     # Python version
-    python_requires='>=3.7',
+    python_requires='>=3.8',
 
     # List of dependencies
     install_requires=[